@@ -1,16 +1,22 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, StreamingResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import asyncio
+import threading
 import uvicorn
 import json
 from datetime import datetime
+from typing import Optional
 
 import os
 from ai_recommendations import RecommendationManager
 from config.settings import settings
-from src.stream import StreamHandler
-from src.database import DatabaseManager
+from src.broadcast import BroadcastRegistry, StatsBroadcastRegistry
+from src.stream import MultiStreamHandler, StreamHandler
+from src.database import AsyncDatabase, DatabaseManager, create_database
+from src.encoder import jpeg_encoder
+from src.metrics import metrics
+from src.utils import DatabaseTimeoutError
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -30,7 +36,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-stream_handler: StreamHandler = None
+stream_manager: MultiStreamHandler = None
+broadcasts = BroadcastRegistry()
+
+# Acceso a datos compartido por todas las peticiones (un solo pool)
+db_manager: Optional[DatabaseManager] = None
+db_lock = threading.Lock()
+async_db: Optional[AsyncDatabase] = None
 
 
 def serialize_for_json(obj):
@@ -39,12 +51,45 @@ def serialize_for_json(obj):
     return obj
 
 
+stats_broadcasts = StatsBroadcastRegistry(default=serialize_for_json)
+
+
+def get_stream_manager() -> MultiStreamHandler:
+    global stream_manager
+    if stream_manager is None:
+        stream_manager = MultiStreamHandler(use_database=True)
+        stream_manager.start()
+    return stream_manager
+
+
+def get_db() -> DatabaseManager:
+    global db_manager
+    with db_lock:
+        if db_manager is None:
+            create_database()
+            db_manager = DatabaseManager(name="api")
+    return db_manager
+
+
+async def get_async_db() -> AsyncDatabase:
+    global async_db
+    if async_db is None:
+        # Crear el pool también es bloqueante: fuera del event loop
+        db = await asyncio.get_running_loop().run_in_executor(None, get_db)
+        if async_db is None:
+            async_db = AsyncDatabase(db)
+    return async_db
+
+
 def get_stream_handler() -> StreamHandler:
-    global stream_handler
-    if stream_handler is None:
-        stream_handler = StreamHandler(use_database=True)
-        stream_handler.start()
-    return stream_handler
+    return get_stream_manager().default
+
+
+def get_camera_handler(camera_id: str) -> StreamHandler:
+    handler = get_stream_manager().get(camera_id)
+    if handler is None:
+        raise HTTPException(status_code=404, detail=f"Cámara no encontrada: {camera_id}")
+    return handler
 
 
 @app.on_event("startup")
@@ -53,7 +98,12 @@ async def startup_event():
     print(f"INICIANDO {settings.PROJECT_NAME} v{settings.VERSION}")
     print("=" * 70)
 
-    get_stream_handler()
+    get_stream_manager()
+
+    try:
+        get_db()
+    except Exception as e:
+        print(f"Base de datos no disponible al iniciar (se reintentará por petición): {e}")
 
     print(f"API disponible en: http://{settings.API_HOST}:{settings.API_PORT}")
     print("=" * 70)
@@ -61,9 +111,14 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    global stream_handler
-    if stream_handler:
-        stream_handler.stop()
+    global stream_manager
+    if stream_manager:
+        stream_manager.stop()
+    jpeg_encoder.shutdown()
+    if async_db:
+        async_db.shutdown()
+    if db_manager:
+        db_manager.close()
 
     print("=" * 70)
     print("API DETENIDA")
@@ -72,11 +127,11 @@ async def shutdown_event():
 
 @app.get("/api/health")
 async def health_check():
-    handler = get_stream_handler()
+    manager = get_stream_manager()
     return {
         "status": "health",
         "version": settings.VERSION,
-        "stream_active": handler.is_alive(),
+        "stream_active": manager.is_alive(),
         "timestamp": datetime.now().isoformat(),
     }
 
@@ -88,49 +143,53 @@ async def system_info():
         "version": settings.VERSION,
         "model": settings.MODEL_PATH,
         "camera": settings.CAMERA_SOURCE,
+        "cameras": get_stream_manager().get_cameras_info(),
+        "batching": get_stream_manager().get_batching_stats(),
+        "video_streams": broadcasts.get_stats(),
+        "stats_streams": stats_broadcasts.get_stats(),
+        "jpeg_encoder": jpeg_encoder.get_stats(),
         "database": {
             "host": settings.DB_HOST,
             "name": settings.DB_NAME,
-            "connected": True,
+            "connected": db_manager is not None,
+            "pool": db_manager.get_pool_stats() if db_manager else None,
         },
     }
 
 
-def generate_frames():
-    handler = get_stream_handler()
-
-    while True:
-        frame_bytes = handler.get_jpeg_frame()
-
-        if frame_bytes is None:
-            continue
-
-        yield (
-            b"--frame\r\n" b"Content-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n"
-        )
-
-
-@app.get("/api/video_feed")
-async def video_feed():
+def _mjpeg_response(handler: StreamHandler, fps: Optional[float],
+                    quality: Optional[int], variant: Optional[str]) -> StreamingResponse:
+    try:
+        broadcaster = broadcasts.get(handler, quality, variant)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return StreamingResponse(
-        generate_frames(), media_type="multipart/x-mixed-replace; boundary=frame"
+        broadcaster.stream(max_fps=fps),
+        media_type="multipart/x-mixed-replace; boundary=frame",
     )
 
 
-@app.get("/api/stats")
-async def stats():
-    handler = get_stream_handler()
-
-    stats = handler.get_statistics()
+@app.get("/api/video_feed")
+async def video_feed(
+    fps: Optional[float] = Query(None, gt=0, le=60),
+    quality: Optional[int] = Query(None, ge=10, le=95),
+    variant: Optional[str] = Query(None),
+):
+    return _mjpeg_response(get_stream_handler(), fps, quality, variant)
+
+
+async def _stats_response(handler: StreamHandler) -> JSONResponse:
+    # get_statistics consulta la BD: se ejecuta fuera del event loop
+    stats = await asyncio.get_running_loop().run_in_executor(
+        None, handler.get_statistics
+    )
 
     return JSONResponse(
         content=json.loads(json.dumps(stats, default=serialize_for_json))
     )
 
 
-@app.get("/api/reset")
-async def reset_stats():
-    handler = get_stream_handler()
+def _reset_response(handler: StreamHandler) -> dict:
     handler.reset_counter()
     return {
         "status": "success",
@@ -139,71 +198,59 @@ async def reset_stats():
     }
 
 
-@app.get("/api/recent_entries")
-async def get_recent_entries():
-    try:
-        db = DatabaseManager()
-        entries = db.get_recent_entries()
-        db.close()
-        return entries
-    except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+@app.get("/api/stats")
+async def stats():
+    return await _stats_response(get_stream_handler())
 
 
-@app.get("/api/entries/total")
-async def get_total_entries():
-    try:
-        db = DatabaseManager()
-        total = db.get_total_entries()
-        db.close()
-        return {"total": total}
-    except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+@app.get("/api/reset")
+async def reset_stats():
+    return _reset_response(get_stream_handler())
 
-@app.get("/api/entries/daily")
-async def get_daily_entries():
-    try:
-        db = DatabaseManager()
-        conn = db._get_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        query = """
-            SELECT 
-                DATE(timestamp) AS fecha,
-                COUNT(*) AS total
-            FROM entradas
-            GROUP BY DATE(timestamp)
-            ORDER BY fecha ASC
-        """
-
-        cursor.execute(query)
-        results = cursor.fetchall()
-
-        cursor.close()
-        conn.close()
-        db.close()
-
-        # Asegurar formato compatible JSON
-        for row in results:
-            if isinstance(row["fecha"], datetime):
-                row["fecha"] = row["fecha"].date().isoformat()
 
-        return results
+@app.get("/api/metrics")
+async def prometheus_metrics():
+    return PlainTextResponse(
+        metrics.render_prometheus(), media_type="text/plain; version=0.0.4"
+    )
 
-    except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
 
+@app.get("/api/cameras")
+async def list_cameras():
+    return get_stream_manager().get_cameras_info()
 
-@app.get("/api/peak_hours")
-async def get_peak_hours():
+
+@app.get("/api/cameras/{camera_id}/video_feed")
+async def camera_video_feed(
+    camera_id: str,
+    fps: Optional[float] = Query(None, gt=0, le=60),
+    quality: Optional[int] = Query(None, ge=10, le=95),
+    variant: Optional[str] = Query(None),
+):
+    return _mjpeg_response(get_camera_handler(camera_id), fps, quality, variant)
+
+
+@app.get("/api/cameras/{camera_id}/stats")
+async def camera_stats(camera_id: str):
+    return await _stats_response(get_camera_handler(camera_id))
+
+
+@app.get("/api/cameras/{camera_id}/reset")
+async def camera_reset(camera_id: str):
+    return _reset_response(get_camera_handler(camera_id))
+
+
+def _db_error_response(error: Exception) -> JSONResponse:
+    status_code = 504 if isinstance(error, DatabaseTimeoutError) else 500
+    return JSONResponse(content={"error": str(error)}, status_code=status_code)
+
+
+async def _algorithm_results_response(name: str):
     try:
-        db = DatabaseManager()
-        results = db.get_algorithm_results("peak_hour")
-        db.close()
+        db = await get_async_db()
+        results = await db.run("get_algorithm_results", name)
 
         for row in results:
-            if "timestamp" in row and row["timestamp"]:
-                row["timestamp"] = row["timestamp"]
             if "resultado" in row:
                 row["resultado"] = (
                     json.loads(row["resultado"])
@@ -213,71 +260,77 @@ async def get_peak_hours():
 
         return results
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+        return _db_error_response(e)
 
 
-@app.get("/api/weather_predictions")
-async def get_weather_predictions():
+@app.get("/api/recent_entries")
+async def get_recent_entries():
     try:
-        db = DatabaseManager()
-        results = db.get_algorithm_results("Weather prediction")
-        db.close()
+        db = await get_async_db()
+        return await db.run("get_recent_entries")
+    except Exception as e:
+        return _db_error_response(e)
 
-        for row in results:
-            if "timestamp" in row and row["timestamp"]:
-                row["timestamp"] = row["timestamp"]
-            if "resultado" in row:
-                row["resultado"] = (
-                    json.loads(row["resultado"])
-                    if isinstance(row["resultado"], str)
-                    else row["resultado"]
-                )
 
-        return results
+@app.get("/api/entries/total")
+async def get_total_entries():
+    try:
+        db = await get_async_db()
+        total = await db.run("get_total_entries")
+        return {"total": total}
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+        return _db_error_response(e)
 
 
-@app.get("/api/predictions")
-async def get_predictions():
+@app.get("/api/entries/daily")
+async def get_daily_entries():
     try:
-        db = DatabaseManager()
-        results = db.get_algorithm_results("Prediction")
-        db.close()
+        db = await get_async_db()
+        return await db.run("get_daily_totals")
+    except Exception as e:
+        return _db_error_response(e)
 
-        for row in results:
-            if "timestamp" in row and row["timestamp"]:
-                row["timestamp"] = row["timestamp"]
-            if "resultado" in row:
-                row["resultado"] = (
-                    json.loads(row["resultado"])
-                    if isinstance(row["resultado"], str)
-                    else row["resultado"]
-                )
 
-        return results
+@app.get("/api/entries/hourly")
+async def get_hourly_entries(hours: int = Query(24, ge=1, le=24 * 31)):
+    try:
+        db = await get_async_db()
+        return await db.run("get_hourly_totals", hours)
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+        return _db_error_response(e)
+
+
+@app.get("/api/peak_hours")
+async def get_peak_hours():
+    return await _algorithm_results_response("peak_hour")
+
+
+@app.get("/api/weather_predictions")
+async def get_weather_predictions():
+    return await _algorithm_results_response("Weather prediction")
+
+
+@app.get("/api/predictions")
+async def get_predictions():
+    return await _algorithm_results_response("Prediction")
 
 
 @app.websocket("/ws/stats")
 async def websocket_stats(websocket: WebSocket):
     await websocket.accept()
-    handler = get_stream_handler()
+    # Un solo productor por cámara; este socket solo recibe el JSON ya serializado
+    updates = stats_broadcasts.get(get_stream_handler()).stream()
 
     try:
-        while True:
-            stats = handler.get_statistics()
-
-            stats_json = json.dumps(stats, default=serialize_for_json)
+        async for stats_json in updates:
             await websocket.send_text(stats_json)
 
-            await asyncio.sleep(1)
-
     except WebSocketDisconnect:
         print("Cliente desconectado")
     except Exception as e:
         print(f"Error en el WebSocket: {str(e)}")
+    finally:
+        await updates.aclose()
 
 
 recommendation_manager = None
@@ -300,14 +353,13 @@ async def generate_ai_recommendation():
             status_code=503,
         )
     try:
-        db = DatabaseManager()
+        db = await get_async_db()
 
-        peak_hours = db.get_algorithm_results_prediccion("peak_hour")
-        weather = db.get_algorithm_results_prediccion("Weather prediction")
-        predictions = db.get_algorithm_results_prediccion("Prediction")
-        total = db.get_total_entries()
+        peak_hours = await db.run("get_algorithm_results_prediccion", "peak_hour")
+        weather = await db.run("get_algorithm_results_prediccion", "Weather prediction")
+        predictions = await db.run("get_algorithm_results_prediccion", "Prediction")
+        total = await db.run("get_total_entries")
 
-        db.close()
 
         datos_prediccion = {
             "hora_pico": peak_hours[0] if peak_hours else None,
@@ -320,27 +372,7 @@ async def generate_ai_recommendation():
 
         if resultado["status"] == "success":
             try:
-                db = DatabaseManager()
-                connection = db._get_connection()
-                cursor = connection.cursor()
-
-                query = """
-                    INSERT INTO recomendaciones (algoritmo, timestamp, resultado)
-                    VALUES ('AI_Recommendation', %s, %s)
-                """
-
-                cursor.execute(
-                    query,
-                    (
-                        datetime.now(),
-                        json.dumps(resultado, ensure_ascii=False, indent=2),
-                    ),
-                )
-
-                cursor.close()
-                connection.close()
-                db.close()
-
+                await db.run("insert_recommendation", "AI_Recommendation", resultado)
                 print("Recomendación guardada en BD")
             except Exception as e:
                 print(f"No se pudo guardar en BD: {e}")
@@ -357,27 +389,10 @@ async def generate_ai_recommendation():
 async def get_latest_ai_recommendation():
 
     try:
-        db = DatabaseManager()
-        connection = db._get_connection()
-        cursor = connection.cursor(dictionary=True)
-
-        query = """
-            SELECT * FROM recomendaciones 
-            WHERE algoritmo = 'AI_Recommendation'
-            ORDER BY timestamp DESC 
-            LIMIT 1
-        """
-        cursor.execute(query)
-        result = cursor.fetchone()
-
-        cursor.close()
-        connection.close()
-        db.close()
+        db = await get_async_db()
+        result = await db.run("get_latest_recommendation", "AI_Recommendation")
 
         if result:
-            if result["timestamp"]:
-                result["timestamp"] = result["timestamp"].isoformat()
-
             if result["resultado"]:
                 result["resultado"] = json.loads(result["resultado"])
 
@@ -390,7 +405,7 @@ async def get_latest_ai_recommendation():
             }
 
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+        return _db_error_response(e)
 
 
 @app.post("/api/recommendations/weather")
@@ -405,9 +420,8 @@ async def generate_weather_recommendation():
         )
 
     try:
-        db = DatabaseManager()
-        weather = db.get_algorithm_results_prediccion("Weather prediction")
-        db.close()
+        db = await get_async_db()
+        weather = await db.run("get_algorithm_results_prediccion", "Weather prediction")
 
         if not weather:
             return JSONResponse(
@@ -419,24 +433,7 @@ async def generate_weather_recommendation():
 
         if resultado["status"] == "success":
             try:
-                db = DatabaseManager()
-                conn = db._get_connection()
-                cursor = conn.cursor()
-                query = """
-                    INSERT INTO recomendaciones (algoritmo, timestamp, resultado)
-                    VALUES ('AI_Weather_Recommendation', %s, %s)
-                """
-                cursor.execute(
-                    query,
-                    (
-                        datetime.now(),
-                        json.dumps(resultado, ensure_ascii=False, indent=2),
-                    ),
-                )
-                conn.commit()
-                cursor.close()
-                conn.close()
-                db.close()
+                await db.run("insert_recommendation", "AI_Weather_Recommendation", resultado)
                 print("Recomendación climática guardada en BD")
             except Exception as e:
                 print(f"No se pudo guardar en BD: {e}")
@@ -452,27 +449,10 @@ async def generate_weather_recommendation():
 @app.get("/api/recommendations/latest/weather")
 async def get_latest_weather_recommendation():
     try:
-        db = DatabaseManager()
-        connection = db._get_connection()
-        cursor = connection.cursor(dictionary=True)
-
-        query = """
-            SELECT * FROM recomendaciones 
-            WHERE algoritmo = 'AI_Weather_Recommendation'
-            ORDER BY timestamp DESC 
-            LIMIT 1
-        """
-        cursor.execute(query)
-        result = cursor.fetchone()
-
-        cursor.close()
-        connection.close()
-        db.close()
+        db = await get_async_db()
+        result = await db.run("get_latest_recommendation", "AI_Weather_Recommendation")
 
         if result:
-            if result["timestamp"]:
-                result["timestamp"] = result["timestamp"].isoformat()
-
             if result["resultado"]:
                 result["resultado"] = json.loads(result["resultado"])
 
@@ -485,7 +465,7 @@ async def get_latest_weather_recommendation():
             }
 
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+        return _db_error_response(e)
 
 
 if __name__ == "__main__":
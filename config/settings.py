@@ -1,5 +1,7 @@
 import os
+import re
 from pathlib import Path
+from typing import Dict, Optional
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
@@ -19,20 +21,54 @@ class Settings:
     DB_USER = os.getenv("DB_USER", "root")
     DB_PASSWORD = os.getenv("DB_PASSWORD", "admin")
     DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "2.0"))  # Espera máx. con el pool lleno
+    DB_QUERY_TIMEOUT = float(os.getenv("DB_QUERY_TIMEOUT", "5.0"))  # Timeout por petición de la API
+    STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", "2.0"))  # Segundos
     
     # Cámara
     CAMERA_SOURCE = os.getenv("CAMERA_SOURCE", "0")
+    # Multi-cámara: "puerta1=rtsp://...,puerta2=1" (sin id se usa cam0, cam1, ...)
+    CAMERA_SOURCES = os.getenv("CAMERA_SOURCES", "")
     CAMERA_RECONNECT_RETRIES = int(os.getenv("CAMERA_RECONNECT_RETRIES", "3"))
     CAMERA_RECONNECT_DELAY = float(os.getenv("CAMERA_RECONNECT_DELAY", "1.0"))
+
+    # Captura en hilo dedicado con buffer circular (el frame más reciente gana)
+    CAMERA_THREADED = os.getenv("CAMERA_THREADED", "true").lower() == "true"
+    CAMERA_BUFFER_SIZE = int(os.getenv("CAMERA_BUFFER_SIZE", "2"))
+    CAMERA_READ_TIMEOUT = float(os.getenv("CAMERA_READ_TIMEOUT", "2.0"))
     
     # Detección YOLO
     MODEL_PATH = os.getenv("MODEL_PATH", "yolov8n.pt")
     MODEL_VERSION = "YOLOv8n"
+
+    # Backend de inferencia: "ultralytics" (PyTorch) u "onnx" (ONNX Runtime en CPU)
+    DETECTOR_BACKEND = os.getenv("DETECTOR_BACKEND", "ultralytics")
+    ONNX_PROVIDERS = [
+        p.strip() for p in os.getenv("ONNX_PROVIDERS", "CPUExecutionProvider").split(",")
+        if p.strip()
+    ]
+    ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))  # 0 = núcleos
+    ONNX_INTER_OP_THREADS = int(os.getenv("ONNX_INTER_OP_THREADS", "1"))
+    # Precisión del modelo ONNX: "fp32" o "int8" (cuantización estática calibrada)
+    DETECTOR_PRECISION = os.getenv("DETECTOR_PRECISION", "fp32").lower()
+    CALIBRATION_MAX_IMAGES = int(os.getenv("CALIBRATION_MAX_IMAGES", "300"))
+    NMS_IOU_THRESHOLD = float(os.getenv("NMS_IOU_THRESHOLD", "0.45"))
+    MAX_DETECTIONS = int(os.getenv("MAX_DETECTIONS", "20"))
+
+    # Micro-batching entre cámaras (una pasada del modelo para varios frames)
+    DETECTION_BATCH_SIZE = int(os.getenv("DETECTION_BATCH_SIZE", "4"))
+    DETECTION_BATCH_WAIT_MS = float(os.getenv("DETECTION_BATCH_WAIT_MS", "10"))
     
     # ACTUALIZADO: Umbrales de confianza más altos
     CONFIDENCE_THRESHOLD = float(os.getenv("CONFIDENCE_THRESHOLD", "0.3"))
     MIN_CONFIDENCE = float(os.getenv("MIN_CONFIDENCE", "0.4"))
     
+    # Detección solo en una ventana alrededor de la línea de conteo
+    DETECTION_ROI = os.getenv("DETECTION_ROI", "false").lower() == "true"
+    ROI_MARGIN_X = int(os.getenv("ROI_MARGIN_X", "120"))
+    ROI_MARGIN_TOP = int(os.getenv("ROI_MARGIN_TOP", "320"))
+    ROI_MARGIN_BOTTOM = int(os.getenv("ROI_MARGIN_BOTTOM", "160"))
+
     # Validación de bbox
     MIN_HEIGHT = 70
     MIN_AREA_RATIO = 0.0015
@@ -44,6 +80,18 @@ class Settings:
     TRACKING_TIMEOUT = float(os.getenv("TRACKING_TIMEOUT", "1.5"))
     DISTANCE_TRACKING = int(os.getenv("DISTANCE_TRACKING", "150"))
     MAX_FRAMES_LOST = int(os.getenv("MAX_FRAMES_LOST", "10"))
+    TRACK_HISTORY = int(os.getenv("TRACK_HISTORY", "20"))  # Posiciones guardadas por track
+    # Filtro de Kalman por track (píxeles, segundos)
+    KALMAN_MEASUREMENT_NOISE = float(os.getenv("KALMAN_MEASUREMENT_NOISE", "15"))
+    KALMAN_PROCESS_NOISE = float(os.getenv("KALMAN_PROCESS_NOISE", "400"))
+    KALMAN_GATE_CHI2 = float(os.getenv("KALMAN_GATE_CHI2", "9.21"))  # Chi² 2 g.l. al 99%
+    # Asignación óptima track-detección: costo = distancia + pesos * (1 - IoU, Δconfianza)
+    TRACKER_IOU_WEIGHT = float(os.getenv("TRACKER_IOU_WEIGHT", "100"))
+    TRACKER_CONFIDENCE_WEIGHT = float(os.getenv("TRACKER_CONFIDENCE_WEIGHT", "50"))
+    TRACKER_ASSIGNMENT_SOLVER = os.getenv("TRACKER_ASSIGNMENT_SOLVER", "auto").lower()  # auto | scipy | numpy
+    # Asociación en dos etapas (ByteTrack): el detector entrega también las cajas
+    # entre CONFIDENCE_THRESHOLD y MIN_CONFIDENCE, usadas solo para tracks existentes
+    TRACKER_TWO_STAGE = os.getenv("TRACKER_TWO_STAGE", "false").lower() == "true"
     
     # Aproximación
     DIRECTION_THRESHOLD = int(os.getenv("DIRECTION_THRESHOLD", "30"))
@@ -57,10 +105,41 @@ class Settings:
     # NUEVO: Optimización de performance
     PROCESS_EVERY_N_FRAMES = int(os.getenv("PROCESS_EVERY_N_FRAMES", "2"))
     
+    # Control adaptativo del stride de detección (reemplaza las teclas +/-);
+    # PROCESS_EVERY_N_FRAMES es el stride inicial, o el fijo si está desactivado
+    ADAPTIVE_CONTROL = os.getenv("ADAPTIVE_CONTROL", "true").lower() == "true"
+    ADAPTIVE_TARGET_LATENCY_MS = float(os.getenv("ADAPTIVE_TARGET_LATENCY_MS", "0"))  # 0 = ritmo de la cámara
+    ADAPTIVE_MAX_STRIDE = int(os.getenv("ADAPTIVE_MAX_STRIDE", "6"))
+    ADAPTIVE_MAX_STRIDE_ACTIVE = int(os.getenv("ADAPTIVE_MAX_STRIDE_ACTIVE", "3"))
+    ADAPTIVE_IMGSZ = os.getenv("ADAPTIVE_IMGSZ", "false").lower() == "true"
+    ADAPTIVE_INTERVAL = int(os.getenv("ADAPTIVE_INTERVAL", "15"))  # Frames entre decisiones
+
+    # Compuerta de movimiento: no ejecutar YOLO si la zona de la línea está estática
+    MOTION_GATE = os.getenv("MOTION_GATE", "false").lower() == "true"
+    MOTION_THRESHOLD = float(os.getenv("MOTION_THRESHOLD", "0.01"))  # Fracción de píxeles
+    MOTION_HOLD_FRAMES = int(os.getenv("MOTION_HOLD_FRAMES", "15"))
+    MOTION_SCALE_WIDTH = int(os.getenv("MOTION_SCALE_WIDTH", "160"))
+    MOTION_PIXEL_DELTA = int(os.getenv("MOTION_PIXEL_DELTA", "25"))
+    MOTION_LEARNING_RATE = float(os.getenv("MOTION_LEARNING_RATE", "0.05"))
+
     # Performance
     BATCH_DB_INSERTS = os.getenv("BATCH_DB_INSERTS", "true").lower() == "true"
-    BATCH_SIZE = int(os.getenv("BATCH_SIZE", "10"))
+    BATCH_SIZE = int(os.getenv("BATCH_SIZE", "50"))  # Filas por flush del escritor
+    DB_FLUSH_INTERVAL_MS = float(os.getenv("DB_FLUSH_INTERVAL_MS", "500"))
+    DB_WRITER_QUEUE_SIZE = int(os.getenv("DB_WRITER_QUEUE_SIZE", "10000"))
+    DB_WRITER_PUT_TIMEOUT_MS = float(os.getenv("DB_WRITER_PUT_TIMEOUT_MS", "20"))  # Espera máx. con la cola llena
+    DB_WRITER_OVERFLOW_SIZE = int(os.getenv("DB_WRITER_OVERFLOW_SIZE", "10000"))  # Luego se descarta
+    DB_RETRY_MAX_BACKOFF = float(os.getenv("DB_RETRY_MAX_BACKOFF", "30"))  # Segundos
     JPEG_QUALITY = int(os.getenv("JPEG_QUALITY", "85"))
+    JPEG_ENCODE_WORKERS = int(os.getenv("JPEG_ENCODE_WORKERS", "2"))
+    JPEG_USE_TURBO = os.getenv("JPEG_USE_TURBO", "true").lower() == "true"
+    STREAM_VARIANT_WIDTHS = [
+        int(w) for w in os.getenv("STREAM_VARIANT_WIDTHS", "640,320").split(",")
+        if w.strip()
+    ]
+    STREAM_MAX_FPS = float(os.getenv("STREAM_MAX_FPS", "15"))  # Tope por espectador
+    STATS_PUSH_INTERVAL = float(os.getenv("STATS_PUSH_INTERVAL", "1.0"))  # Tick de /ws/stats
+    STREAM_WAIT_TIMEOUT = float(os.getenv("STREAM_WAIT_TIMEOUT", "1.0"))  # Espera máx. de un frame nuevo
     FPS_UPDATE_INTERVAL = int(os.getenv("FPS_UPDATE_INTERVAL", "30"))
     
     # Paths
@@ -68,14 +147,45 @@ class Settings:
     CONFIG_DIR = BASE_DIR / "config"
     LOGS_DIR = BASE_DIR / "logs"
     MODELS_DIR = BASE_DIR / "models"
+    CALIBRATION_DIR = Path(os.getenv("CALIBRATION_DIR", str(BASE_DIR / "calibration")))
+    SPOOL_DIR = Path(os.getenv("SPOOL_DIR", str(BASE_DIR / "spool")))
+
+    # Spool local de entradas (write-ahead log antes de MySQL)
+    SPOOL_ENABLED = os.getenv("SPOOL_ENABLED", "true").lower() == "true"
+    SPOOL_FSYNC_INTERVAL_MS = float(os.getenv("SPOOL_FSYNC_INTERVAL_MS", "200"))
+    SPOOL_SEGMENT_MAX_BYTES = int(os.getenv("SPOOL_SEGMENT_MAX_BYTES", str(1024 * 1024)))
+    SPOOL_REPLAY_INTERVAL_MS = float(os.getenv("SPOOL_REPLAY_INTERVAL_MS", "500"))
     
     # Crear directorios si no existen
     LOGS_DIR.mkdir(exist_ok=True)
     MODELS_DIR.mkdir(exist_ok=True)
     
     @classmethod
-    def get_line_config_path(cls) -> Path:
-        return cls.CONFIG_DIR / "line_config.json"
+    def get_line_config_path(cls, camera_id: Optional[str] = None) -> Path:
+        default_path = cls.CONFIG_DIR / "line_config.json"
+
+        if camera_id is None:
+            return default_path
+
+        camera_path = cls.CONFIG_DIR / f"line_config_{camera_id}.json"
+        return camera_path if camera_path.exists() else default_path
+
+    @classmethod
+    def get_camera_sources(cls) -> Dict[str, str]:
+        if not cls.CAMERA_SOURCES.strip():
+            return {"cam0": cls.CAMERA_SOURCE}
+
+        sources = {}
+        entries = [e.strip() for e in cls.CAMERA_SOURCES.split(",") if e.strip()]
+
+        for index, entry in enumerate(entries):
+            match = re.match(r"^([\w-]+)=(.+)$", entry)
+            if match:
+                sources[match.group(1)] = match.group(2).strip()
+            else:
+                sources[f"cam{index}"] = entry
+
+        return sources
     
     @classmethod
     def validate(cls):
@@ -83,8 +193,22 @@ class Settings:
         assert cls.MIN_CONFIDENCE >= cls.CONFIDENCE_THRESHOLD, "MIN_CONFIDENCE debe ser >= CONFIDENCE_THRESHOLD"
         assert cls.MIN_AREA_RATIO < cls.MAX_AREA_RATIO, "MIN_AREA_RATIO debe ser < MAX_AREA_RATIO"
         assert cls.BATCH_SIZE > 0, "BATCH_SIZE debe ser > 0"
+        assert cls.DB_WRITER_QUEUE_SIZE > 0, "DB_WRITER_QUEUE_SIZE debe ser > 0"
+        assert cls.DB_WRITER_PUT_TIMEOUT_MS >= 0, "DB_WRITER_PUT_TIMEOUT_MS debe ser >= 0"
+        assert cls.DB_WRITER_OVERFLOW_SIZE >= 0, "DB_WRITER_OVERFLOW_SIZE debe ser >= 0"
+        assert cls.DB_FLUSH_INTERVAL_MS > 0, "DB_FLUSH_INTERVAL_MS debe ser > 0"
         assert cls.PROCESS_EVERY_N_FRAMES >= 1, "PROCESS_EVERY_N_FRAMES debe ser >= 1"
+        assert cls.ADAPTIVE_MAX_STRIDE >= 1, "ADAPTIVE_MAX_STRIDE debe ser >= 1"
+        assert cls.ADAPTIVE_INTERVAL >= 1, "ADAPTIVE_INTERVAL debe ser >= 1"
         assert cls.MAX_FRAMES_LOST > 0, "MAX_FRAMES_LOST debe ser > 0"
+        assert cls.FRAMES_MIN_DETECTION >= 2, "FRAMES_MIN_DETECTION debe ser >= 2"
+        assert cls.TRACK_HISTORY >= cls.FRAMES_MIN_DETECTION, "TRACK_HISTORY debe ser >= FRAMES_MIN_DETECTION"
+        assert cls.DETECTOR_PRECISION in ("fp32", "int8"), "DETECTOR_PRECISION debe ser fp32 o int8"
+        assert cls.DETECTION_BATCH_SIZE >= 1, "DETECTION_BATCH_SIZE debe ser >= 1"
+        assert cls.CAMERA_BUFFER_SIZE >= 1, "CAMERA_BUFFER_SIZE debe ser >= 1"
+        assert cls.JPEG_ENCODE_WORKERS >= 1, "JPEG_ENCODE_WORKERS debe ser >= 1"
+        assert cls.TRACKER_ASSIGNMENT_SOLVER in ("auto", "scipy", "numpy"), \
+            "TRACKER_ASSIGNMENT_SOLVER debe ser auto, scipy o numpy"
 
 
 # Validar al importar
@@ -6,8 +6,10 @@ from src.camera import CameraManager
 
 
 class LineConfigurator:
-    def __init__(self):
-        self.camera = CameraManager()
+    def __init__(self, camera_id: str = None):
+        self.camera_id = camera_id
+        source = settings.get_camera_sources().get(camera_id) if camera_id else None
+        self.camera = CameraManager(source)
         self.line_points = []
         self.drawing = False
         self.frame = None
@@ -98,7 +100,10 @@ class LineConfigurator:
             print("Error: La línea no está completa")
             return False
         
-        config_path = settings.get_line_config_path()
+        if self.camera_id:
+            config_path = settings.CONFIG_DIR / f"line_config_{self.camera_id}.json"
+        else:
+            config_path = settings.get_line_config_path()
         
         config = {
             "line": self.line_points,
@@ -190,8 +195,8 @@ class LineConfigurator:
         print("Configurador cerrado")
 
 
-def main():
-    configurator = LineConfigurator()
+def main(camera_id: str = None):
+    configurator = LineConfigurator(camera_id)
     configurator.run()
 
 
@@ -200,8 +205,8 @@ if __name__ == "__main__":
     
     # Si se pasa --config como argumento, abrir configurador
     if len(sys.argv) > 1 and sys.argv[1] == "--config":
-        main()
+        main(sys.argv[2] if len(sys.argv) > 2 else None)
     else:
-        print("Uso: python line_configurator.py --config")
+        print("Uso: python line_configurator.py --config [id_camara]")
         print("O simplemente: python line_configurator.py")
         main()
\ No newline at end of file
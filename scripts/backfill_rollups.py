@@ -0,0 +1,39 @@
+"""
+Backfill de los rollups de entradas.
+Recalcula entradas_hora y entradas_dia a partir de la tabla entradas. Se
+ejecuta una vez al migrar una base con datos previos (el sistema lo hace
+solo si crea las tablas de rollup) o para corregir desvíos.
+
+Uso:
+    python scripts/backfill_rollups.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.database import DatabaseManager
+from src.utils import print_header, print_info
+
+
+def main():
+    print_header("BACKFILL DE ROLLUPS")
+
+    db = DatabaseManager(name="backfill")
+
+    start = time.perf_counter()
+    db.rebuild_rollups()
+    elapsed = time.perf_counter() - start
+
+    stats = db.get_statistics()
+    print_info("Total de entradas", stats.total_entries)
+    print_info("Días con datos (7 días)", len(stats.daily_entry))
+    print_info("Tiempo", f"{elapsed:.2f} s")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark de backends de detección.
+Compara latencia y FPS de PersonDetector con cada backend sobre los mismos frames.
+
+Uso:
+    python scripts/benchmark_detector.py --video grabacion.mp4
+    python scripts/benchmark_detector.py --backends ultralytics onnx --frames 300
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.settings import settings
+from src.detector import PersonDetector
+from src.utils import print_header, print_info
+
+
+def load_frames(video: str, count: int) -> List[np.ndarray]:
+    if not video:
+        # Sin video: frames sintéticos (mide solo el costo de inferencia)
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8) for _ in range(count)]
+
+    cap = cv2.VideoCapture(video)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+
+    if not frames:
+        raise SystemExit(f"No se pudieron leer frames de {video}")
+    return frames
+
+
+def run_backend(backend: str, frames: List[np.ndarray], warmup: int, imgsz: int) -> dict:
+    detector = PersonDetector(backend=backend)
+    detector.set_imgsz(imgsz)
+
+    for frame in frames[:warmup]:
+        detector.detect(frame)
+
+    latencies = []
+    detections = 0
+    start = time.perf_counter()
+
+    for frame in frames:
+        t0 = time.perf_counter()
+        detections += len(detector.detect(frame))
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies)
+
+    return {
+        "backend": detector.backend.describe(),
+        "fps": len(frames) / elapsed,
+        "mean_ms": latencies.mean(),
+        "p50_ms": np.percentile(latencies, 50),
+        "p95_ms": np.percentile(latencies, 95),
+        "detections": detections,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de backends de PersonDetector")
+    parser.add_argument("--video", type=str, default=None, help="Video grabado a reproducir")
+    parser.add_argument("--frames", type=int, default=200, help="Frames a medir")
+    parser.add_argument("--warmup", type=int, default=10, help="Frames de calentamiento")
+    parser.add_argument("--imgsz", type=int, default=640, help="Tamaño de entrada del modelo")
+    parser.add_argument(
+        "--backends", nargs="+", default=["ultralytics", "onnx"],
+        help="Backends a comparar",
+    )
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    results = [run_backend(b, frames, args.warmup, args.imgsz) for b in args.backends]
+
+    print_header("BENCHMARK DE DETECCIÓN")
+    print_info("Modelo", settings.MODEL_PATH)
+    print_info("Frames", len(frames))
+    print_info("imgsz", args.imgsz)
+    print("-" * 70)
+    print(f"{'Backend':<32}{'FPS':>8}{'Media':>10}{'p50':>10}{'p95':>10}")
+    for r in results:
+        print(
+            f"{r['backend']:<32}{r['fps']:>8.1f}{r['mean_ms']:>8.1f}ms"
+            f"{r['p50_ms']:>8.1f}ms{r['p95_ms']:>8.1f}ms"
+        )
+    print("-" * 70)
+
+    base = results[0]
+    for r in results[1:]:
+        print_info(f"Speedup {r['backend']} vs {base['backend']}", f"{r['fps'] / base['fps']:.2f}x")
+        print_info(
+            f"Detecciones {r['backend']} / {base['backend']}",
+            f"{r['detections']} / {base['detections']}",
+        )
+
+
+if __name__ == "__main__":
+    main()
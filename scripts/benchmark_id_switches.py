@@ -0,0 +1,185 @@
+"""
+Benchmark de estabilidad de IDs del tracker.
+Reproduce una fila de personas caminando hacia la cámara en la que cada una
+queda parcialmente ocluida por tramos (confianza entre CONFIDENCE_THRESHOLD
+y MIN_CONFIDENCE) y compara el tracker de una etapa contra el de dos etapas
+(TRACKER_TWO_STAGE). Reporta ID switches, tracks creados por persona real y
+personas que alguna vez fueron contables (track estable).
+
+Las detecciones se emulan como las entregaría PersonDetector: en una etapa
+se descarta todo lo que está bajo MIN_CONFIDENCE. El tracker usa un reloj
+simulado a --fps para que el filtro de Kalman vea intervalos reales.
+
+Uso:
+    python scripts/benchmark_id_switches.py
+    python scripts/benchmark_id_switches.py --people 40 --frames 900 --strides 1 2 4
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import src.tracker as tracker_module
+from config.settings import settings
+from src.tracker import PersonTracker
+from src.utils import print_header, print_info
+
+FRAME_WIDTH, FRAME_HEIGHT = 1280, 720
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+def make_queue(people: int, frames: int, fps: float, seed: int) -> List[List[Tuple[int, np.ndarray]]]:
+    """
+    Por frame, lista de (id real, caja x1, y1, x2, y2, conf). Las personas
+    entran escalonadas por arriba y bajan hacia la cámara creciendo.
+    """
+    rng = np.random.default_rng(seed)
+
+    start = np.sort(rng.uniform(0, frames * 0.7, people)).astype(int)
+    duration = rng.uniform(4.0, 7.0, people) * fps
+    lane_x = rng.uniform(450, 830, people)
+    drift = rng.normal(0, 15, people)  # px/s lateral
+
+    # Tramos de oclusión parcial: (inicio relativo, largo) en frames
+    occlusions = []
+    for d in duration:
+        spans = []
+        for _ in range(rng.integers(1, 4)):
+            length = int(rng.uniform(0.5, 1.5) * fps)
+            spans.append((int(rng.uniform(0, max(d - length, 1))), length))
+        occlusions.append(spans)
+
+    sequence = []
+    for frame in range(frames):
+        detections = []
+        for person in range(people):
+            age = frame - start[person]
+            if age < 0 or age >= duration[person]:
+                continue
+
+            progress = age / duration[person]
+            bottom = 260 + progress * (FRAME_HEIGHT - 270)
+            height = 120 + progress * 260
+            width = height / 2.4
+            center = lane_x[person] + drift[person] * age / fps
+
+            occluded = any(s <= age < s + n for s, n in occlusions[person])
+            if occluded:
+                conf = rng.uniform(settings.CONFIDENCE_THRESHOLD, settings.MIN_CONFIDENCE)
+            else:
+                conf = rng.uniform(settings.MIN_CONFIDENCE + 0.1, 0.95)
+
+            noise = rng.normal(0, 3.0, 4)
+            box = np.array([
+                center - width / 2, bottom - height, center + width / 2, bottom, conf,
+            ])
+            box[:4] += noise
+            detections.append((person, box))
+        sequence.append(detections)
+
+    return sequence
+
+
+def replay(sequence, fps: float, stride: int, two_stage: bool) -> dict:
+    clock = SimulatedClock()
+    tracker_module.time = clock
+    tracker = PersonTracker(two_stage=two_stage)
+
+    last_track: Dict[int, int] = {}
+    tracks_per_person: Dict[int, set] = {}
+    stable_people = set()
+    switches = 0
+    matches = 0
+
+    for index, detections in enumerate(sequence):
+        clock.now += 1.0 / fps
+
+        if index % stride:
+            tracker.predict()
+            continue
+
+        min_conf = settings.CONFIDENCE_THRESHOLD if two_stage else settings.MIN_CONFIDENCE
+        kept = [(pid, box) for pid, box in detections if box[4] >= min_conf]
+
+        # Punto de apoyo (como lo calcula el tracker) -> persona real
+        truth = {}
+        for pid, box in kept:
+            x1, _, x2, y2 = box[:4].astype(np.int64)
+            truth[((x1 + x2) // 2, y2)] = pid
+
+        boxes = np.array([box for _, box in kept]) if kept else np.empty((0, 5))
+        tracked = tracker.update(boxes)
+
+        for track_id, person in tracked.items():
+            if person.frames_lost:
+                continue
+            pid = truth.get(person.get_last_position())
+            if pid is None:
+                continue
+
+            matches += 1
+            if pid in last_track and last_track[pid] != track_id:
+                switches += 1
+            last_track[pid] = track_id
+            tracks_per_person.setdefault(pid, set()).add(track_id)
+            if person.is_stable():
+                stable_people.add(pid)
+
+    people = len(tracks_per_person)
+    return {
+        "id_switches": switches,
+        "switch_rate": switches / matches * 1000 if matches else 0.0,
+        "tracks_per_person": np.mean([len(t) for t in tracks_per_person.values()]) if people else 0.0,
+        "stable_people": len(stable_people),
+        "low_confidence_matches": tracker.low_confidence_matches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ID switches: tracker de una vs dos etapas")
+    parser.add_argument("--people", type=int, default=30, help="Personas en la fila")
+    parser.add_argument("--frames", type=int, default=900, help="Frames de la escena")
+    parser.add_argument("--fps", type=float, default=15.0, help="FPS de la cámara simulada")
+    parser.add_argument("--strides", type=int, nargs="+", default=[1, 2, 4],
+                        help="Detectar 1 de cada N frames")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print_header("BENCHMARK DE ID SWITCHES")
+    print_info("Personas", args.people)
+    print_info("Frames", args.frames)
+    print_info("Confianza baja", f"{settings.CONFIDENCE_THRESHOLD} - {settings.MIN_CONFIDENCE}")
+
+    sequence = make_queue(args.people, args.frames, args.fps, args.seed)
+
+    real_time = tracker_module.time
+    try:
+        for stride in args.strides:
+            for two_stage in (False, True):
+                result = replay(sequence, args.fps, stride, two_stage)
+                mode = "dos etapas" if two_stage else "una etapa"
+                print(f"\nStride {stride} - {mode}")
+                print_info("  ID switches", result["id_switches"])
+                print_info("  Switches cada 1000 asociaciones", f"{result['switch_rate']:.2f}")
+                print_info("  Tracks por persona", f"{result['tracks_per_person']:.2f} (ideal 1.00)")
+                print_info("  Personas con track estable", f"{result['stable_people']}/{args.people}")
+                if two_stage:
+                    print_info("  Asociaciones de baja confianza", result["low_confidence_matches"])
+    finally:
+        tracker_module.time = real_time
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark del tracker.
+Mide el costo por frame de PersonTracker.update con multitudes sintéticas
+(personas caminando con ruido de detección) y verifica que la asignación
+mantenga los IDs: idealmente se crean tantos tracks como personas.
+
+El tracker usa time.time(); el benchmark lo reemplaza por un reloj simulado
+a --fps para que el filtro de Kalman vea intervalos reales entre frames.
+
+Uso:
+    python scripts/benchmark_tracker.py
+    python scripts/benchmark_tracker.py --crowds 5 50 200 --frames 300 --solver numpy
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import src.tracker as tracker_module
+from src.tracker import PersonTracker
+from src.utils import print_header, print_info
+
+FRAME_WIDTH, FRAME_HEIGHT = 1280, 720
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+def make_crowd(people: int, frames: int, fps: float, seed: int) -> List[np.ndarray]:
+    """Detecciones (x1, y1, x2, y2, conf) por frame de `people` personas"""
+    rng = np.random.default_rng(seed)
+
+    # Escala de las cajas según la densidad para que la escena sea plausible
+    scale = min(1.0, np.sqrt(60.0 / max(people, 1)))
+    height = rng.uniform(160, 260, people) * scale
+    width = height / rng.uniform(2.0, 3.0, people)
+
+    position = np.column_stack([
+        rng.uniform(width, FRAME_WIDTH - width),
+        rng.uniform(height, FRAME_HEIGHT),
+    ])
+    velocity = rng.normal(0, 40, (people, 2))  # px/s
+
+    sequence = []
+    for _ in range(frames):
+        position += velocity / fps
+        # Rebote en los bordes
+        for axis, (low, high) in enumerate([(width, FRAME_WIDTH - width), (height, FRAME_HEIGHT)]):
+            out = (position[:, axis] < low) | (position[:, axis] > high)
+            velocity[out, axis] *= -1
+            position[:, axis] = np.clip(position[:, axis], low, high)
+
+        noisy = position + rng.normal(0, 2.0, position.shape)
+        boxes = np.column_stack([
+            noisy[:, 0] - width / 2, noisy[:, 1] - height,
+            noisy[:, 0] + width / 2, noisy[:, 1],
+            rng.uniform(0.5, 0.95, people),
+        ])
+        sequence.append(boxes[rng.permutation(people)])
+
+    return sequence
+
+
+def run_crowd(people: int, frames: int, fps: float, solver: str, seed: int) -> dict:
+    clock = SimulatedClock()
+    tracker_module.time = clock
+
+    tracker = PersonTracker()
+    tracker.solver = solver
+    sequence = make_crowd(people, frames, fps, seed)
+
+    latencies = []
+    for detections in sequence:
+        clock.now += 1.0 / fps
+        t0 = time.perf_counter()
+        tracker.update(detections)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    latencies = np.array(latencies[5:])  # Sin los primeros frames (tracks nuevos)
+    return {
+        "mean": latencies.mean(),
+        "p95": np.percentile(latencies, 95),
+        "tracks_created": tracker.next_person_id - 1,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de PersonTracker.update")
+    parser.add_argument("--crowds", type=int, nargs="+", default=[5, 50, 200],
+                        help="Personas simultáneas por escena")
+    parser.add_argument("--frames", type=int, default=200, help="Frames por escena")
+    parser.add_argument("--fps", type=float, default=15.0, help="FPS simulados")
+    parser.add_argument("--solver", default="auto", choices=["auto", "scipy", "numpy"],
+                        help="Solver de asignación")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print_header("BENCHMARK DEL TRACKER")
+    print_info("Frames por escena", args.frames)
+    print_info("FPS simulados", args.fps)
+    print_info("Solver", args.solver)
+
+    real_time = tracker_module.time
+    try:
+        for people in args.crowds:
+            result = run_crowd(people, args.frames, args.fps, args.solver, args.seed)
+            print(f"\n{people} personas")
+            print_info("  ms/frame (media)", f"{result['mean']:.2f}")
+            print_info("  ms/frame (p95)", f"{result['p95']:.2f}")
+            print_info("  µs/persona", f"{result['mean'] * 1000 / people:.1f}")
+            print_info("  Tracks creados", f"{result['tracks_created']} (ideal {people})")
+    finally:
+        tracker_module.time = real_time
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Compara el detector fp32 contra el INT8 reproduciendo un clip grabado.
+Reporta latencia, throughput y la diferencia de entradas contadas por
+validate_entry, para decidir el compromiso velocidad/precisión con datos.
+
+El tracker usa time.time(); aquí lo reemplaza un reloj simulado al FPS del
+clip, así el dt del Kalman y el TRACKING_TIMEOUT no dependen de lo que tarde
+cada modelo en inferir y la diferencia de entradas es comparable.
+
+Uso:
+    python scripts/compare_precision.py --video grabacion.mp4
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.settings import settings
+import src.tracker as tracker_module
+from src.approach import evaluate_tracks
+from src.detector import PersonDetector
+from src.tracker import PersonTracker
+from src.utils import load_json_config, print_header, print_info
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+def load_clip(video: str, max_frames: int) -> Tuple[List[np.ndarray], float]:
+    cap = cv2.VideoCapture(video)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+
+    if not frames:
+        raise SystemExit(f"No se pudieron leer frames de {video}")
+    return frames, fps
+
+
+def replay(detector: PersonDetector, frames: List[np.ndarray], line: List[int],
+           stride: int, fps: float) -> dict:
+    clock = SimulatedClock()
+    tracker_module.time = clock
+    tracker = PersonTracker()
+    latencies = []
+    entries = 0
+
+    start = time.perf_counter()
+    for index, frame in enumerate(frames):
+        clock.now += 1.0 / fps
+        # Igual que DetectionEngine._process_frame: sin detección solo se
+        # predice, sin duplicar posiciones en el historial
+        if index % stride == 0:
+            t0 = time.perf_counter()
+            detections = detector.detect(frame)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            tracker.update(detections)
+        else:
+            tracker.predict()
+
+        evaluation = evaluate_tracks(list(tracker.get_active_people().values()), line)
+        for person_id in evaluation.person_ids[evaluation.valid].tolist():
+            tracker.mark_as_counted(person_id)
+            entries += 1
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array(latencies)
+    return {
+        "model": detector.backend.describe(),
+        "entries": entries,
+        "fps": len(frames) / elapsed,
+        "mean_ms": latencies.mean(),
+        "p95_ms": np.percentile(latencies, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparación fp32 vs INT8")
+    parser.add_argument("--video", type=str, required=True, help="Clip grabado a reproducir")
+    parser.add_argument("--max-frames", type=int, default=3000, help="Máximo de frames del clip")
+    parser.add_argument("--stride", type=int, default=settings.PROCESS_EVERY_N_FRAMES, help="Detectar 1 de cada N frames")
+    args = parser.parse_args()
+
+    frames, fps = load_clip(args.video, args.max_frames)
+
+    height, width = frames[0].shape[:2]
+    line = load_json_config(settings.get_line_config_path()).get("line")
+    if line is None:
+        line = [0, height // 2, width, height // 2]
+
+    real_time = tracker_module.time
+    try:
+        results = [
+            replay(PersonDetector(backend="onnx", precision=precision),
+                   frames, line, args.stride, fps)
+            for precision in ("fp32", "int8")
+        ]
+    finally:
+        tracker_module.time = real_time
+    fp32, int8 = results
+
+    print_header("COMPARACIÓN FP32 vs INT8")
+    print_info("Clip", f"{args.video} ({len(frames)} frames a {fps:.1f} FPS)")
+    print_info("Línea", line)
+    print("-" * 70)
+    print(f"{'Modelo':<32}{'Entradas':>10}{'FPS':>8}{'Media':>10}{'p95':>10}")
+    for r in results:
+        print(
+            f"{r['model']:<32}{r['entries']:>10}{r['fps']:>8.1f}"
+            f"{r['mean_ms']:>8.1f}ms{r['p95_ms']:>8.1f}ms"
+        )
+    print("-" * 70)
+    print_info("Speedup INT8", f"{int8['fps'] / fp32['fps']:.2f}x")
+    print_info("Diferencia de entradas", int8["entries"] - fp32["entries"])
+    if fp32["entries"]:
+        diff_pct = abs(int8["entries"] - fp32["entries"]) / fp32["entries"] * 100
+        print_info("Diferencia relativa", f"{diff_pct:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Prueba de carga de la API.
+Lanza peticiones concurrentes a los endpoints de lectura y compara el tiempo
+total contra la suma de latencias: si las consultas no bloquean el event
+loop, el paralelismo efectivo (suma / total) se acerca a la concurrencia.
+
+Requiere httpx (pip install httpx) y la API corriendo.
+
+Uso:
+    python scripts/load_test_api.py
+    python scripts/load_test_api.py --url http://localhost:8000 --concurrency 20 --rounds 5
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils import print_header, print_info
+
+ENDPOINTS = [
+    "/api/recent_entries",
+    "/api/entries/total",
+    "/api/entries/daily",
+    "/api/peak_hours",
+    "/api/predictions",
+    "/api/stats",
+]
+
+
+async def timed_get(client, path: str) -> float:
+    start = time.perf_counter()
+    response = await client.get(path)
+    elapsed = time.perf_counter() - start
+    if response.status_code >= 400:
+        print(f"  ⚠ {path}: HTTP {response.status_code}")
+    return elapsed
+
+
+async def run_round(client, endpoints: List[str], concurrency: int) -> Dict[str, float]:
+    paths = [endpoints[i % len(endpoints)] for i in range(concurrency)]
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(timed_get(client, path) for path in paths))
+    wall = time.perf_counter() - start
+
+    return {"wall": wall, "latencies": latencies}
+
+
+async def main_async(args):
+    try:
+        import httpx
+    except ImportError:
+        print("httpx no está instalado: pip install httpx")
+        return 1
+
+    endpoints = args.endpoints or ENDPOINTS
+
+    print_header("PRUEBA DE CARGA DE LA API")
+    print_info("URL", args.url)
+    print_info("Concurrencia", args.concurrency)
+    print_info("Rondas", args.rounds)
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        # Calentamiento: crea el pool de la BD y las conexiones HTTP
+        await run_round(client, endpoints, len(endpoints))
+
+        walls = []
+        latencies = []
+        for _ in range(args.rounds):
+            result = await run_round(client, endpoints, args.concurrency)
+            walls.append(result["wall"])
+            latencies.extend(result["latencies"])
+
+    latencies = np.array(latencies) * 1000
+    total_wall = sum(walls)
+    parallelism = latencies.sum() / 1000 / total_wall if total_wall > 0 else 0.0
+
+    print()
+    print_info("Peticiones", len(latencies))
+    print_info("Latencia p50", f"{np.percentile(latencies, 50):.1f} ms")
+    print_info("Latencia p95", f"{np.percentile(latencies, 95):.1f} ms")
+    print_info("Tiempo por ronda", f"{np.mean(walls) * 1000:.1f} ms")
+    print_info("Paralelismo efectivo", f"{parallelism:.2f}x")
+
+    if parallelism < 1.5:
+        print("\n⚠ Las peticiones se están serializando (¿consultas bloqueando el event loop?)")
+    else:
+        print("\n✓ Las peticiones concurrentes se atienden en paralelo")
+
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de los endpoints de la API")
+    parser.add_argument("--url", default="http://localhost:8000", help="URL base de la API")
+    parser.add_argument("--concurrency", type=int, default=20, help="Peticiones simultáneas por ronda")
+    parser.add_argument("--rounds", type=int, default=5, help="Número de rondas")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout por petición (s)")
+    parser.add_argument("--endpoints", nargs="+", help="Endpoints a probar (default: lectura)")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
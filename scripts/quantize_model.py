@@ -0,0 +1,64 @@
+"""
+Genera el modelo INT8 calibrado con frames propios.
+
+Uso:
+    python scripts/quantize_model.py --calibration calibration/
+    python scripts/quantize_model.py --extract grabacion.mp4 --every 15
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import cv2
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.settings import settings
+from src.backends import OnnxRuntimeBackend
+from src.quantization import quantize_model
+
+
+def extract_frames(video: str, output_dir: Path, every: int) -> int:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    cap = cv2.VideoCapture(video)
+
+    index = saved = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if index % every == 0:
+            cv2.imwrite(str(output_dir / f"frame_{index:06d}.jpg"), frame)
+            saved += 1
+        index += 1
+
+    cap.release()
+    print(f"✓ {saved} frames extraídos de {video} en {output_dir}")
+    return saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cuantización INT8 del detector")
+    parser.add_argument("--model", type=str, default=settings.MODEL_PATH, help="Modelo .pt u .onnx")
+    parser.add_argument(
+        "--calibration", type=str, default=str(settings.CALIBRATION_DIR),
+        help="Carpeta con frames grabados para calibrar",
+    )
+    parser.add_argument("--extract", type=str, default=None, help="Extraer frames de este video antes de calibrar")
+    parser.add_argument("--every", type=int, default=15, help="Guardar 1 de cada N frames al extraer")
+    args = parser.parse_args()
+
+    calibration_dir = Path(args.calibration)
+    if args.extract:
+        extract_frames(args.extract, calibration_dir, args.every)
+
+    fp32_path = OnnxRuntimeBackend._resolve_onnx_model(args.model)
+    int8_path = settings.MODELS_DIR / f"{fp32_path.stem}.int8.onnx"
+    quantize_model(fp32_path, int8_path, calibration_dir)
+
+    print("Activa el modelo con DETECTOR_BACKEND=onnx y DETECTOR_PRECISION=int8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import math
+from typing import List, Optional
+
+from config.settings import settings
+
+
+class AdaptiveController:
+    """
+    Control de lazo cerrado del stride de detección. Con la latencia medida de
+    inferencia, los FPS de captura y el número de tracks activos ajusta cada
+    cuántos frames se ejecuta el detector para que el costo amortizado por
+    frame se mantenga dentro del presupuesto de latencia. Opcionalmente baja
+    o sube imgsz cuando el stride por sí solo no alcanza.
+    """
+
+    IMGSZ_STEPS: List[int] = [640, 512, 416, 320]
+
+    def __init__(self, detector=None, target_latency_ms: float = None,
+                 max_stride: int = None, max_stride_active: int = None,
+                 adjust_imgsz: bool = None):
+        self.detector = detector
+        self.target_latency_ms = (
+            target_latency_ms if target_latency_ms is not None
+            else settings.ADAPTIVE_TARGET_LATENCY_MS
+        )
+        self.max_stride = max_stride or settings.ADAPTIVE_MAX_STRIDE
+        self.max_stride_active = max_stride_active or settings.ADAPTIVE_MAX_STRIDE_ACTIVE
+        self.adjust_imgsz = (
+            adjust_imgsz if adjust_imgsz is not None else settings.ADAPTIVE_IMGSZ
+        )
+        self.interval = settings.ADAPTIVE_INTERVAL
+
+        self.stride = settings.PROCESS_EVERY_N_FRAMES
+        self.inference_ms: Optional[float] = None  # Media móvil exponencial
+        self.budget_ms = 0.0
+        self.capture_fps = 0.0
+        self.active_tracks = 0
+        self.last_decision = "inicial"
+        self.decisions = 0
+
+    def record_inference(self, elapsed_ms: float, alpha: float = 0.2):
+        if self.inference_ms is None:
+            self.inference_ms = elapsed_ms
+        else:
+            self.inference_ms += alpha * (elapsed_ms - self.inference_ms)
+
+    def _get_budget_ms(self) -> float:
+        if self.target_latency_ms > 0:
+            return self.target_latency_ms
+        # Sin objetivo explícito: mantener el ritmo de la cámara
+        if self.capture_fps > 0:
+            return 1000.0 / self.capture_fps
+        return 0.0
+
+    def _current_imgsz(self) -> Optional[int]:
+        return getattr(self.detector, "imgsz", None)
+
+    def _set_imgsz(self, size: int):
+        self.detector.set_imgsz(size)
+
+    def update(self, frame_count: int, capture_fps: float, active_tracks: int) -> int:
+        self.capture_fps = capture_fps
+        self.active_tracks = active_tracks
+
+        if frame_count % self.interval != 0 or self.inference_ms is None:
+            return self.stride
+
+        self.budget_ms = self._get_budget_ms()
+        if self.budget_ms <= 0:
+            return self.stride
+
+        # Con gente en escena se prioriza precisión: stride más bajo
+        limit = self.max_stride_active if active_tracks > 0 else self.max_stride
+        required = max(1, math.ceil(self.inference_ms / self.budget_ms))
+        target = min(required, limit)
+
+        previous = self.stride
+        if target > self.stride:
+            self.stride += 1
+        elif target < self.stride:
+            self.stride -= 1
+
+        decision = f"stride {previous} -> {self.stride}" if self.stride != previous else "sin cambios"
+
+        if self.adjust_imgsz and self.detector is not None:
+            decision = self._update_imgsz(required, limit, decision)
+
+        if decision != "sin cambios":
+            self.decisions += 1
+        self.last_decision = decision
+
+        return self.stride
+
+    def _update_imgsz(self, required: int, limit: int, decision: str) -> str:
+        imgsz = self._current_imgsz()
+        if imgsz is None:
+            return decision
+
+        smaller = [s for s in self.IMGSZ_STEPS if s < imgsz]
+        larger = [s for s in self.IMGSZ_STEPS if s > imgsz]
+
+        # El stride ya tocó el límite y aun así no se cumple el presupuesto
+        if required > limit and self.stride >= limit and smaller:
+            self._set_imgsz(smaller[0])
+            return f"imgsz {imgsz} -> {smaller[0]}"
+
+        # Holgura amplia: recuperar resolución
+        amortized = self.inference_ms / self.stride
+        if larger and amortized < 0.5 * self.budget_ms:
+            self._set_imgsz(larger[-1])
+            return f"imgsz {imgsz} -> {larger[-1]}"
+
+        return decision
+
+    def get_state(self) -> dict:
+        return {
+            "stride": self.stride,
+            "inference_ms": round(self.inference_ms or 0.0, 2),
+            "budget_ms": round(self.budget_ms, 2),
+            "capture_fps": round(self.capture_fps, 2),
+            "active_tracks": self.active_tracks,
+            "imgsz": self._current_imgsz(),
+            "last_decision": self.last_decision,
+            "decisions": self.decisions,
+        }
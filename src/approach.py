@@ -1,74 +1,107 @@
 import numpy as np
-from typing import Tuple, List
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
 
 from config.settings import settings
 from src.tracker import TrackedPerson
 
-def is_approaching_camera(person: TrackedPerson) -> Tuple[bool, str]:
-
-    position = person.positions
+MIN_CONSISTENCY = 0.7
 
-    min_frames = settings.FRAMES_MIN_DETECTION
 
-    if len(position) < min_frames:
-        return False, "Frames insuficientes"
+@dataclass
+class TrackEvaluation:
+    """Resultado de evaluate_tracks(): un valor por track, en el orden recibido"""
+    person_ids: np.ndarray
+    area_growth: np.ndarray
+    y_trend: np.ndarray
+    consistency: np.ndarray
+    crossed_line: np.ndarray
+    approaching: np.ndarray
+    valid: np.ndarray
 
-    recent_positions = position[-min_frames:]
 
-    area = [pos[3] * pos[4] for pos in recent_positions]
-    y_positions = [pos[1] for pos in recent_positions]
+def _is_approaching(area_growth, y_trend, consistency, min_frames: int):
+    bbox_growing = area_growth > settings.RATIO_APPROACH
+    moving_down = y_trend > settings.DIRECTION_THRESHOLD / min_frames
+    is_moving = consistency >= MIN_CONSISTENCY
+    return bbox_growing & moving_down & is_moving
 
-    # Crecimiento del area del bounding box
-    initial_area = np.mean(area[:2])
-    final_area = np.mean(area[-2:])
-    
-    if initial_area > 0:
-        area_growth_ratio = (final_area - initial_area) / initial_area
-    else:
-        area_growth_ratio = 0
-    
-    bbox_growing = area_growth_ratio > settings.RATIO_APPROACH
 
-    # Movimiento vertical hacia abajo
-    y_trend = np.polyfit(range(len(y_positions)), y_positions, 1)[0]
-
-    min_y_movement_per_frame = settings.DIRECTION_THRESHOLD / min_frames
-    
-    moving_down = y_trend > min_y_movement_per_frame
-
-    # Consistencia de movimiento
-    y_changes = [
-        y_positions[i] - y_positions[i - 1]
-        for i in range(1, len(y_positions))
-    ]
+def is_approaching_camera(person: TrackedPerson) -> Tuple[bool, str]:
 
-    frames_moving_down = sum(1 for change in y_changes if change > 5)
+    min_frames = person.store.approach_window
 
-    if y_changes:
-        consistency_ratio = frames_moving_down / len(y_changes)
-    else:
-        consistency_ratio = 0
+    if person.history_length < min_frames:
+        return False, "Frames insuficientes"
 
-    is_moving = consistency_ratio >= 0.7
+    # Sumas deslizantes mantenidas por el TrackStore: O(1) por persona
+    area_growth, y_trend, consistency = person.approach_stats()
 
     # Decision final
-
-    is_approaching = bbox_growing and moving_down and is_moving
+    is_approaching = bool(_is_approaching(area_growth, y_trend, consistency, min_frames))
 
     debug_info = (
-        f"Crecimiento del area: {area_growth_ratio:.2f}\n"
+        f"Crecimiento del area: {area_growth:.2f}\n"
         f"Movimiento vertical: {y_trend:.2f}\n"
-        f"Consistencia de movimiento: {consistency_ratio:.2f}\n"
+        f"Consistencia de movimiento: {consistency:.2f}\n"
     )
 
     return is_approaching, debug_info
 
+def evaluate_tracks(people: Sequence[TrackedPerson], line: List[int]) -> TrackEvaluation:
+    """
+    Análisis de aproximación y cruce de línea de todos los tracks a la vez,
+    sobre los arrays del TrackStore. Equivale a validate_entry,
+    check_line_crossing e is_approaching_camera por persona.
+    """
+    count = len(people)
+    empty = np.zeros(count, dtype=bool)
+    if not count:
+        zeros = np.zeros(0)
+        return TrackEvaluation(np.zeros(0, dtype=np.int64), zeros, zeros, zeros,
+                               empty, empty, empty)
+
+    store = people[0].store
+    slots = np.array([person.slot for person in people])
+    min_frames = store.approach_window
+
+    # Cruce de línea con la última posición de cada track
+    last = store.last_records(slots)
+    bottom_y, top_y = last[:, 1], last[:, 1] - last[:, 3]
+    line_y = (line[1] + line[3]) // 2
+    crossed_line = (top_y < line_y) & (bottom_y >= line_y) & (store.length[slots] > 0)
+
+    # Aproximación solo para tracks con historial suficiente
+    area_growth = np.zeros(count)
+    y_trend = np.zeros(count)
+    consistency = np.zeros(count)
+    approaching = empty.copy()
+
+    ready = store.length[slots] >= min_frames
+    if ready.any():
+        metrics = store.approach_stats(slots[ready])
+        area_growth[ready], y_trend[ready], consistency[ready] = metrics
+        approaching[ready] = _is_approaching(*metrics, min_frames)
+
+    valid = crossed_line & approaching & ~store.counted[slots]
+
+    return TrackEvaluation(
+        person_ids=store.person_id[slots],
+        area_growth=area_growth,
+        y_trend=y_trend,
+        consistency=consistency,
+        crossed_line=crossed_line,
+        approaching=approaching,
+        valid=valid,
+    )
+
 def check_line_crossing(person: TrackedPerson, line: List[int]) -> bool:
 
-    if not person.positions:
+    record = person.last_record()
+    if record is None:
         return False
 
-    _, bottom_y, _, bbox_height, _ = person.positions[-1]
+    _, bottom_y, _, bbox_height, _ = record
 
     top_y = bottom_y - bbox_height
 
@@ -101,23 +134,13 @@ def validate_entry(person: TrackedPerson, line: List[int]) -> Tuple[bool, str]:
 
 def get_approach_score(person: TrackedPerson) -> float:
 
-    position = person.positions
-    min_frames = settings.FRAMES_MIN_DETECTION
+    min_frames = person.store.approach_window
 
-    if len(position) < min_frames:
+    if person.history_length < min_frames:
         return 0.0
     
-    recent_positions = position[-min_frames:]
+    # Sin área inicial (caja degenerada) el crecimiento vale 0
+    area_ratio, _, _ = person.approach_stats()
+    score = min(1.0, max(0.0, area_ratio / settings.RATIO_APPROACH))
 
-    area = [pos[3] * pos[4] for pos in recent_positions]
-    initial_area = np.mean(area[:2])
-    final_area = np.mean(area[-2:])
-    
-    if initial_area > 0:
-        area_ratio = (final_area - initial_area) / initial_area
-        score = min(1.0, max(0.0, area_ratio / settings.RATIO_APPROACH))
-    else:
-        area_ratio = 0.0
-    
-    
     return score
@@ -0,0 +1,180 @@
+from typing import List, Tuple
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment as _scipy_assignment
+except ImportError:  # scipy es opcional: se usa el húngaro en NumPy
+    _scipy_assignment = None
+
+
+def hungarian(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Asignación lineal óptima (algoritmo húngaro con caminos aumentantes más
+    cortos, O(n²·m)) con el barrido interno sobre columnas vectorizado.
+    Acepta matrices rectangulares; retorna (filas, columnas) asignadas.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+
+    n, m = cost.shape
+    if n == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=np.int64)  # p[j]: fila asignada a la columna j (1-based)
+    way = np.zeros(m + 1, dtype=np.int64)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            improve = free & (reduced < minv[1:])
+            minv[1:][improve] = reduced[improve]
+            way[1:][improve] = j0
+
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+
+            used_cols = np.nonzero(used)[0]
+            u[p[used_cols]] += delta
+            v[used_cols] -= delta
+            minv[1:][free] -= delta
+
+            j0 = j1
+            if p[j0] == 0:
+                break
+
+        # Reconstruir el camino aumentante
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    cols = np.nonzero(p[1:])[0]
+    rows = p[1:][cols] - 1
+
+    order = np.argsort(rows)
+    rows, cols = rows[order], cols[order]
+    if transposed:
+        rows, cols = cols, rows
+        order = np.argsort(rows)
+        rows, cols = rows[order], cols[order]
+    return rows, cols
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """IoU entre cada caja de `a` (M, 4) y de `b` (N, 4), en x1, y1, x2, y2"""
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def _solve(cost: np.ndarray, solver: str) -> Tuple[np.ndarray, np.ndarray]:
+    if solver == "scipy" or (solver == "auto" and _scipy_assignment is not None):
+        if _scipy_assignment is None:
+            raise ImportError("scipy no está instalado (pip install scipy)")
+        return _scipy_assignment(cost)
+    return hungarian(cost)
+
+
+def _components(feasible: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Componentes conexas del grafo bipartito de pares factibles."""
+    n_rows, n_cols = feasible.shape
+    parent = list(range(n_rows + n_cols))
+
+    def find(a: int) -> int:
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    for r, c in zip(*np.nonzero(feasible)):
+        ra, rb = find(int(r)), find(n_rows + int(c))
+        if ra != rb:
+            parent[ra] = rb
+
+    groups = {}
+    for node in range(n_rows + n_cols):
+        groups.setdefault(find(node), []).append(node)
+
+    components = []
+    for nodes in groups.values():
+        rows = np.array([x for x in nodes if x < n_rows], dtype=np.int64)
+        cols = np.array([x - n_rows for x in nodes if x >= n_rows], dtype=np.int64)
+        if len(rows) and len(cols):
+            components.append((rows, cols))
+    return components
+
+
+def linear_assignment(cost: np.ndarray, max_cost: float = np.inf,
+                      solver: str = "auto") -> List[Tuple[int, int]]:
+    """
+    Pares (fila, columna) de costo total mínimo. Los pares con costo
+    >= max_cost (o no finito) nunca se asignan. El problema se divide en
+    componentes independientes de pares factibles, así que una escena con
+    mucha gente repartida se resuelve como varios problemas pequeños.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.size == 0:
+        return []
+
+    feasible = np.isfinite(cost) & (cost < max_cost)
+    if not feasible.any():
+        return []
+
+    # Un par bloqueado cuesta más que todos los factibles juntos: primero se
+    # maximiza la cantidad de pares factibles y luego se minimiza el costo
+    blocked = float(cost[feasible].sum()) + 1.0
+
+    # Pares aislados (única opción de la fila y de la columna): componentes
+    # triviales que se resuelven sin pasar por el union-find
+    row_degree = np.count_nonzero(feasible, axis=1)
+    col_degree = np.count_nonzero(feasible, axis=0)
+    isolated = feasible & (row_degree == 1)[:, None] & (col_degree == 1)[None, :]
+    matches = [(int(r), int(c)) for r, c in zip(*np.nonzero(isolated))]
+
+    rest_rows = np.flatnonzero((row_degree > 0) & ~isolated.any(axis=1))
+    rest_cols = np.flatnonzero((col_degree > 0) & ~isolated.any(axis=0))
+    rest = feasible[np.ix_(rest_rows, rest_cols)]
+
+    for rows, cols in _components(rest):
+        rows, cols = rest_rows[rows], rest_cols[cols]
+        if len(rows) == 1 or len(cols) == 1:
+            # Fila o columna única: basta con el mínimo
+            sub = np.where(feasible[np.ix_(rows, cols)], cost[np.ix_(rows, cols)], np.inf)
+            r, c = np.unravel_index(np.argmin(sub), sub.shape)
+            matches.append((int(rows[r]), int(cols[c])))
+            continue
+
+        sub = np.where(feasible[np.ix_(rows, cols)], cost[np.ix_(rows, cols)], blocked)
+        sub_rows, sub_cols = _solve(sub, solver)
+        for r, c in zip(sub_rows, sub_cols):
+            if feasible[rows[r], cols[c]]:
+                matches.append((int(rows[r]), int(cols[c])))
+
+    matches.sort()
+    return matches
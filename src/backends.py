@@ -0,0 +1,283 @@
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+from config.settings import settings
+from src.metrics import metrics
+from src.utils import DetectionError
+
+
+class DetectorBackend:
+    """
+    Motor de inferencia usado por PersonDetector. infer() recibe una lista de
+    frames BGR y retorna, por frame, un array (N, 5) float32 con
+    x1, y1, x2, y2, confidence en coordenadas del frame (solo personas, ya
+    con NMS). El filtrado geométrico lo hace PersonDetector.
+    """
+
+    name = "base"
+    device = "cpu"
+
+    def infer(self, frames: List[np.ndarray], imgsz: int) -> List[np.ndarray]:
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        return f"{self.name} ({self.device.upper()})"
+
+
+class UltralyticsBackend(DetectorBackend):
+    """Ruta original: wrapper YOLO de Ultralytics sobre PyTorch."""
+
+    name = "ultralytics"
+    precision = "fp32"
+
+    def __init__(self, model_path: str):
+        try:
+            import torch
+            from ultralytics import YOLO
+        except ImportError as e:
+            raise DetectionError(f"Backend ultralytics no disponible: {e}")
+
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        if self.device == "cuda":
+            print(f"✓ Usando GPU (CUDA): {torch.cuda.get_device_name(0)}")
+        else:
+            print("⚠ Usando CPU (más lento)")
+
+        try:
+            self.model = YOLO(model_path)
+            self.model.to(self.device)
+        except Exception as e:
+            raise DetectionError(f"Error al cargar el modelo: {e}")
+
+    def infer(self, frames: List[np.ndarray], imgsz: int) -> List[np.ndarray]:
+        results = self.model(
+            frames,
+            conf=settings.CONFIDENCE_THRESHOLD,
+            classes=[0],
+            verbose=False,
+            imgsz=imgsz,
+            half=self.device == "cuda",
+            device=self.device,
+            max_det=settings.MAX_DETECTIONS,
+        )
+
+        # Ultralytics reporta ms por imagen de cada fase
+        if results:
+            speed = results[0].speed
+            n = len(results)
+            metrics.observe("preprocess", speed.get("preprocess", 0.0) * n / 1000)
+            metrics.observe("inference", speed.get("inference", 0.0) * n / 1000)
+            metrics.observe("nms", speed.get("postprocess", 0.0) * n / 1000)
+
+        return [self._to_array(result) for result in results]
+
+    @staticmethod
+    def _to_array(result) -> np.ndarray:
+        if result is None or result.boxes is None or len(result.boxes) == 0:
+            return np.empty((0, 5), dtype=np.float32)
+
+        # Una sola copia device -> host. boxes.data: x1, y1, x2, y2, [id], conf, cls
+        data = result.boxes.data.cpu().numpy()
+
+        detections = np.empty((len(data), 5), dtype=np.float32)
+        detections[:, :4] = data[:, :4]
+        detections[:, 4] = data[:, -2]
+        return detections
+
+
+class OnnxRuntimeBackend(DetectorBackend):
+    """
+    Inferencia en CPU con ONNX Runtime (u OpenVINO a través de su execution
+    provider). Exporta y cachea el modelo .onnx en el primer arranque y hace
+    su propio letterbox y NMS solo para la clase persona.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_path: str, precision: str = "fp32"):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise DetectionError(
+                f"Backend onnx no disponible (pip install onnxruntime): {e}"
+            )
+
+        self.precision = precision
+        self.onnx_path = self._resolve_onnx_model(model_path)
+        if precision == "int8":
+            self.onnx_path = self._resolve_int8_model(self.onnx_path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = settings.ONNX_INTRA_OP_THREADS or (os.cpu_count() or 1)
+        options.inter_op_num_threads = settings.ONNX_INTER_OP_THREADS
+
+        available = ort.get_available_providers()
+        providers = [p for p in settings.ONNX_PROVIDERS if p in available]
+        if not providers:
+            providers = ["CPUExecutionProvider"]
+
+        try:
+            self.session = ort.InferenceSession(
+                str(self.onnx_path), sess_options=options, providers=providers
+            )
+        except Exception as e:
+            raise DetectionError(f"Error al cargar el modelo ONNX: {e}")
+
+        self.input_name = self.session.get_inputs()[0].name
+        self.device = "cpu"
+        self.providers = self.session.get_providers()
+
+        print(f"✓ ONNX Runtime: {self.onnx_path.name} con {', '.join(self.providers)}")
+        print(
+            f"   Hilos intra-op: {options.intra_op_num_threads}, "
+            f"inter-op: {options.inter_op_num_threads}"
+        )
+
+    def describe(self) -> str:
+        return f"{self.name} {self.precision} ({self.providers[0]})"
+
+    @staticmethod
+    def _resolve_onnx_model(model_path: str) -> Path:
+        path = Path(model_path)
+        if path.suffix == ".onnx":
+            if not path.exists():
+                raise DetectionError(f"Modelo ONNX no encontrado: {path}")
+            return path
+
+        cached = settings.MODELS_DIR / f"{path.stem}.onnx"
+        if cached.exists():
+            return cached
+
+        print(f"Exportando {model_path} a ONNX (solo en el primer arranque)...")
+        try:
+            from ultralytics import YOLO
+
+            exported = YOLO(model_path).export(
+                format="onnx", imgsz=640, dynamic=True, simplify=True
+            )
+            shutil.move(str(exported), cached)
+        except Exception as e:
+            raise DetectionError(f"Error al exportar el modelo a ONNX: {e}")
+
+        print(f"✓ Modelo ONNX cacheado en {cached}")
+        return cached
+
+    @staticmethod
+    def _resolve_int8_model(fp32_path: Path) -> Path:
+        if fp32_path.name.endswith(".int8.onnx"):
+            return fp32_path
+
+        int8_path = settings.MODELS_DIR / f"{fp32_path.stem}.int8.onnx"
+        if int8_path.exists():
+            return int8_path
+
+        from src.quantization import quantize_model
+
+        return quantize_model(fp32_path, int8_path)
+
+    def infer(self, frames: List[np.ndarray], imgsz: int) -> List[np.ndarray]:
+        with metrics.time("preprocess"):
+            batch = np.empty((len(frames), 3, imgsz, imgsz), dtype=np.float32)
+            transforms = []
+
+            for i, frame in enumerate(frames):
+                batch[i], transform = self._preprocess(frame, imgsz)
+                transforms.append(transform)
+
+        with metrics.time("inference"):
+            output = self.session.run(None, {self.input_name: batch})[0]
+
+        with metrics.time("nms"):
+            return [
+                self._postprocess(prediction, transform, frame.shape)
+                for prediction, transform, frame in zip(output, transforms, frames)
+            ]
+
+    @staticmethod
+    def letterbox(frame: np.ndarray, imgsz: int) -> Tuple[np.ndarray, Tuple[float, int, int]]:
+        height, width = frame.shape[:2]
+        gain = min(imgsz / height, imgsz / width)
+        new_w, new_h = int(round(width * gain)), int(round(height * gain))
+
+        pad_x = (imgsz - new_w) // 2
+        pad_y = (imgsz - new_h) // 2
+
+        canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+        resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = resized
+
+        return canvas, (gain, pad_x, pad_y)
+
+    def _preprocess(self, frame: np.ndarray, imgsz: int):
+        canvas, transform = self.letterbox(frame, imgsz)
+        # BGR -> RGB, HWC -> CHW, [0, 1]
+        tensor = canvas[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+        return tensor, transform
+
+    @staticmethod
+    def _postprocess(prediction: np.ndarray, transform: Tuple[float, int, int],
+                     frame_shape: Tuple) -> np.ndarray:
+        # prediction: (4 + num_clases, anclas) -> solo la columna de persona (clase 0)
+        scores = prediction[4]
+        keep = scores >= settings.CONFIDENCE_THRESHOLD
+
+        if not np.any(keep):
+            return np.empty((0, 5), dtype=np.float32)
+
+        cx, cy, w, h = prediction[:4, keep]
+        scores = scores[keep]
+
+        boxes_xywh = np.stack([cx - w / 2, cy - h / 2, w, h], axis=1)
+        indices = cv2.dnn.NMSBoxes(
+            boxes_xywh.tolist(), scores.tolist(),
+            settings.CONFIDENCE_THRESHOLD, settings.NMS_IOU_THRESHOLD,
+            top_k=settings.MAX_DETECTIONS,
+        )
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)[:settings.MAX_DETECTIONS]
+
+        gain, pad_x, pad_y = transform
+        frame_height, frame_width = frame_shape[:2]
+
+        detections = np.empty((len(indices), 5), dtype=np.float32)
+        boxes = boxes_xywh[indices]
+        detections[:, 0] = (boxes[:, 0] - pad_x) / gain
+        detections[:, 1] = (boxes[:, 1] - pad_y) / gain
+        detections[:, 2] = (boxes[:, 0] + boxes[:, 2] - pad_x) / gain
+        detections[:, 3] = (boxes[:, 1] + boxes[:, 3] - pad_y) / gain
+        detections[:, [0, 2]] = detections[:, [0, 2]].clip(0, frame_width)
+        detections[:, [1, 3]] = detections[:, [1, 3]].clip(0, frame_height)
+        detections[:, 4] = scores[indices]
+
+        return detections
+
+
+BACKENDS = {
+    UltralyticsBackend.name: UltralyticsBackend,
+    OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+}
+
+
+def create_backend(name: str, model_path: str, precision: str = "fp32") -> DetectorBackend:
+    name = name.lower()
+
+    if precision == "int8" and name != OnnxRuntimeBackend.name:
+        print(f"⚠ INT8 requiere el backend onnx (configurado: {name}), se usará onnx")
+        name = OnnxRuntimeBackend.name
+
+    backend_cls = BACKENDS.get(name)
+    if backend_cls is None:
+        raise DetectionError(
+            f"Backend de detección desconocido: {name} (opciones: {', '.join(BACKENDS)})"
+        )
+
+    if backend_cls is OnnxRuntimeBackend:
+        return backend_cls(model_path, precision=precision)
+    return backend_cls(model_path)
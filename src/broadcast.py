@@ -0,0 +1,266 @@
+import asyncio
+import json
+from typing import AsyncIterator, Callable, Dict, Optional, Set, Tuple
+
+import numpy as np
+
+from config.settings import settings
+from src.encoder import FULL_VARIANT, jpeg_encoder
+from src.metrics import metrics
+from src.stream import StreamHandler
+
+BOUNDARY_HEADER = b"--frame\r\nContent-Type: image/jpeg\r\n\r\n"
+
+
+class MJPEGBroadcaster:
+    """
+    Codifica cada frame nuevo de un StreamHandler una sola vez por variante
+    (identificado por su número de secuencia) y reparte los bytes JPEG a todos los
+    espectadores suscritos. Cada espectador tiene una cola de un solo
+    elemento: un cliente lento pierde frames en lugar de acumularlos.
+    """
+
+    def __init__(self, handler: StreamHandler, quality: int = None,
+                 variant: str = FULL_VARIANT):
+        self.handler = handler
+        self.quality = quality or settings.JPEG_QUALITY
+        self.variant = variant
+        self.label = handler.camera_id or "default"
+
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.last_seq = 0
+        self._frame: Optional[np.ndarray] = None
+
+        self.frames_encoded = 0
+        self.frames_dropped = 0
+
+    @property
+    def viewers(self) -> int:
+        return len(self._subscribers)
+
+    def _subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._subscribers.add(queue)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+        metrics.set_gauge("stream_viewers", self.viewers, camera=self.label,
+                          quality=self.quality, variant=self.variant)
+        return queue
+
+    def _unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+        metrics.set_gauge("stream_viewers", self.viewers, camera=self.label,
+                          quality=self.quality, variant=self.variant)
+
+    async def _next_frame(self):
+        # Despertado por el handler al publicar un frame más nuevo que el último
+        while not await self.handler.async_wait_for_newer(
+            self.last_seq, timeout=settings.STREAM_WAIT_TIMEOUT
+        ):
+            if not self._subscribers:
+                return self.last_seq, None
+
+        # Se reutiliza el mismo buffer: el frame anterior ya fue codificado
+        seq, self._frame = self.handler.get_frame_with_seq(self._frame)
+        return seq, self._frame
+
+    async def _run(self):
+        while self._subscribers:
+            seq, frame = await self._next_frame()
+            if frame is None:
+                continue
+
+            # La codificación libera el GIL: se hace en el pool de codificación
+            jpeg = await jpeg_encoder.encode_async(
+                frame, self.quality, self.variant, label=self.label
+            )
+            self.last_seq = seq
+            if jpeg is None:
+                continue
+
+            self.frames_encoded += 1
+            chunk = BOUNDARY_HEADER + jpeg + b"\r\n"
+
+            for queue in list(self._subscribers):
+                if queue.full():
+                    queue.get_nowait()
+                    self.frames_dropped += 1
+                queue.put_nowait(chunk)
+
+    async def stream(self, max_fps: float = None) -> AsyncIterator[bytes]:
+        max_fps = max_fps or settings.STREAM_MAX_FPS
+        min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+
+        loop = asyncio.get_running_loop()
+        queue = self._subscribe()
+        last_sent = 0.0
+
+        try:
+            while True:
+                chunk = await queue.get()
+
+                now = loop.time()
+                if now - last_sent < min_interval:
+                    continue
+                last_sent = now
+
+                yield chunk
+        finally:
+            self._unsubscribe(queue)
+
+    def get_stats(self) -> dict:
+        return {
+            "camera_id": self.handler.camera_id,
+            "quality": self.quality,
+            "variant": self.variant,
+            "viewers": self.viewers,
+            "frames_encoded": self.frames_encoded,
+            "frames_dropped": self.frames_dropped,
+        }
+
+
+class BroadcastRegistry:
+    """
+    Un broadcaster por (cámara, calidad, variante): cada combinación se
+    codifica una sola vez sin importar cuántos espectadores tenga.
+    """
+
+    def __init__(self):
+        self._broadcasters: Dict[Tuple[int, int, str], MJPEGBroadcaster] = {}
+
+    def get(self, handler: StreamHandler, quality: int = None,
+            variant: str = None) -> MJPEGBroadcaster:
+        quality = max(10, min(95, quality or settings.JPEG_QUALITY))
+        variant = jpeg_encoder.resolve_variant(variant)
+        key = (id(handler), quality, variant)
+
+        broadcaster = self._broadcasters.get(key)
+        if broadcaster is None:
+            broadcaster = self._broadcasters[key] = MJPEGBroadcaster(
+                handler, quality, variant
+            )
+        return broadcaster
+
+    def get_stats(self) -> list:
+        return [b.get_stats() for b in self._broadcasters.values()]
+
+
+class StatsBroadcaster:
+    """
+    Productor único de estadísticas para /ws/stats: calcula el snapshot una
+    vez por tick (fuera del event loop), lo serializa una vez y lo reparte a
+    todos los websockets suscritos. Cada entrada registrada por el motor
+    despierta al productor de inmediato en lugar de esperar al siguiente tick.
+    """
+
+    def __init__(self, handler: StreamHandler, interval: float = None,
+                 default: Callable = None):
+        self.handler = handler
+        self.interval = interval or settings.STATS_PUSH_INTERVAL
+        self.default = default
+        self.label = handler.camera_id or "default"
+
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._last_payload: Optional[str] = None
+
+        self.snapshots = 0
+        self.pushes_on_entry = 0
+
+        handler.engine.add_entry_listener(self._on_entry)
+
+    @property
+    def viewers(self) -> int:
+        return len(self._subscribers)
+
+    def _on_entry(self, total_entries: int):
+        # Llamado desde el hilo de video: nunca debe fallar si el loop ya cerró
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self._subscribers:
+            return
+        try:
+            loop.call_soon_threadsafe(self._wake.set)
+            self.pushes_on_entry += 1
+        except RuntimeError:
+            pass  # Loop cerrado entre el chequeo y la llamada
+
+    def _subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._subscribers.add(queue)
+
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._wake = asyncio.Event()
+            self._task = self._loop.create_task(self._run())
+        elif self._last_payload is not None:
+            # El nuevo espectador recibe el último snapshot sin esperar al tick
+            queue.put_nowait(self._last_payload)
+
+        metrics.set_gauge("stats_viewers", self.viewers, camera=self.label)
+        return queue
+
+    def _unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+        metrics.set_gauge("stats_viewers", self.viewers, camera=self.label)
+
+    async def _run(self):
+        while self._subscribers:
+            try:
+                stats = await self._loop.run_in_executor(None, self.handler.get_statistics)
+                payload = json.dumps(stats, default=self.default)
+                self._last_payload = payload
+                self.snapshots += 1
+            except Exception as e:
+                print(f"Error al generar las estadísticas: {e}")
+                payload = None
+
+            for queue in list(self._subscribers) if payload else []:
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(payload)
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def stream(self) -> AsyncIterator[str]:
+        queue = self._subscribe()
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._unsubscribe(queue)
+
+    def get_stats(self) -> dict:
+        return {
+            "camera_id": self.handler.camera_id,
+            "viewers": self.viewers,
+            "snapshots": self.snapshots,
+            "pushes_on_entry": self.pushes_on_entry,
+        }
+
+
+class StatsBroadcastRegistry:
+    """Un StatsBroadcaster por cámara, compartido por todos sus websockets."""
+
+    def __init__(self, default: Callable = None):
+        self.default = default
+        self._broadcasters: Dict[int, StatsBroadcaster] = {}
+
+    def get(self, handler: StreamHandler) -> StatsBroadcaster:
+        broadcaster = self._broadcasters.get(id(handler))
+        if broadcaster is None:
+            broadcaster = self._broadcasters[id(handler)] = StatsBroadcaster(
+                handler, default=self.default
+            )
+        return broadcaster
+
+    def get_stats(self) -> list:
+        return [b.get_stats() for b in self._broadcasters.values()]
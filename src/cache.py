@@ -0,0 +1,100 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.metrics import metrics
+
+
+class _Flight:
+    """Carga en curso de una clave; los demás llamadores esperan su resultado."""
+
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    """
+    Caché en memoria con TTL y carga single-flight: si varios hilos piden la
+    misma clave vencida, solo uno ejecuta el loader y el resto comparte su
+    resultado. invalidate() descarta lo cacheado y también el resultado de
+    una carga que estuviera en curso (podría ser anterior al cambio).
+    """
+
+    def __init__(self, ttl: float, name: str = "default"):
+        self.ttl = ttl
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._inflight: Dict[str, _Flight] = {}
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and time.monotonic() < cached[0]:
+                self.hits += 1
+                metrics.inc("cache_hits", cache=self.name)
+                return cached[1]
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight(self._generation)
+                self.misses += 1
+                metrics.inc("cache_misses", cache=self.name)
+            else:
+                self.coalesced += 1
+                metrics.inc("cache_coalesced", cache=self.name)
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                # Tras un invalidate() la clave puede tener ya otra carga en curso
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+                if flight.error is None and flight.generation == self._generation:
+                    self._entries[key] = (time.monotonic() + self.ttl, flight.value)
+            flight.event.set()
+
+        return flight.value
+
+    def invalidate(self, key: Optional[str] = None):
+        with self._lock:
+            # Las cargas en curso pueden ser anteriores al cambio: los nuevos
+            # llamadores no se suman a ellas sino que inician otra
+            if key is None:
+                self._entries.clear()
+                self._inflight.clear()
+            else:
+                self._entries.pop(key, None)
+                self._inflight.pop(key, None)
+            self._generation += 1
+            self.invalidations += 1
+
+    def get_stats(self) -> dict:
+        return {
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+        }
@@ -1,18 +1,93 @@
 import re
 import cv2
 import time
+import threading
+from collections import deque
 from typing import Optional, Tuple
+import numpy as np
 from config.settings import settings
+from src.metrics import metrics
 from src.utils import CameraError, retry
 
 
+class FrameRingBuffer:
+    """
+    Buffer circular acotado entre el hilo de captura y el de inferencia.
+    Política "el frame más reciente gana": el consumidor siempre recibe el
+    último frame decodificado y los anteriores se descartan.
+    """
+
+    def __init__(self, capacity: int = 2):
+        self.capacity = max(1, capacity)
+        self._frames: deque = deque(maxlen=self.capacity)
+        self._condition = threading.Condition()
+
+        self.last_timestamp = 0.0  # Momento de captura del último frame entregado
+        self.frames_decoded = 0  # Frames escritos por el hilo de captura
+        self.frames_read = 0  # Frames entregados al consumidor
+        self.frames_dropped = 0  # Frames descartados sin ser consumidos
+
+    def put(self, frame: np.ndarray):
+        with self._condition:
+            if len(self._frames) == self.capacity:
+                self._frames.popleft()
+                self.frames_dropped += 1
+
+            self._frames.append((frame, time.time()))
+            self.frames_decoded += 1
+            self._condition.notify_all()
+
+    def get_latest(self, timeout: float = None) -> Optional[np.ndarray]:
+        with self._condition:
+            if not self._frames:
+                self._condition.wait(timeout)
+
+            if not self._frames:
+                return None
+
+            frame, self.last_timestamp = self._frames.pop()
+            self.frames_dropped += len(self._frames)
+            self._frames.clear()
+            self.frames_read += 1
+
+            return frame
+
+    def clear(self):
+        with self._condition:
+            self._frames.clear()
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._frames)
+
+    def get_stats(self) -> dict:
+        with self._condition:
+            return {
+                "frames_decoded": self.frames_decoded,
+                "frames_read": self.frames_read,
+                "frames_dropped": self.frames_dropped,
+                "buffer_size": len(self._frames),
+                "buffer_capacity": self.capacity,
+            }
+
+
 class CameraManager:
 
-    def __init__(self, source: Optional[str] = None):
+    def __init__(self, source: Optional[str] = None, threaded: Optional[bool] = None,
+                 camera_id: Optional[str] = None):
         self.source = self._resolve_source(source)
+        self.camera_id = camera_id or "default"
         self.cap: Optional[cv2.VideoCapture] = None
         self.is_opened = False
         self.frame_count = 0
+        self.last_frame_time = 0.0  # Momento de captura del último frame leído
+
+        # Modo de captura desacoplado: un hilo lector drena la fuente
+        self.threaded = settings.CAMERA_THREADED if threaded is None else threaded
+        self.buffer = FrameRingBuffer(settings.CAMERA_BUFFER_SIZE)
+        self._capture_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._release_lock = threading.Lock()
 
         print(f"Cámara inicializada con fuente: {self.source}")
 
@@ -25,6 +100,8 @@ class CameraManager:
         for attempt in range(settings.CAMERA_RECONNECT_RETRIES):
             if self._try_open():
                 self.is_opened = True
+                if self.threaded:
+                    self._start_capture()
                 return True
 
             if attempt < settings.CAMERA_RECONNECT_RETRIES - 1:
@@ -91,13 +168,75 @@ class CameraManager:
         print(f"No se pudo abrir la cámara con fuente: {self.source}")
         return False
 
+    def _start_capture(self):
+        if self._capture_thread and self._capture_thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self.buffer.clear()
+        self._capture_thread = threading.Thread(
+            target=self._capture_loop, name="camera-capture", daemon=True
+        )
+        self._capture_thread.start()
+        print("Hilo de captura iniciado")
+
+    def _stop_capture(self) -> bool:
+        """Detiene el hilo de captura; devuelve False si sigue vivo tras el join"""
+        self._stop_event.set()
+
+        thread = self._capture_thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout=settings.CAMERA_READ_TIMEOUT + 1.0)
+
+        self._capture_thread = None
+        return not (thread and thread.is_alive() and thread is not threading.current_thread())
+
+    def _capture_loop(self):
+        try:
+            while not self._stop_event.is_set():
+                ret, frame = self._read_direct()
+
+                if self._stop_event.is_set():
+                    break
+
+                if not ret:
+                    time.sleep(settings.CAMERA_RECONNECT_DELAY)
+                    continue
+
+                self.buffer.put(frame)
+                metrics.set_gauge("queue_depth", len(self.buffer), queue="capture", camera=self.camera_id)
+                metrics.set_gauge("capture_frames_dropped", self.buffer.frames_dropped, camera=self.camera_id)
+        finally:
+            # Si release() no pudo esperar a que saliera de cap.read(), libera aquí
+            if self._stop_event.is_set():
+                self._release_cap()
+
     def read(self) -> Tuple[bool, Optional[any]]:
+        if not self.threaded:
+            return self._read_direct()
+
+        if not self._capture_thread or not self._capture_thread.is_alive():
+            if not self.open():
+                print("No se pudo reabrir la cámara")
+                return False, None
+
+        frame = self.buffer.get_latest(timeout=settings.CAMERA_READ_TIMEOUT)
+        if frame is None:
+            return False, None
+
+        self.last_frame_time = self.buffer.last_timestamp
+        return True, frame
+
+    def _read_direct(self) -> Tuple[bool, Optional[any]]:
         if not self.cap or not self.is_opened:
             print("Laa camara no esta abierta. Intentando reabrir...")
             if not self.open():
                 print("No se pudo reabrir la cámara")
                 return False, None
+
+        start = time.perf_counter()
         ret, frame = self.cap.read()
+        metrics.observe("capture", time.perf_counter() - start, camera=self.camera_id)
 
         if not ret:
             print("Error al leer el frame")
@@ -106,6 +245,8 @@ class CameraManager:
 
         if ret:
             self.frame_count += 1
+            if not self.threaded:
+                self.last_frame_time = time.time()
 
         return ret, frame
 
@@ -114,11 +255,22 @@ class CameraManager:
         return self.open()
 
     def release(self):
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+        if not self._stop_capture():
+            # El hilo sigue dentro de cap.read(): liberar ahora sería un uso
+            # concurrente del VideoCapture; lo libera el propio hilo al salir
             self.is_opened = False
-            print("Cámara liberada")
+            print("Hilo de captura ocupado; la cámara se liberará al terminar la lectura")
+            return
+
+        self._release_cap()
+
+    def _release_cap(self):
+        with self._release_lock:
+            if self.cap:
+                self.cap.release()
+                self.cap = None
+                self.is_opened = False
+                print("Cámara liberada")
 
     def is_ready(self) -> bool:
         return self.cap is not None and self.is_opened
@@ -128,13 +280,22 @@ class CameraManager:
         if not self.is_ready():
             return {}
 
-        return {
+        properties = {
             "width": int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
             "height": int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
             "fps": int(self.cap.get(cv2.CAP_PROP_FPS)),
             "frame_count": self.frame_count,
+            "threaded": self.threaded,
         }
 
+        if self.threaded:
+            properties.update(self.buffer.get_stats())
+
+        return properties
+
+    def get_capture_stats(self) -> dict:
+        return self.buffer.get_stats()
+
     def __enter__(self):
         self.open()
         return self
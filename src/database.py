@@ -1,11 +1,22 @@
+import asyncio
+import functools
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import deque
 import mysql.connector
 from mysql.connector import Error, pooling
+from mysql.connector.errors import PoolError
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict, field
 
 from config.settings import settings
-from src.utils import DatabaseError
+from src.metrics import metrics
+from src.utils import DatabaseError, DatabaseTimeoutError
 
 
 # Modelos para datos
@@ -18,6 +29,10 @@ class Entry:
     confidence: float
     model_version: str = "YOLOv8"
     id: Optional[int] = None
+    # Cámara que registró la entrada (varias cámaras comparten las tablas)
+    camera_id: str = "default"
+    # Clave idempotente: un reintento del mismo INSERT no duplica la fila
+    entry_key: str = field(default_factory=lambda: uuid.uuid4().hex)
 
     def to_dict(self) -> Dict[str, Any]:
         data = asdict(self)
@@ -32,20 +47,52 @@ class Stats:
     daily_entry: List[Dict[str, Any]]
 
 
+class _PooledConnection:
+    """Conexión prestada por el pool; al cerrarla se descuenta del uso del pool."""
+
+    def __init__(self, connection, release):
+        self._connection = connection
+        self._release = release
+        self._released = False
+
+    def close(self):
+        try:
+            self._connection.close()
+        finally:
+            if not self._released:
+                self._released = True
+                self._release()
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
 # Gestor de base de datos
 class DatabaseManager:
 
-    def __init__(self):
+    # El esquema se verifica una sola vez por proceso
+    _schema_ready = False
+    _schema_lock = threading.Lock()
+
+    def __init__(self, name: str = "neuraflow", pool_size: int = None):
+        self.name = name
+        self.pool_size = pool_size or settings.DB_POOL_SIZE
         self.pool = None
-        self.batch_buffer: List[Entry] = []
+        self.writer: Optional[EntryWriter] = None
+        self._writer_lock = threading.Lock()
+
+        self._pool_lock = threading.Lock()
+        self.connections_in_use = 0
+        self.pool_exhausted = 0
+
         self._initialize_pool()
-        self._create_tables()
+        self._bootstrap_schema()
 
     def _initialize_pool(self):
         try:
             self.pool = pooling.MySQLConnectionPool(
-                pool_name="neuraflow_pool",
-                pool_size=settings.DB_POOL_SIZE,
+                pool_name=f"{self.name}_pool",
+                pool_size=self.pool_size,
                 pool_reset_session=True,
                 host=settings.DB_HOST,
                 port=settings.DB_PORT,
@@ -54,15 +101,57 @@ class DatabaseManager:
                 password=settings.DB_PASSWORD,
                 autocommit=True,
             )
-            print(f"Pool de conexiones MySQL creado: {settings.DB_NAME}")
+            print(f"Pool de conexiones MySQL creado: {settings.DB_NAME} ({self.name})")
         except Exception as e:
             raise DatabaseError(f"Error al inicializar el pool de conexiones: {e}")
 
+        metrics.set_gauge("db_pool_size", self.pool_size, pool=self.name)
+        metrics.set_gauge("db_pool_in_use", 0, pool=self.name)
+
+    def _bootstrap_schema(self):
+        with DatabaseManager._schema_lock:
+            if DatabaseManager._schema_ready:
+                return
+            self._create_tables()
+            DatabaseManager._schema_ready = True
+
     def _get_connection(self):
-        try:
-            return self.pool.get_connection()
-        except Exception as e:
-            raise DatabaseError(f"Error al obtener una conexión: {e}")
+        start = time.perf_counter()
+        deadline = time.monotonic() + settings.DB_POOL_TIMEOUT
+
+        while True:
+            try:
+                connection = self.pool.get_connection()
+                break
+            except PoolError as e:
+                # Pool saturado: se espera a que otra petición libere una conexión
+                self.pool_exhausted += 1
+                metrics.inc("db_pool_exhausted", pool=self.name)
+                if time.monotonic() >= deadline:
+                    raise DatabaseError(f"Pool de conexiones agotado: {e}")
+                time.sleep(0.01)
+            except Exception as e:
+                raise DatabaseError(f"Error al obtener una conexión: {e}")
+
+        metrics.observe("db_pool_wait", time.perf_counter() - start, pool=self.name)
+        with self._pool_lock:
+            self.connections_in_use += 1
+            metrics.set_gauge("db_pool_in_use", self.connections_in_use, pool=self.name)
+
+        return _PooledConnection(connection, self._release_connection)
+
+    def _release_connection(self):
+        with self._pool_lock:
+            self.connections_in_use -= 1
+            metrics.set_gauge("db_pool_in_use", self.connections_in_use, pool=self.name)
+
+    def get_pool_stats(self) -> dict:
+        return {
+            "name": self.name,
+            "size": self.pool_size,
+            "in_use": self.connections_in_use,
+            "exhausted": self.pool_exhausted,
+        }
 
     def _create_tables(self):
         connection = self._get_connection()
@@ -80,11 +169,17 @@ class DatabaseManager:
                         y_bottom INT NOT NULL,
                         confidence FLOAT NOT NULL,
                         model_version VARCHAR(50),
+                        entry_key CHAR(32) NULL,
+                        camera_id VARCHAR(64) NOT NULL DEFAULT 'default',
                         INDEX idx_timestamp (timestamp),
-                        INDEX idx_total_entries (total_entries)
+                        INDEX idx_total_entries (total_entries),
+                        INDEX idx_camera_timestamp (camera_id, timestamp),
+                        UNIQUE KEY uq_entry_key (entry_key)
                     ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
             """
             cursor.execute(query1)
+            self._migrate_entry_key(cursor)
+            self._migrate_camera_id(cursor)
 
             # Tabla de resultados
             query2 = """
@@ -112,6 +207,39 @@ class DatabaseManager:
             """
             cursor.execute(query3)
 
+            # Rollups de entradas por hora y por día (se actualizan en cada flush)
+            cursor.execute(
+                """
+                SELECT COUNT(*) FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'entradas_dia'
+                """,
+                (settings.DB_NAME,),
+            )
+            rollups_exist = cursor.fetchone()[0] > 0
+
+            query4 = """
+                    CREATE TABLE IF NOT EXISTS entradas_hora (
+                        hora DATETIME NOT NULL,
+                        camera_id VARCHAR(64) NOT NULL DEFAULT 'default',
+                        total INT NOT NULL DEFAULT 0,
+                        suma_confidence DOUBLE NOT NULL DEFAULT 0,
+                        PRIMARY KEY (hora, camera_id)
+                    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """
+            cursor.execute(query4)
+
+            query5 = """
+                    CREATE TABLE IF NOT EXISTS entradas_dia (
+                        fecha DATE NOT NULL,
+                        camera_id VARCHAR(64) NOT NULL DEFAULT 'default',
+                        total INT NOT NULL DEFAULT 0,
+                        suma_confidence DOUBLE NOT NULL DEFAULT 0,
+                        PRIMARY KEY (fecha, camera_id)
+                    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """
+            cursor.execute(query5)
+            self._migrate_rollup_camera_id(cursor)
+
             print("Tablas verificadas/creadas correctamente")
         except Exception as e:
             raise DatabaseError(f"Error al crear las tablas: {e}")
@@ -119,92 +247,219 @@ class DatabaseManager:
             cursor.close()
             connection.close()
 
-    # Insertar entradas en la base de datos
-    def insert_entry(self, entry: Entry):
-        if settings.BATCH_DB_INSERTS:
-            self.batch_buffer.append(entry)
-            if len(self.batch_buffer) >= settings.BATCH_SIZE:
-                return self._flush_batch()
-            return None
-        return self._insert_single(entry)
+        # Rollups recién creados sobre una tabla con datos: backfill inicial
+        if not rollups_exist:
+            self.rebuild_rollups()
 
-    def _insert_single(self, entry: Entry):
-        connection = self._get_connection()
+    @staticmethod
+    def _has_column(cursor, table: str, column: str) -> bool:
+        cursor.execute(
+            """
+            SELECT COUNT(*) FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_NAME = %s
+            """,
+            (settings.DB_NAME, table, column),
+        )
+        return cursor.fetchone()[0] > 0
 
-        try:
-            cursor = connection.cursor()
+    def _migrate_entry_key(self, cursor):
+        # Tablas creadas antes de la clave idempotente
+        if self._has_column(cursor, "entradas", "entry_key"):
+            return
 
-            query = """
-                INSERT INTO entradas 
-                    (timestamp, total_entries, x_center, y_bottom, confidence, model_version)
-                    VALUES (%s, %s, %s, %s, %s, %s)
+        cursor.execute(
+            """
+            ALTER TABLE entradas
+                ADD COLUMN entry_key CHAR(32) NULL,
+                ADD UNIQUE KEY uq_entry_key (entry_key)
+            """
+        )
+        print("Columna entry_key agregada a entradas")
+
+    def _migrate_camera_id(self, cursor):
+        # Tablas creadas antes de separar por cámara: lo existente queda en 'default'
+        if self._has_column(cursor, "entradas", "camera_id"):
+            return
+
+        cursor.execute(
             """
-            values = (
-                entry.timestamp,
-                entry.total_entries,
-                entry.x_center,
-                entry.y_bottom,
-                entry.confidence,
-                entry.model_version,
+            ALTER TABLE entradas
+                ADD COLUMN camera_id VARCHAR(64) NOT NULL DEFAULT 'default',
+                ADD INDEX idx_camera_timestamp (camera_id, timestamp)
+            """
+        )
+        print("Columna camera_id agregada a entradas")
+
+    def _migrate_rollup_camera_id(self, cursor):
+        # La clave del rollup pasa de (hora) / (fecha) a (hora, camera_id) / (fecha, camera_id)
+        for table, column in (("entradas_hora", "hora"), ("entradas_dia", "fecha")):
+            if self._has_column(cursor, table, "camera_id"):
+                continue
+
+            cursor.execute(
+                f"""
+                ALTER TABLE {table}
+                    ADD COLUMN camera_id VARCHAR(64) NOT NULL DEFAULT 'default' AFTER {column},
+                    DROP PRIMARY KEY,
+                    ADD PRIMARY KEY ({column}, camera_id)
+                """
             )
+            print(f"Columna camera_id agregada a {table}")
 
-            cursor.execute(query, values)
-            entry_id = cursor.lastrowid
+    # Insertar entradas en la base de datos
+    def insert_entry(self, entry: Entry):
+        # No bloquea: el escritor en segundo plano hace el INSERT
+        self._get_writer().submit(entry)
 
-            return entry_id
-        except Exception as e:
+    def _get_writer(self) -> "EntryWriter":
+        with self._writer_lock:
+            if self.writer is None:
+                self.writer = EntryWriter(self)
+                self.writer.start()
+            return self.writer
+
+    def _insert_single(self, entry: Entry):
+        try:
+            return self.insert_entries([entry])
+        except DatabaseError as e:
             print(f"Error al insertar la entrada: {e}")
             return None
-        finally:
-            cursor.close()
-            connection.close()
 
-    def _flush_batch(self) -> Optional[int]:
-        if not self.batch_buffer:
+    def insert_entries(self, entries: List[Entry]) -> Optional[int]:
+        """
+        INSERT de un lote; lanza DatabaseError para que el llamador reintente.
+        Las filas cuyo entry_key ya existe se omiten (reintentos idempotentes)
+        y los rollups se incrementan solo con las filas realmente nuevas, en
+        la misma transacción.
+        """
+        if not entries:
             return None
 
+        start = time.perf_counter()
         connection = self._get_connection()
+        cursor = None
         try:
             cursor = connection.cursor()
+            connection.start_transaction()
 
-            query = """
-                INSERT INTO entradas 
-                (timestamp, total_entries, x_center, y_bottom, confidence, model_version)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """
-
-            values = [
-                (
-                    entry.timestamp,
-                    entry.total_entries,
-                    entry.x_center,
-                    entry.y_bottom,
-                    entry.confidence,
-                    entry.model_version,
-                )
-                for entry in self.batch_buffer
-            ]
+            keys = [entry.entry_key for entry in entries]
+            placeholders = ", ".join(["%s"] * len(keys))
+            cursor.execute(
+                f"SELECT entry_key FROM entradas WHERE entry_key IN ({placeholders})", keys
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+            new_entries = [entry for entry in entries if entry.entry_key not in existing]
+
+            if new_entries:
+                query = """
+                    INSERT INTO entradas 
+                    (timestamp, total_entries, x_center, y_bottom, confidence, model_version,
+                     entry_key, camera_id)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """
+
+                values = [
+                    (
+                        entry.timestamp,
+                        entry.total_entries,
+                        entry.x_center,
+                        entry.y_bottom,
+                        entry.confidence,
+                        entry.model_version,
+                        entry.entry_key,
+                        entry.camera_id,
+                    )
+                    for entry in new_entries
+                ]
+
+                cursor.executemany(query, values)
+                self._update_rollups(cursor, new_entries)
+
+            connection.commit()
+            return cursor.lastrowid
+        except Exception as e:
+            try:
+                connection.rollback()
+            except Exception:
+                pass
+            raise DatabaseError(f"Error en batch insert: {e}")
+        finally:
+            if cursor is not None:
+                cursor.close()
+            connection.close()
+            metrics.observe("db_flush", time.perf_counter() - start)
+
+    @staticmethod
+    def _update_rollups(cursor, entries: List[Entry]):
+        # Buckets por (hora|fecha, camera_id), igual que la clave de cada tabla
+        hourly: Dict[tuple, List[float]] = {}
+        daily: Dict[tuple, List[float]] = {}
+
+        for entry in entries:
+            hour = entry.timestamp.replace(minute=0, second=0, microsecond=0)
+            for key, buckets in ((hour, hourly), (entry.timestamp.date(), daily)):
+                bucket = buckets.setdefault((key, entry.camera_id), [0, 0.0])
+                bucket[0] += 1
+                bucket[1] += entry.confidence
+
+        for table, column, buckets in (
+            ("entradas_hora", "hora", hourly),
+            ("entradas_dia", "fecha", daily),
+        ):
+            cursor.executemany(
+                f"""
+                INSERT INTO {table} ({column}, camera_id, total, suma_confidence)
+                VALUES (%s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    total = total + VALUES(total),
+                    suma_confidence = suma_confidence + VALUES(suma_confidence)
+                """,
+                [
+                    (key, camera_id, count, conf)
+                    for (key, camera_id), (count, conf) in buckets.items()
+                ],
+            )
 
-            cursor.executemany(query, values)
-            last_entry_id = cursor.lastrowid
+    def rebuild_rollups(self):
+        """Recalcula los rollups desde `entradas` (backfill de datos existentes)."""
+        connection = self._get_connection()
+        try:
+            cursor = connection.cursor()
+            connection.start_transaction()
 
-            count = len(self.batch_buffer)
-            self.batch_buffer.clear()
+            cursor.execute("DELETE FROM entradas_hora")
+            cursor.execute("DELETE FROM entradas_dia")
 
-            print(f"Insertadas {count} entradas en la base de datos")
+            cursor.execute(
+                """
+                INSERT INTO entradas_hora (hora, camera_id, total, suma_confidence)
+                SELECT DATE_FORMAT(timestamp, '%Y-%m-%d %H:00:00'), camera_id,
+                       COUNT(*), SUM(confidence)
+                FROM entradas
+                GROUP BY DATE_FORMAT(timestamp, '%Y-%m-%d %H:00:00'), camera_id
+                """
+            )
+            cursor.execute(
+                """
+                INSERT INTO entradas_dia (fecha, camera_id, total, suma_confidence)
+                SELECT DATE(timestamp), camera_id, COUNT(*), SUM(confidence)
+                FROM entradas
+                GROUP BY DATE(timestamp), camera_id
+                """
+            )
 
-            return last_entry_id
+            connection.commit()
+            print("Rollups de entradas recalculados")
         except Exception as e:
-            print(f"Error en batch insert: {e}")
-            self.batch_buffer.clear()
-            return None
+            connection.rollback()
+            raise DatabaseError(f"Error al recalcular los rollups: {e}")
         finally:
             cursor.close()
             connection.close()
 
-    def force_flush(self):
-        if self.batch_buffer:
-            self._flush_batch()
+    def force_flush(self, timeout: float = 10.0):
+        if self.writer is not None:
+            self.writer.flush(timeout)
 
     # Operaciones de consulta
     def get_total_entries(self):
@@ -213,12 +468,12 @@ class DatabaseManager:
             cursor = connection.cursor()
 
             query = """
-            SELECT COUNT(*) FROM entradas
+            SELECT COALESCE(SUM(total), 0) FROM entradas_dia
             """
             cursor.execute(query)
             result = cursor.fetchone()
 
-            return result[0] if result else 0
+            return int(result[0]) if result else 0
         except Exception as e:
             print(f"Error al obtener el total de entradas: {e}")
             return 0
@@ -233,7 +488,7 @@ class DatabaseManager:
 
             query = """
                 SELECT id, timestamp, total_entries, x_center, y_bottom, 
-                confidence, model_version
+                confidence, model_version, camera_id
                 FROM entradas 
                 ORDER BY timestamp DESC 
                 LIMIT %s
@@ -258,32 +513,32 @@ class DatabaseManager:
         try:
             cursor = connection.cursor(dictionary=True)
 
+            # Lee los rollups: costo constante sin importar el tamaño de entradas
             query1 = """
-                SELECT COUNT(*) as total FROM entradas
+                SELECT COALESCE(SUM(total), 0) as total,
+                       COALESCE(SUM(suma_confidence), 0) as suma_conf
+                FROM entradas_dia
             """
-
             cursor.execute(query1)
-            total = cursor.fetchone()["total"]
+            row = cursor.fetchone()
+            total = int(row["total"])
+            avg_conf = float(row["suma_conf"]) / total if total else 0.0
 
             query2 = """
-                SELECT AVG(confidence) as avg_conf FROM entradas
-            """
-            cursor.execute(query2)
-            avg_conf = cursor.fetchone()["avg_conf"] or 0.0
-
-            query3 = """
-                SELECT DATE(timestamp) as date, COUNT(*) as count
-                FROM entradas
-                WHERE timestamp >= DATE_SUB(NOW(), INTERVAL 7 DAY)
-                GROUP BY DATE(timestamp)
+                SELECT fecha as date, SUM(total) as count
+                FROM entradas_dia
+                WHERE fecha >= DATE(DATE_SUB(NOW(), INTERVAL 7 DAY))
+                GROUP BY fecha
                 ORDER BY date DESC
             """
-            cursor.execute(query3)
+            cursor.execute(query2)
             daily = cursor.fetchall()
 
             for row in daily:
                 if row["date"]:
                     row["date"] = row["date"].isoformat()
+                # SUM entre cámaras devuelve Decimal
+                row["count"] = int(row["count"])
 
             return Stats(
                 total_entries=total, prom_confidence=float(avg_conf), daily_entry=daily
@@ -351,6 +606,96 @@ class DatabaseManager:
             cursor.close()
             connection.close()
 
+    def get_daily_totals(self) -> List[Dict[str, Any]]:
+        connection = self._get_connection()
+        try:
+            cursor = connection.cursor(dictionary=True)
+
+            query = """
+                SELECT fecha, SUM(total) as total
+                FROM entradas_dia
+                GROUP BY fecha
+                ORDER BY fecha ASC
+            """
+            cursor.execute(query)
+            results = cursor.fetchall()
+
+            for row in results:
+                if row["fecha"]:
+                    row["fecha"] = row["fecha"].isoformat()
+                row["total"] = int(row["total"])
+
+            return results
+        finally:
+            cursor.close()
+            connection.close()
+
+    def get_hourly_totals(self, hours: int = 24) -> List[Dict[str, Any]]:
+        connection = self._get_connection()
+        try:
+            cursor = connection.cursor(dictionary=True)
+
+            query = """
+                SELECT hora, SUM(total) as total
+                FROM entradas_hora
+                WHERE hora >= DATE_SUB(NOW(), INTERVAL %s HOUR)
+                GROUP BY hora
+                ORDER BY hora ASC
+            """
+            cursor.execute(query, (hours,))
+            results = cursor.fetchall()
+
+            for row in results:
+                if row["hora"]:
+                    row["hora"] = row["hora"].isoformat()
+                row["total"] = int(row["total"])
+
+            return results
+        finally:
+            cursor.close()
+            connection.close()
+
+    def get_latest_recommendation(self, algorithm: str) -> Optional[Dict[str, Any]]:
+        connection = self._get_connection()
+        try:
+            cursor = connection.cursor(dictionary=True)
+
+            query = """
+                SELECT * FROM recomendaciones 
+                WHERE algoritmo = %s
+                ORDER BY timestamp DESC 
+                LIMIT 1
+            """
+            cursor.execute(query, (algorithm,))
+            result = cursor.fetchone()
+
+            if result and result["timestamp"]:
+                result["timestamp"] = result["timestamp"].isoformat()
+
+            return result
+        finally:
+            cursor.close()
+            connection.close()
+
+    def insert_recommendation(self, algorithm: str, result: Dict[str, Any]):
+        connection = self._get_connection()
+        try:
+            cursor = connection.cursor()
+            try:
+                query = """
+                    INSERT INTO recomendaciones (algoritmo, timestamp, resultado)
+                    VALUES (%s, %s, %s)
+                """
+                cursor.execute(
+                    query,
+                    (algorithm, datetime.now(), json.dumps(result, ensure_ascii=False, indent=2)),
+                )
+                connection.commit()
+            finally:
+                cursor.close()
+        finally:
+            connection.close()
+
     def get_peak_hours(self) -> List[Dict[str, Any]]:
         return self.get_algorithm_results("peak_hours")
 
@@ -362,10 +707,218 @@ class DatabaseManager:
 
     # Cierra el pool de conexiones a la db
     def close(self):
-        self.force_flush()
+        if self.writer is not None:
+            self.writer.stop()
+            self.writer = None
         print("Pool de conexiones cerrado correctamente")
 
 
+class AsyncDatabase:
+    """
+    Acceso asíncrono para la API: cada consulta síncrona del DatabaseManager
+    corre en un executor acotado al tamaño del pool (ningún hilo queda
+    esperando conexión) y con un timeout por petición, sin bloquear el
+    event loop. Un timeout no cancela la consulta en curso, solo libera
+    a quien la esperaba.
+    """
+
+    def __init__(self, db: DatabaseManager, max_workers: int = None,
+                 timeout: float = None):
+        self.db = db
+        self.timeout = timeout or settings.DB_QUERY_TIMEOUT
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or db.pool_size, thread_name_prefix="db-query"
+        )
+        self.timeouts = 0
+
+    async def run(self, method: str, *args, timeout: float = None):
+        loop = asyncio.get_running_loop()
+        call = functools.partial(getattr(self.db, method), *args)
+
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._executor, call), timeout or self.timeout
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            metrics.inc("db_query_timeouts", query=method)
+            raise DatabaseTimeoutError(
+                f"La consulta {method} superó {timeout or self.timeout:.1f}s"
+            )
+        finally:
+            metrics.observe("db_query", time.perf_counter() - start, query=method)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+class EntryWriter:
+    """
+    Hilo escritor de entradas. El loop de video solo encola (sin I/O); el
+    hilo hace flush cada DB_FLUSH_INTERVAL_MS o al juntar BATCH_SIZE filas.
+    Si MySQL falla, reintenta el mismo lote con backoff exponencial en lugar
+    de descartarlo. Con la cola llena, submit() espera como máximo
+    DB_WRITER_PUT_TIMEOUT_MS y luego deja la entrada en un buffer de
+    desborde acotado (DB_WRITER_OVERFLOW_SIZE). Si también se llena, la
+    entrada se descarta y se cuenta en db_writer_dropped: el loop de video
+    nunca queda bloqueado y la memoria no crece sin límite. Para no perder
+    entradas en una caída larga de MySQL está el spool (SPOOL_ENABLED).
+    """
+
+    def __init__(self, db: DatabaseManager, max_queue: int = None,
+                 flush_interval: float = None, flush_size: int = None):
+        self.db = db
+        self.queue: "queue.Queue[Entry]" = queue.Queue(
+            maxsize=max_queue or settings.DB_WRITER_QUEUE_SIZE
+        )
+        self.flush_interval = (
+            flush_interval if flush_interval is not None
+            else settings.DB_FLUSH_INTERVAL_MS / 1000.0
+        )
+        self.flush_size = flush_size or (
+            settings.BATCH_SIZE if settings.BATCH_DB_INSERTS else 1
+        )
+        self.max_backoff = settings.DB_RETRY_MAX_BACKOFF
+        self.put_timeout = settings.DB_WRITER_PUT_TIMEOUT_MS / 1000.0
+
+        self.max_overflow = settings.DB_WRITER_OVERFLOW_SIZE
+        self._overflow: deque = deque()  # Entradas que no cupieron en la cola
+        self._pending: List[Entry] = []  # Lote tomado de la cola, aún sin confirmar
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.written = 0
+        self.retries = 0
+        self.backpressure_events = 0
+        self.overflowed = 0
+        self.dropped = 0
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="entry-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+        unsaved = self.pending_count
+        if unsaved:
+            print(f"⚠ {unsaved} entradas sin persistir al cerrar el escritor")
+
+    @property
+    def pending_count(self) -> int:
+        return self.queue.qsize() + len(self._overflow) + len(self._pending)
+
+    def submit(self, entry: Entry):
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            # La BD no da abasto: espera acotada y luego al buffer de desborde
+            self.backpressure_events += 1
+            metrics.inc("db_writer_backpressure")
+            try:
+                self.queue.put(entry, timeout=self.put_timeout)
+            except queue.Full:
+                self._spill(entry)
+
+        metrics.set_gauge("queue_depth", self.queue.qsize(), queue="db_writer")
+        metrics.set_gauge("queue_depth", len(self._overflow), queue="db_writer_overflow")
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while self.pending_count and time.monotonic() < deadline:
+            if self._thread is None or not self._thread.is_alive():
+                break
+            time.sleep(0.05)
+        return self.pending_count == 0
+
+    def _spill(self, entry: Entry):
+        if len(self._overflow) < self.max_overflow:
+            self._overflow.append(entry)
+            self.overflowed += 1
+            metrics.inc("db_writer_overflow")
+            return
+
+        self.dropped += 1
+        metrics.inc("db_writer_dropped")
+        if self.dropped == 1 or self.dropped % 1000 == 0:
+            print(f"⚠ Escritor saturado: {self.dropped} entradas descartadas (MySQL no da abasto)")
+
+    def _refill_from_overflow(self):
+        # Solo el hilo escritor saca del buffer: el orden se conserva
+        while self._overflow:
+            try:
+                self.queue.put_nowait(self._overflow[0])
+            except queue.Full:
+                break
+            self._overflow.popleft()
+
+    def _collect_batch(self):
+        self._refill_from_overflow()
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(self._pending) < self.flush_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (self._stop_event.is_set() and self.queue.empty()):
+                break
+            try:
+                self._pending.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+    def _run(self):
+        backoff = self.flush_interval or 0.5
+
+        while not self._stop_event.is_set() or self.pending_count:
+            if not self._pending:
+                self._collect_batch()
+            if not self._pending:
+                continue
+
+            try:
+                self.db.insert_entries(self._pending)
+            except DatabaseError as e:
+                self.retries += 1
+                self.last_error = str(e)
+                metrics.inc("db_writer_retries")
+                print(f"{e} (reintento en {backoff:.1f}s, {len(self._pending)} filas)")
+
+                # Al cerrar no se insiste indefinidamente
+                if self._stop_event.wait(backoff):
+                    break
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+
+            count = len(self._pending)
+            self.written += count
+            self._pending = []
+            backoff = self.flush_interval or 0.5
+
+            metrics.inc("db_rows_written", count)
+            metrics.set_gauge("queue_depth", self.queue.qsize(), queue="db_writer")
+            print(f"Insertadas {count} entradas en la base de datos")
+
+    def get_stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "pending": len(self._pending),
+            "written": self.written,
+            "retries": self.retries,
+            "backpressure_events": self.backpressure_events,
+            "overflow": len(self._overflow),
+            "overflowed": self.overflowed,
+            "dropped": self.dropped,
+            "last_error": self.last_error,
+        }
+
+
 def create_database():
     try:
         connection = mysql.connector.connect(
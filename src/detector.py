@@ -1,92 +1,112 @@
-import torch
-from ultralytics import YOLO
-from typing import List, Tuple
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import List, Optional, Tuple
 import numpy as np
 
 from config.settings import settings
-from src.utils import validate_bbox, DetectionError
+from src.backends import DetectorBackend, create_backend
+from src.metrics import metrics
+from src.utils import validate_bboxes, DetectionError
+
+
+def empty_detections() -> np.ndarray:
+    return np.empty((0, 5), dtype=np.float32)
 
 
 class PersonDetector:
 
-    def __init__(self, model_path: str = None):
+    def __init__(self, model_path: str = None, backend: str = None,
+                 precision: str = None, keep_low_confidence: bool = None):
         self.model_path = model_path or settings.MODEL_PATH
-        self.device = self._detect_device()
-        self.model = None
+        self.backend_name = backend or settings.DETECTOR_BACKEND
+        self.precision = (precision or settings.DETECTOR_PRECISION).lower()
+        self.backend: Optional[DetectorBackend] = None
+        self.device = "cpu"
         self.imgsz = 640
-        print(torch.__version__)  # Debe mostrar >= 2.0.0
-        print(torch.version.cuda)  # Debe mostrar 13.0
-        print(torch.cuda.is_available())  # Debe ser True
-        print(torch.cuda.get_device_name(0))  # Debe mostrar "NVIDIA GeForce RTX 2070"
+        # Con el tracker en dos etapas se conservan las cajas de baja confianza
+        if keep_low_confidence is None:
+            keep_low_confidence = settings.TRACKER_TWO_STAGE
+        self.min_confidence = (
+            settings.CONFIDENCE_THRESHOLD if keep_low_confidence else settings.MIN_CONFIDENCE
+        )
+        # El modelo puede compartirse entre varios hilos de cámara
+        self._lock = threading.Lock()
 
         self._load_model()
 
-    def _detect_device(self) -> str:
-        if torch.cuda.is_available():
-            print("✓ Usando GPU (CUDA)")
-            return "cuda"
-        else:
-            print("⚠ Usando CPU (más lento)")
-            return "cpu"
-
-
     def _load_model(self):
-        try:
-            self.model = YOLO(self.model_path)
-            self.model.to(self.device)
-            print(f"✓ Modelo cargado en {self.device.upper()} (float32)")
-            print(f"   Tamaño de imagen: {self.imgsz}px")
-        except Exception as e:
-            raise DetectionError(f"Error al cargar el modelo: {e}")
+        self.backend = create_backend(self.backend_name, self.model_path, self.precision)
+        self.device = self.backend.device
+        print(f"✓ Modelo cargado con backend {self.backend.describe()}")
+        print(f"   Tamaño de imagen: {self.imgsz}px")
 
-    def detect(self, frame: np.ndarray) -> List[Tuple]:
-        if self.model is None:
-            raise DetectionError("Modelo no cargado")
+    def detect(self, frame: np.ndarray, roi: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+        return self.detect_batch([frame], [roi])[0]
 
-        try:
-            results = self.model(
-                frame,
-                conf=settings.CONFIDENCE_THRESHOLD,
-                classes=[0],
-                verbose=False,
-                imgsz=self.imgsz,
-                half=True if self.device == "cuda" else False,
-                device=self.device,
-                max_det=20,
-            )
-
-            return self._filter_detections(results, frame.shape)
+    def detect_batch(self, frames: List[np.ndarray],
+                     rois: Optional[List[Optional[Tuple]]] = None) -> List[np.ndarray]:
+        """
+        Ejecuta una sola pasada del modelo sobre varios frames (de distintas
+        cámaras o varios frames de una misma fuente) y retorna una lista de
+        detecciones por frame. Si se indica una ROI (x1, y1, x2, y2) para un
+        frame, solo se procesa ese recorte y las cajas se devuelven en
+        coordenadas del frame completo.
+        """
+        if self.backend is None:
+            raise DetectionError("Modelo no cargado")
 
-        except Exception as e:
-            print(f"⚠ Error al detectar personas: {e}")
+        if not frames:
             return []
 
-    def _filter_detections(self, results, frame_shape) -> List[Tuple]:
-        valid_detections = []
+        if rois is None:
+            rois = [None] * len(frames)
+
+        inputs = [
+            frame if roi is None
+            else np.ascontiguousarray(frame[roi[1]:roi[3], roi[0]:roi[2]])
+            for frame, roi in zip(frames, rois)
+        ]
 
-        if len(results) == 0 or results[0].boxes is None:
-            return valid_detections
+        try:
+            with self._lock:
+                raw_detections = self.backend.infer(inputs, self._effective_imgsz(inputs))
 
-        boxes = results[0].boxes
+            with metrics.time("post_filter"):
+                results = []
+                for detections, frame, roi in zip(raw_detections, frames, rois):
+                    if roi is not None and len(detections):
+                        detections = detections.copy()
+                        detections[:, [0, 2]] += roi[0]
+                        detections[:, [1, 3]] += roi[1]
+                    results.append(self._filter_detections(detections, frame.shape))
 
-        for i in range(len(boxes)):
-            box = boxes.xyxy[i].cpu().numpy()
-            conf = float(boxes.conf[i].cpu().numpy())
+            return results
 
-            x1, y1, x2, y2 = map(int, box)
-            bbox = (x1, y1, x2, y2)
+        except Exception as e:
+            print(f"⚠ Error al detectar personas: {e}")
+            return [empty_detections() for _ in frames]
 
-            if self._is_valid_detection(bbox, conf, frame_shape):
-                valid_detections.append((x1, y1, x2, y2, conf))
+    def _effective_imgsz(self, inputs: List[np.ndarray]) -> int:
+        # Un recorte pequeño no se amplía: se usa el menor múltiplo de 32 que lo cubre
+        largest_side = max(max(image.shape[:2]) for image in inputs)
+        return min(self.imgsz, int(np.ceil(largest_side / 32)) * 32)
 
-        return valid_detections
+    def _filter_detections(self, detections: np.ndarray, frame_shape) -> np.ndarray:
+        """
+        Recibe el array (N, 5) x1, y1, x2, y2, confidence del backend y retorna
+        solo las detecciones válidas. Los filtros de confianza y geometría se
+        aplican como una única máscara NumPy.
+        """
+        if len(detections) == 0:
+            return empty_detections()
 
-    def _is_valid_detection(self, bbox: Tuple, conf: float, frame_shape: Tuple) -> bool:
-        if conf < settings.MIN_CONFIDENCE:
-            return False
+        detections = detections.astype(np.float32, copy=True)
+        detections[:, :4] = np.trunc(detections[:, :4])
 
-        return validate_bbox(
-            bbox=bbox,
+        mask = (detections[:, 4] >= self.min_confidence) & validate_bboxes(
+            boxes=detections[:, :4],
             frame_shape=frame_shape,
             min_height=settings.MIN_HEIGHT,
             min_area_ratio=settings.MIN_AREA_RATIO,
@@ -95,6 +115,8 @@ class PersonDetector:
             max_aspect_ratio=settings.MAX_ASPECT_RATIO,
         )
 
+        return detections[mask]
+
     def get_bbox_info(self, bbox: Tuple) -> dict:
         x1, y1, x2, y2 = bbox
 
@@ -123,3 +145,143 @@ class PersonDetector:
 
         self.imgsz = size
         print(f"✓ Tamaño de imagen actualizado: {self.imgsz}px")
+
+
+class BatchScheduler:
+    """
+    Planificador de micro-batches: agrupa los frames enviados por varias
+    cámaras y los procesa en una sola llamada a detect_batch. Un batch se
+    despacha cuando se llena o cuando vence el tiempo máximo de espera.
+    Expone detect(frame), por lo que puede usarse en lugar del detector.
+    """
+
+    # Espera máxima de un resultado antes de detectar en el hilo llamador
+    RESULT_TIMEOUT = 5.0
+
+    def __init__(self, detector: PersonDetector, max_batch_size: int = None,
+                 max_wait: float = None):
+        self.detector = detector
+        self.max_batch_size = max(1, max_batch_size or settings.DETECTION_BATCH_SIZE)
+        self.max_wait = (
+            max_wait if max_wait is not None
+            else settings.DETECTION_BATCH_WAIT_MS / 1000.0
+        )
+
+        self._queue: queue.Queue = queue.Queue()
+        self._stop_event = threading.Event()
+        # Ordena submit() contra stop(): tras detener no se encola nada nuevo
+        self._submit_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        self.batches_processed = 0
+        self.frames_processed = 0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="batch-scheduler", daemon=True
+        )
+        self._thread.start()
+        print(
+            f"✓ Batching activo: hasta {self.max_batch_size} frames, "
+            f"espera máx. {self.max_wait * 1000:.0f}ms"
+        )
+
+    def stop(self):
+        with self._submit_lock:
+            self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+
+    def submit(self, frame: np.ndarray, roi: Optional[Tuple] = None) -> Future:
+        future: Future = Future()
+        with self._submit_lock:
+            if self._stop_event.is_set() or not self._thread:
+                future.set_exception(DetectionError("BatchScheduler detenido"))
+                return future
+            self._queue.put((frame, roi, future))
+        return future
+
+    def detect(self, frame: np.ndarray, roi: Optional[Tuple] = None) -> np.ndarray:
+        if not self._thread or not self._thread.is_alive():
+            return self.detector.detect(frame, roi)
+        try:
+            return self.submit(frame, roi).result(timeout=self.RESULT_TIMEOUT)
+        except (DetectionError, FutureTimeoutError):
+            # Scheduler detenido o trabado: no bloquear la cámara
+            return self.detector.detect(frame, roi)
+
+    @property
+    def imgsz(self) -> int:
+        return self.detector.imgsz
+
+    def set_imgsz(self, size: int):
+        self.detector.set_imgsz(size)
+
+    def _collect_batch(self) -> List[Tuple[np.ndarray, Optional[Tuple], Future]]:
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            metrics.set_gauge("queue_depth", self._queue.qsize(), queue="batch_scheduler")
+            metrics.set_gauge("batch_size", len(batch))
+
+            frames = [frame for frame, _, _ in batch]
+            rois = [roi for _, roi, _ in batch]
+
+            try:
+                results = self.detector.detect_batch(frames, rois)
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, _, future), detections in zip(batch, results):
+                future.set_result(detections)
+
+            self.batches_processed += 1
+            self.frames_processed += len(batch)
+
+        # Liberar a los productores que quedaron esperando
+        while True:
+            try:
+                _, _, future = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            future.set_result(empty_detections())
+
+    def get_stats(self) -> dict:
+        avg_batch = (
+            self.frames_processed / self.batches_processed
+            if self.batches_processed else 0.0
+        )
+        return {
+            "batches_processed": self.batches_processed,
+            "frames_processed": self.frames_processed,
+            "avg_batch_size": round(avg_batch, 2),
+            "queue_depth": self._queue.qsize(),
+        }
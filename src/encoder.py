@@ -0,0 +1,111 @@
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+from config.settings import settings
+from src.metrics import metrics
+
+FULL_VARIANT = "full"
+
+
+def _load_turbojpeg():
+    if not settings.JPEG_USE_TURBO:
+        return None
+    try:
+        from turbojpeg import TurboJPEG
+
+        return TurboJPEG()
+    except Exception as e:
+        # Paquete o libjpeg-turbo no disponibles: se usa cv2.imencode
+        print(f"⚠ TurboJPEG no disponible, se usará OpenCV: {e}")
+        return None
+
+
+class JpegEncoder:
+    """
+    Codificación JPEG en un pool pequeño de hilos (la codificación libera el
+    GIL). Usa libjpeg-turbo vía PyTurboJPEG si está instalado y genera
+    variantes reducidas del frame ("full", "640", "320", ...) por ancho.
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or settings.JPEG_ENCODE_WORKERS
+        self.variants: Dict[str, Optional[int]] = {FULL_VARIANT: None}
+        for width in settings.STREAM_VARIANT_WIDTHS:
+            self.variants[str(width)] = width
+
+        self._turbo = _load_turbojpeg()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def engine(self) -> str:
+        return "turbojpeg" if self._turbo is not None else "opencv"
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="jpeg-encode"
+            )
+        return self._pool
+
+    def resolve_variant(self, variant: Optional[str]) -> str:
+        variant = variant or FULL_VARIANT
+        if variant not in self.variants:
+            raise ValueError(
+                f"Variante desconocida: {variant} (opciones: {', '.join(self.variants)})"
+            )
+        return variant
+
+    def _resize(self, frame: np.ndarray, variant: str) -> np.ndarray:
+        width = self.variants[variant]
+        height, frame_width = frame.shape[:2]
+        if width is None or frame_width <= width:
+            return frame
+
+        new_height = max(1, int(round(height * width / frame_width)))
+        return cv2.resize(frame, (width, new_height), interpolation=cv2.INTER_AREA)
+
+    def encode(self, frame: np.ndarray, quality: int = None,
+               variant: str = FULL_VARIANT, label: str = "default") -> Optional[bytes]:
+        if quality is None:
+            quality = settings.JPEG_QUALITY
+
+        with metrics.time("jpeg_encode", camera=label, variant=variant):
+            frame = self._resize(frame, variant)
+
+            if self._turbo is not None:
+                return self._turbo.encode(frame, quality=quality)
+
+            ret, buffer = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+
+        if not ret:
+            return None
+        return buffer.tobytes()
+
+    def submit(self, frame: np.ndarray, quality: int = None,
+               variant: str = FULL_VARIANT, label: str = "default") -> Future:
+        return self._get_pool().submit(self.encode, frame, quality, variant, label)
+
+    async def encode_async(self, frame: np.ndarray, quality: int = None,
+                           variant: str = FULL_VARIANT,
+                           label: str = "default") -> Optional[bytes]:
+        return await asyncio.wrap_future(self.submit(frame, quality, variant, label))
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def get_stats(self) -> dict:
+        return {
+            "engine": self.engine,
+            "workers": self.max_workers,
+            "variants": list(self.variants),
+        }
+
+
+# Pool de codificación compartido por todos los streams del proceso
+jpeg_encoder = JpegEncoder()
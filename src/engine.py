@@ -7,47 +7,90 @@ from typing import List
 
 from config.settings import settings
 from src.camera import CameraManager
-from src.detector import PersonDetector
+from src.detector import PersonDetector, empty_detections
 from src.tracker import PersonTracker
-from src.approach import validate_entry, check_line_crossing, is_approaching_camera
+from src.adaptive import AdaptiveController
+from src.motion import MotionGate
+from src.cache import TTLCache
+from src.approach import evaluate_tracks
 from src.database import DatabaseManager, Entry, create_database
-from src.utils import FPSCalculator, load_json_config, print_header, print_info
+from src.spool import EntrySpool, SpoolReplayer
+from src.metrics import metrics
+from src.utils import FPSCalculator, RateMeter, compute_roi, load_json_config, print_header, print_info
 
 class DetectionEngine:
 
-    def __init__(self, use_database: bool = True):
+    def __init__(self, use_database: bool = True, source: Optional[str] = None,
+                 detector: Optional[PersonDetector] = None,
+                 camera_id: Optional[str] = None,
+                 owns_detector: Optional[bool] = None):
         print_header("NeuraFlow - Sistema de Detección de Entradas con IA")
-        self.camera = CameraManager()
-        self.detector = PersonDetector()
+        self.camera_id = camera_id
+        self.metrics_label = camera_id or "default"
+        self.camera = CameraManager(source, camera_id=camera_id)
+        # El detector puede compartirse entre varias cámaras (un solo modelo)
+        self.detector = detector or PersonDetector()
         self.tracker = PersonTracker()
-        self.db_manager = None
+        self._db_manager = None
+        # Estadísticas de la BD compartidas por todos los consumidores (/ws/stats)
+        self.stats_cache = TTLCache(settings.STATS_CACHE_TTL, name=f"stats_{self.metrics_label}")
+        self.spool: Optional[EntrySpool] = None
+        self.replayer: Optional[SpoolReplayer] = None
 
         if use_database:
-            try:
-                create_database()
-                self.db_manager = DatabaseManager()
-            except Exception as e:
-                print(f"Base de datos deshabilitada: {e}")
+            if settings.SPOOL_ENABLED:
+                # Toda entrada pasa primero por el spool local; el replayer
+                # la lleva a MySQL cuando está disponible (reintenta conectar)
+                self.spool = EntrySpool(settings.SPOOL_DIR / self.metrics_label)
+                self.replayer = SpoolReplayer(
+                    self.spool, self._connect_database,
+                    on_replay=lambda count: self.stats_cache.invalidate(),
+                )
+                self.replayer.db = self._connect_database()
+                self.replayer.start()
+            else:
+                self._db_manager = self._connect_database()
         
         self.total_entries = 0
         self.frame_count = 0
+        self.entry_listeners: List[Callable[[int], None]] = []
         self.fps_calculator = FPSCalculator(settings.FPS_UPDATE_INTERVAL)
+        self.capture_rate = RateMeter()
         self.is_running = False
 
         self.process_every_n_frames = settings.PROCESS_EVERY_N_FRAMES
-        self.last_detections = []
+        self.last_detections = empty_detections()
+        # Con un detector compartido solo su dueño puede cambiar imgsz
+        if owns_detector is None:
+            owns_detector = detector is None
+        self.controller = (
+            AdaptiveController(
+                self.detector, adjust_imgsz=settings.ADAPTIVE_IMGSZ and owns_detector
+            )
+            if settings.ADAPTIVE_CONTROL else None
+        )
 
         self.line = self._load_line_config()
+        self.roi: Optional[tuple] = None
+        self.motion_gate = MotionGate() if settings.MOTION_GATE else None
 
+        if self.camera_id:
+            print_info("ID de cámara", self.camera_id)
         print_info("Camara", self.camera.source)
         print_info("Modelo", settings.MODEL_PATH)
         print_info("Base de datos", "Activa" if self.db_manager else "Desactivada")
+        if self.spool:
+            print_info("Spool de entradas", str(self.spool.directory))
         print_info("Linea", "Configurada" if self.line else "Por defecto")
-        print_info("Optimización", f"Procesa 1/{self.process_every_n_frames} frames")
+        print_info(
+            "Optimización",
+            "Stride adaptativo" if self.controller
+            else f"Procesa 1/{self.process_every_n_frames} frames",
+        )
         print("=" * 70)
     
     def _load_line_config(self) -> Optional[List]:
-        config_path = settings.get_line_config_path()
+        config_path = settings.get_line_config_path(self.camera_id)
         config = load_json_config(config_path)
         return config.get("line")
     
@@ -68,9 +111,27 @@ class DetectionEngine:
             self.line = [0, height // 2, width, height // 2]
             print_info("Linea", f"Por defecto - Y = {height // 2}")
 
+        if settings.DETECTION_ROI:
+            self.roi = compute_roi(
+                self.line, frame.shape,
+                margin_x=settings.ROI_MARGIN_X,
+                margin_top=settings.ROI_MARGIN_TOP,
+                margin_bottom=settings.ROI_MARGIN_BOTTOM,
+            )
+            print_info("ROI de detección", self.roi)
+
+        if self.motion_gate is not None:
+            self.motion_gate.set_roi(self.roi or compute_roi(
+                self.line, frame.shape,
+                margin_x=settings.ROI_MARGIN_X,
+                margin_top=settings.ROI_MARGIN_TOP,
+                margin_bottom=settings.ROI_MARGIN_BOTTOM,
+            ))
+            print_info("Compuerta de movimiento", "Activa")
+
         self.is_running = True
         print("Motor iniciado")
-        print("Presiona 'Q' para salir, 'R' para reiniciar, '+/-' para ajustar velocidad")
+        print("Presiona 'Q' para salir, 'R' para reiniciar")
         print("=" * 70)
         
         try:
@@ -81,12 +142,21 @@ class DetectionEngine:
                     time.sleep(5)
                     continue
 
-                should_detect = (self.frame_count % self.process_every_n_frames) == 0
+                frame_start = time.perf_counter()
+                should_detect = self._should_detect(frame)
                 
                 frame = self._process_frame(frame, detect=should_detect)
+                metrics.observe("frame", time.perf_counter() - frame_start, camera=self.metrics_label)
 
                 self.frame_count += 1
                 fps = self.fps_calculator.update(self.frame_count)
+
+                if self.controller is not None:
+                    self.process_every_n_frames = self.controller.update(
+                        self.frame_count,
+                        self._get_capture_fps(fps),
+                        self.tracker.count_active_tracks(),
+                    )
                 
                 frame = self._add_ui_overlay(frame, fps)
 
@@ -102,54 +172,86 @@ class DetectionEngine:
                         break
                     elif key == ord('r'):
                         self.reset_counter()
-                    elif key == ord('+'):
-                        self.process_every_n_frames = max(1, self.process_every_n_frames - 1)
-                        print(f"Velocidad: 1/{self.process_every_n_frames} frames")
-                    elif key == ord('-'):
-                        self.process_every_n_frames = min(5, self.process_every_n_frames + 1)
-                        print(f"Velocidad: 1/{self.process_every_n_frames} frames")
         finally:
             self.stop()
+
+    def _get_capture_fps(self, loop_fps: float) -> float:
+        # Con captura en hilo propio se mide lo que decodifica la cámara
+        if self.camera.threaded:
+            return self.capture_rate.update(self.camera.buffer.frames_decoded)
+        return loop_fps
     
+    def _should_detect(self, frame: np.ndarray) -> bool:
+        on_stride = (self.frame_count % self.process_every_n_frames) == 0
+
+        if self.motion_gate is None:
+            return on_stride
+
+        moving = self.motion_gate.update(frame)
+
+        # Escena estática y sin tracks vivos: no hace falta ejecutar YOLO
+        if not moving and not self.tracker.get_all_people():
+            return False
+
+        # Al aparecer movimiento se detecta de inmediato, sin esperar al stride
+        return on_stride or self.motion_gate.just_woke
+
     def _process_frame(self, frame: np.ndarray, detect: bool = True) -> np.ndarray:
         height, width = frame.shape[:2]
 
-        x1, y1, x2, y2 = self.line
-        cv2.line(frame, (x1, y1), (x2, y2), (0, 0, 128), 2)
-
+        # Detectar antes de dibujar para no contaminar la entrada del modelo
         if detect:
-            detections = self.detector.detect(frame)
+            start = time.perf_counter()
+            detections = self.detector.detect(frame, roi=self.roi)
+            if self.controller is not None:
+                self.controller.record_inference((time.perf_counter() - start) * 1000)
             self.last_detections = detections
+            with metrics.time("tracking", camera=self.metrics_label):
+                self.tracker.update(detections)
         else:
-            detections = self.last_detections
+            # Sin detección: solo se predicen posiciones, sin duplicar historial
+            with metrics.time("tracking", camera=self.metrics_label):
+                self.tracker.predict()
+
+        draw_start = time.perf_counter()
+
+        x1, y1, x2, y2 = self.line
+        cv2.line(frame, (x1, y1), (x2, y2), (0, 0, 128), 2)
 
-        self.tracker.update(detections)
+        if self.roi is not None:
+            rx1, ry1, rx2, ry2 = self.roi
+            cv2.rectangle(frame, (rx1, ry1), (rx2, ry2), (96, 96, 96), 1)
 
         active_people = self.tracker.get_active_people()
 
-        for person_id, person in active_people.items():
-            last_position = person.get_last_position()
+        # Aproximación y cruce de todos los tracks en una pasada; el mismo
+        # resultado decide el conteo y el color de cada caja
+        step_start = time.perf_counter()
+        evaluation = evaluate_tracks(list(active_people.values()), self.line)
+        approach_time = time.perf_counter() - step_start
+
+        for index, (person_id, person) in enumerate(active_people.items()):
+            last_position = person.get_display_position()
             if last_position is None:
                 continue
 
             center_x, bottom_y = last_position
 
-            if not person.positions:
+            record = person.last_record()
+            if record is None:
                 continue
 
-            _, _, _, bbox_height, bbox_width = person.positions[-1]
+            bbox_height, bbox_width = int(record[3]), int(record[4])
             x1 = center_x - bbox_width // 2
             y1 = bottom_y - bbox_height
             x2 = center_x + bbox_width // 2
             y2 = bottom_y
 
-            is_valid, reason = validate_entry(person, self.line)
+            crossed_line = evaluation.crossed_line[index]
+            is_approaching = evaluation.approaching[index]
 
-            if is_valid and not person.counted:
+            if evaluation.valid[index]:
                 self._register_entry(person_id, center_x, bottom_y)
-            
-            crossed_line = check_line_crossing(person, self.line)
-            is_approaching, _ = is_approaching_camera(person)
 
             color = self._get_bbox_color(crossed_line, is_approaching, person.counted)
 
@@ -180,15 +282,42 @@ class DetectionEngine:
 
             cv2.circle(frame, (center_x, bottom_y), 5, (146, 22, 168), -1)
 
+        metrics.observe("approach", approach_time, camera=self.metrics_label)
+        metrics.observe(
+            "drawing", time.perf_counter() - draw_start - approach_time,
+            camera=self.metrics_label,
+        )
+
         return frame
 
+    @property
+    def db_manager(self) -> Optional[DatabaseManager]:
+        if self.replayer is not None:
+            return self.replayer.db
+        return self._db_manager
+
+    def _connect_database(self) -> Optional[DatabaseManager]:
+        try:
+            create_database()
+            return DatabaseManager(name=f"engine_{self.metrics_label}")
+        except Exception as e:
+            print(f"Base de datos no disponible: {e}")
+            return None
+
+    def add_entry_listener(self, listener: Callable[[int], None]):
+        """`listener(total_entries)` se llama desde el hilo de video en cada entrada."""
+        if listener not in self.entry_listeners:
+            self.entry_listeners.append(listener)
+
     def _register_entry(self, person_id: int, x: int, y: int):
         self.total_entries += 1
         self.tracker.mark_as_counted(person_id)
+        metrics.inc("entries", camera=self.metrics_label)
+        self.stats_cache.invalidate()
 
         timestamp = datetime.now()
 
-        if self.db_manager:
+        if self.spool or self.db_manager:
             person = self.tracker.get_person(person_id)
             entry = Entry(
                 timestamp=timestamp,
@@ -196,12 +325,23 @@ class DetectionEngine:
                 x_center=x,
                 y_bottom=y,
                 confidence=person.confidence,
-                model_version=settings.MODEL_VERSION
+                model_version=settings.MODEL_VERSION,
+                camera_id=self.metrics_label,
             )
-            self.db_manager.insert_entry(entry)
+            if self.spool:
+                self.spool.append(entry)
+            else:
+                self.db_manager.insert_entry(entry)
         
         print(f"[{timestamp:%H:%M:%S}] ✓ Entrada #{self.total_entries} - ID:{person_id}")
 
+        # Un listener con error no puede detener el conteo
+        for listener in self.entry_listeners:
+            try:
+                listener(self.total_entries)
+            except Exception as e:
+                print(f"⚠ Error en listener de entradas: {e}")
+
     def _get_bbox_color(self, crossed_line: bool, is_approaching: bool, 
                        counted: bool) -> tuple:
         if counted:
@@ -226,6 +366,10 @@ class DetectionEngine:
     def stop(self):
         self.is_running = False
 
+        if self.replayer:
+            self.replayer.stop()
+            self.spool.close()
+
         if self.db_manager:
             self.db_manager.force_flush()
             self.db_manager.close()
@@ -240,6 +384,7 @@ class DetectionEngine:
     
     def get_statistics(self) -> dict:
         stats = {
+            'camera_id': self.camera_id,
             'total_entries': self.total_entries,
             'fps': self.fps_calculator.fps,
             'tracked_people': self.tracker.count_active_tracks(),
@@ -248,10 +393,27 @@ class DetectionEngine:
             'process_rate': f"1/{self.process_every_n_frames}"
         }
 
+        if self.camera.threaded:
+            stats['capture'] = self.camera.get_capture_stats()
+
+        if self.motion_gate is not None:
+            stats['motion'] = self.motion_gate.get_stats()
+
+        if self.controller is not None:
+            stats['adaptive'] = self.controller.get_state()
+
+        if self.replayer is not None:
+            stats['spool'] = self.replayer.get_stats()
+
         if self.db_manager:
-            db_stats = self.db_manager.get_statistics()
+            db_stats = self.stats_cache.get("db_stats", self.db_manager.get_statistics)
             stats['db_total_entries'] = db_stats.total_entries
             stats['db_avg_confidence'] = db_stats.prom_confidence
             stats['daily_entries'] = db_stats.daily_entry
+
+            stats['stats_cache'] = self.stats_cache.get_stats()
+
+            if self.db_manager.writer is not None:
+                stats['db_writer'] = self.db_manager.writer.get_stats()
         
         return stats
@@ -0,0 +1,78 @@
+from typing import Tuple
+
+import numpy as np
+
+from config.settings import settings
+
+
+class ConstantVelocityKalman:
+    """
+    Filtro de Kalman de velocidad constante sobre el punto de apoyo de una
+    persona (centro x, borde inferior y), en píxeles y segundos. El estado
+    [x, y, vx, vy] y su covarianza viven en los arrays de TrackStore; aquí
+    solo están los parámetros y las operaciones, vectorizadas sobre lotes
+    de tracks (state (N, 4), cov (N, 4, 4)).
+    """
+
+    def __init__(self, measurement_noise: float = None, process_noise: float = None):
+        self.measurement_noise = measurement_noise or settings.KALMAN_MEASUREMENT_NOISE
+        self.process_noise = process_noise or settings.KALMAN_PROCESS_NOISE
+        self.measurement_var = self.measurement_noise ** 2
+
+    def initiate(self, xy: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        n = len(xy)
+        state = np.zeros((n, 4))
+        state[:, :2] = xy
+
+        # Velocidad desconocida al crear el track: varianza amplia
+        cov = np.zeros((n, 4, 4))
+        cov[:, [0, 1], [0, 1]] = self.measurement_var
+        cov[:, [2, 3], [2, 3]] = self.process_noise ** 2
+        return state, cov
+
+    def predict(self, state: np.ndarray, cov: np.ndarray,
+                dt: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """x' = F x, P' = F P Fᵀ + Q con F = [[I, dt·I], [0, I]]"""
+        dt = dt[:, None]
+        state = state.copy()
+        state[:, :2] += state[:, 2:] * dt
+
+        # F P Fᵀ sin armar F: primero filas, luego columnas
+        cov = cov.copy()
+        cov[:, :2, :] += cov[:, 2:, :] * dt[:, :, None]
+        cov[:, :, :2] += cov[:, :, 2:] * dt[:, None, :]
+
+        # Ruido de aceleración blanca
+        q = self.process_noise ** 2
+        dt = dt[:, 0]
+        for axis in (0, 1):
+            cov[:, axis, axis] += q * dt ** 4 / 4
+            cov[:, axis, axis + 2] += q * dt ** 3 / 2
+            cov[:, axis + 2, axis] += q * dt ** 3 / 2
+            cov[:, axis + 2, axis + 2] += q * dt ** 2
+        return state, cov
+
+    def innovation_covariance(self, cov: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """S = H P Hᵀ + R y su inversa (2x2 en forma cerrada), (N, 2, 2) cada una"""
+        S = cov[:, :2, :2].copy()
+        S[:, 0, 0] += self.measurement_var
+        S[:, 1, 1] += self.measurement_var
+
+        det = S[:, 0, 0] * S[:, 1, 1] - S[:, 0, 1] * S[:, 1, 0]
+        S_inv = np.empty_like(S)
+        S_inv[:, 0, 0] = S[:, 1, 1]
+        S_inv[:, 1, 1] = S[:, 0, 0]
+        S_inv[:, 0, 1] = -S[:, 0, 1]
+        S_inv[:, 1, 0] = -S[:, 1, 0]
+        S_inv /= det[:, None, None]
+        return S, S_inv
+
+    def update(self, state: np.ndarray, cov: np.ndarray,
+               xy: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        _, S_inv = self.innovation_covariance(cov)
+        K = cov[:, :, :2] @ S_inv  # (N, 4, 2)
+
+        residual = xy - state[:, :2]
+        state = state + (K @ residual[:, :, None])[:, :, 0]
+        cov = cov - K @ cov[:, :2, :]
+        return state, cov
@@ -0,0 +1,147 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _format_labels(key: LabelKey, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{v}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+class LatencyWindow:
+    """
+    Ventana deslizante de las últimas N muestras (buffer circular NumPy) para
+    calcular p50/p95/p99 sin crecer en memoria. Además lleva suma y conteo
+    acumulados como un summary de Prometheus.
+    """
+
+    def __init__(self, size: int = 1024):
+        self._samples = np.zeros(size, dtype=np.float64)
+        self._index = 0
+        self._filled = 0
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self._samples[self._index] = seconds
+        self._index = (self._index + 1) % len(self._samples)
+        if self._filled < len(self._samples):
+            self._filled += 1
+        self.count += 1
+        self.total += seconds
+
+    def percentiles(self, quantiles: Iterable[float] = (0.5, 0.95, 0.99)) -> Dict[float, float]:
+        if self._filled == 0:
+            return {q: 0.0 for q in quantiles}
+        window = self._samples[:self._filled]
+        values = np.quantile(window, list(quantiles))
+        return dict(zip(quantiles, values.tolist()))
+
+
+class MetricsRegistry:
+    """
+    Registro de métricas siempre activo: latencias por etapa del pipeline
+    (histogramas de ventana móvil), gauges (profundidad de colas) y
+    contadores. Se exporta en formato de texto de Prometheus.
+    """
+
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, prefix: str = "neuraflow", window_size: int = 1024):
+        self.prefix = prefix
+        self.window_size = window_size
+        self._lock = threading.Lock()
+        self._stages: Dict[LabelKey, LatencyWindow] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+
+    def observe(self, stage: str, seconds: float, **labels):
+        key = _label_key({"stage": stage, **labels})
+        with self._lock:
+            window = self._stages.get(key)
+            if window is None:
+                window = self._stages[key] = LatencyWindow(self.window_size)
+            window.observe(seconds)
+
+    @contextmanager
+    def time(self, stage: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = float(value)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def get_stage_summary(self) -> Dict[str, dict]:
+        summary = {}
+        with self._lock:
+            for key, window in self._stages.items():
+                name = ",".join(f"{k}={v}" for k, v in key)
+                p = window.percentiles(self.QUANTILES)
+                summary[name] = {
+                    "count": window.count,
+                    "p50_ms": round(p[0.5] * 1000, 3),
+                    "p95_ms": round(p[0.95] * 1000, 3),
+                    "p99_ms": round(p[0.99] * 1000, 3),
+                }
+        return summary
+
+    def render_prometheus(self) -> str:
+        lines = []
+        latency_name = f"{self.prefix}_stage_latency_seconds"
+
+        with self._lock:
+            lines.append(f"# HELP {latency_name} Latencia por etapa del pipeline (ventana móvil)")
+            lines.append(f"# TYPE {latency_name} summary")
+            for key, window in sorted(self._stages.items()):
+                for q, value in window.percentiles(self.QUANTILES).items():
+                    labels = _format_labels(key, [("quantile", str(q))])
+                    lines.append(f"{latency_name}{labels} {value:.6f}")
+                labels = _format_labels(key)
+                lines.append(f"{latency_name}_sum{labels} {window.total:.6f}")
+                lines.append(f"{latency_name}_count{labels} {window.count}")
+
+            for name, series in sorted(self._gauges.items()):
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {metric} gauge")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{metric}{_format_labels(key)} {value:g}")
+
+            for name, series in sorted(self._counters.items()):
+                metric = f"{self.prefix}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{metric}{_format_labels(key)} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._gauges.clear()
+            self._counters.clear()
+
+
+# Registro global del proceso
+metrics = MetricsRegistry()
@@ -0,0 +1,98 @@
+import cv2
+import numpy as np
+from typing import Optional, Tuple
+
+from config.settings import settings
+
+
+class MotionGate:
+    """
+    Compuerta de movimiento barata para decidir si vale la pena ejecutar el
+    detector. Compara el frame (recortado a la ROI, en escala de grises y
+    reducido) contra un fondo de media móvil y mide la fracción de píxeles
+    que cambiaron. Tras detectar movimiento se mantiene activa durante
+    MOTION_HOLD_FRAMES frames.
+    """
+
+    def __init__(self, roi: Optional[Tuple[int, int, int, int]] = None,
+                 threshold: float = None, hold_frames: int = None,
+                 scale_width: int = None):
+        self.roi = roi
+        self.threshold = threshold if threshold is not None else settings.MOTION_THRESHOLD
+        self.hold_frames = hold_frames if hold_frames is not None else settings.MOTION_HOLD_FRAMES
+        self.scale_width = scale_width or settings.MOTION_SCALE_WIDTH
+        self.pixel_delta = settings.MOTION_PIXEL_DELTA
+        self.learning_rate = settings.MOTION_LEARNING_RATE
+
+        self._background: Optional[np.ndarray] = None
+        self._hold = 0
+
+        self.score = 0.0
+        self.is_active = True
+        self.just_woke = False
+        self.frames_static = 0
+        self.frames_moving = 0
+
+    def set_roi(self, roi: Optional[Tuple[int, int, int, int]]):
+        self.roi = roi
+        self.reset()
+
+    def reset(self):
+        self._background = None
+        self._hold = 0
+        self.is_active = True
+
+    def _prepare(self, frame: np.ndarray) -> np.ndarray:
+        if self.roi is not None:
+            x1, y1, x2, y2 = self.roi
+            frame = frame[y1:y2, x1:x2]
+
+        height, width = frame.shape[:2]
+        if width > self.scale_width:
+            scale = self.scale_width / width
+            frame = cv2.resize(
+                frame, (self.scale_width, max(1, int(height * scale))),
+                interpolation=cv2.INTER_AREA,
+            )
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def update(self, frame: np.ndarray) -> bool:
+        gray = self._prepare(frame)
+
+        if self._background is None or self._background.shape != gray.shape:
+            self._background = gray.astype(np.float32)
+            self._hold = self.hold_frames
+            self.is_active = True
+            self.just_woke = True
+            return True
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        self.score = float(np.count_nonzero(diff > self.pixel_delta)) / diff.size
+        cv2.accumulateWeighted(gray, self._background, self.learning_rate)
+
+        was_active = self.is_active
+
+        if self.score >= self.threshold:
+            self._hold = self.hold_frames
+        elif self._hold > 0:
+            self._hold -= 1
+
+        self.is_active = self._hold > 0
+        self.just_woke = self.is_active and not was_active
+
+        if self.is_active:
+            self.frames_moving += 1
+        else:
+            self.frames_static += 1
+
+        return self.is_active
+
+    def get_stats(self) -> dict:
+        return {
+            "active": self.is_active,
+            "score": round(self.score, 4),
+            "frames_moving": self.frames_moving,
+            "frames_static": self.frames_static,
+        }
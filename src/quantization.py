@@ -0,0 +1,101 @@
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import cv2
+import numpy as np
+
+from config.settings import settings
+from src.utils import DetectionError
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def list_calibration_images(calibration_dir: Path, max_images: int) -> List[Path]:
+    if not calibration_dir.exists():
+        return []
+
+    images = sorted(
+        p for p in calibration_dir.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS
+    )
+    if len(images) > max_images:
+        # Muestreo uniforme para cubrir todo el rango horario grabado
+        step = len(images) / max_images
+        images = [images[int(i * step)] for i in range(max_images)]
+
+    return images
+
+
+def _make_calibration_reader(images: List[Path], input_name: str, imgsz: int):
+    from onnxruntime.quantization import CalibrationDataReader
+    from src.backends import OnnxRuntimeBackend
+
+    class FrameCalibrationReader(CalibrationDataReader):
+        """Entrega los frames grabados con el mismo preprocesado que el backend."""
+
+        def __init__(self):
+            self._iterator: Optional[Iterator] = None
+
+        def _generate(self):
+            for path in images:
+                frame = cv2.imread(str(path))
+                if frame is None:
+                    continue
+                canvas, _ = OnnxRuntimeBackend.letterbox(frame, imgsz)
+                tensor = canvas[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+                yield {input_name: tensor[np.newaxis]}
+
+        def get_next(self):
+            if self._iterator is None:
+                self._iterator = self._generate()
+            return next(self._iterator, None)
+
+        def rewind(self):
+            self._iterator = None
+
+    return FrameCalibrationReader()
+
+
+def quantize_model(fp32_path: Path, int8_path: Path,
+                   calibration_dir: Path = None, imgsz: int = 640) -> Path:
+    """
+    Cuantiza estáticamente a INT8 (formato QDQ, pesos por canal) un modelo
+    ONNX fp32, calibrando las activaciones con frames propios grabados.
+    """
+    try:
+        import onnxruntime as ort
+        from onnxruntime.quantization import (
+            CalibrationMethod, QuantFormat, QuantType, quantize_static,
+        )
+    except ImportError as e:
+        raise DetectionError(f"Cuantización no disponible (pip install onnxruntime): {e}")
+
+    calibration_dir = Path(calibration_dir or settings.CALIBRATION_DIR)
+    images = list_calibration_images(calibration_dir, settings.CALIBRATION_MAX_IMAGES)
+    if not images:
+        raise DetectionError(
+            f"No hay imágenes de calibración en {calibration_dir} "
+            "(guarda ahí frames grabados de la cámara)"
+        )
+
+    session = ort.InferenceSession(str(fp32_path), providers=["CPUExecutionProvider"])
+    input_name = session.get_inputs()[0].name
+    del session
+
+    print(f"Calibrando INT8 con {len(images)} frames de {calibration_dir}...")
+
+    try:
+        quantize_static(
+            model_input=str(fp32_path),
+            model_output=str(int8_path),
+            calibration_data_reader=_make_calibration_reader(images, input_name, imgsz),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+            calibrate_method=CalibrationMethod.MinMax,
+        )
+    except Exception as e:
+        raise DetectionError(f"Error al cuantizar el modelo: {e}")
+
+    print(f"✓ Modelo INT8 guardado en {int8_path}")
+    return int8_path
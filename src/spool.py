@@ -0,0 +1,329 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from config.settings import settings
+from src.database import DatabaseManager, Entry
+from src.metrics import metrics
+from src.utils import DatabaseError
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+def _segment_index(path: Path) -> int:
+    return int(path.stem[len(SEGMENT_PREFIX):])
+
+
+def _entry_to_line(entry: Entry) -> bytes:
+    data = entry.to_dict()
+    data.pop("id", None)
+    return (json.dumps(data, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _line_to_entry(line: bytes) -> Entry:
+    data = json.loads(line)
+    data["timestamp"] = datetime.fromisoformat(data["timestamp"])
+    return Entry(**data)
+
+
+class EntrySpool:
+    """
+    Log local de solo-anexado (segmentos JSONL) por el que pasa cada Entry
+    antes de llegar a MySQL. append() escribe y hace flush al SO; el fsync se
+    agrupa cada SPOOL_FSYNC_INTERVAL_MS para no pagar un fsync por entrada.
+    Los segmentos rotan al superar SPOOL_SEGMENT_MAX_BYTES y el avance del
+    replayer se guarda en checkpoint.json.
+    """
+
+    def __init__(self, directory: Path, fsync_interval: float = None,
+                 segment_max_bytes: int = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fsync_interval = (
+            fsync_interval if fsync_interval is not None
+            else settings.SPOOL_FSYNC_INTERVAL_MS / 1000.0
+        )
+        self.segment_max_bytes = segment_max_bytes or settings.SPOOL_SEGMENT_MAX_BYTES
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._last_fsync = time.monotonic()
+        self._unsynced = 0
+
+        self.appended = 0
+        self.fsyncs = 0
+
+        # Tras un reinicio se abre un segmento nuevo: los anteriores quedan
+        # sellados y el replayer los drena
+        segments = self.list_segments()
+        if segments:
+            self._truncate_partial_line(segments[-1])
+        self._index = _segment_index(segments[-1]) + 1 if segments else 1
+        self._open_segment()
+
+    @staticmethod
+    def _truncate_partial_line(segment: Path):
+        """Recorta la línea a medio escribir que deja una caída del proceso"""
+        data = segment.read_bytes()
+        if not data or data.endswith(b"\n"):
+            return
+        keep = data.rfind(b"\n") + 1
+        print(f"⚠ {segment.name}: se descarta una línea incompleta al final ({len(data) - keep} bytes)")
+        with open(segment, "r+b") as f:
+            f.truncate(keep)
+
+    @property
+    def active_segment(self) -> Path:
+        return self.directory / f"{SEGMENT_PREFIX}{self._index:08d}{SEGMENT_SUFFIX}"
+
+    def list_segments(self) -> List[Path]:
+        return sorted(
+            self.directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"), key=_segment_index
+        )
+
+    def _open_segment(self):
+        self._file = open(self.active_segment, "ab")
+
+    def _fsync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_fsync = time.monotonic()
+        self._unsynced = 0
+        self.fsyncs += 1
+
+    def append(self, entry: Entry):
+        line = _entry_to_line(entry)
+
+        with self._lock:
+            if self._file is None:
+                # Spool ya cerrado (apagado en curso): la entrada se escribe
+                # igual y se envía en el próximo arranque
+                with open(self.active_segment, "ab") as f:
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self.appended += 1
+                metrics.inc("spool_appended")
+                return
+
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            self.appended += 1
+
+            if time.monotonic() - self._last_fsync >= self.fsync_interval:
+                self._fsync()
+
+            if self._file.tell() >= self.segment_max_bytes:
+                self._fsync()
+                self._file.close()
+                self._index += 1
+                self._open_segment()
+
+        metrics.inc("spool_appended")
+
+    def sync(self):
+        with self._lock:
+            if self._unsynced and self._file is not None:
+                self._fsync()
+
+    def is_active(self, segment: Path) -> bool:
+        return segment == self.active_segment
+
+    def read_from(self, segment: Path, offset: int) -> Tuple[List[Tuple[Entry, int]], int]:
+        """
+        Lee las líneas completas desde `offset`. Retorna [(entry, offset_final)]
+        y el offset hasta donde se consumió (una línea a medio escribir queda
+        para la próxima lectura).
+        """
+        with open(segment, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+
+        records = []
+        position = offset
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            position += len(line)
+            try:
+                records.append((_line_to_entry(line), position))
+            except (ValueError, TypeError, KeyError) as e:
+                print(f"⚠ Línea corrupta en {segment.name} (offset {position}): {e}")
+
+        return records, position
+
+    def load_checkpoint(self) -> Tuple[Optional[str], int]:
+        path = self.directory / CHECKPOINT_FILE
+        if not path.exists():
+            return None, 0
+        try:
+            data = json.loads(path.read_text())
+            return data["segment"], int(data["offset"])
+        except (ValueError, KeyError) as e:
+            print(f"⚠ Checkpoint del spool inválido, se reprocesa desde el inicio: {e}")
+            return None, 0
+
+    def save_checkpoint(self, segment: Path, offset: int):
+        path = self.directory / CHECKPOINT_FILE
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"segment": segment.name, "offset": offset}))
+        os.replace(tmp, path)
+
+    def pending_bytes(self) -> int:
+        segment_name, offset = self.load_checkpoint()
+        total = 0
+        for segment in self.list_segments():
+            size = segment.stat().st_size
+            total += size - offset if segment.name == segment_name else size
+        return total
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._fsync()
+                self._file.close()
+                self._file = None
+
+    def get_stats(self) -> dict:
+        return {
+            "directory": str(self.directory),
+            "segments": len(self.list_segments()),
+            "pending_bytes": self.pending_bytes(),
+            "appended": self.appended,
+            "fsyncs": self.fsyncs,
+        }
+
+
+class SpoolReplayer:
+    """
+    Hilo que drena el spool hacia `entradas`. Si MySQL no está disponible
+    (incluso desde el arranque) reintenta la conexión con backoff; los
+    INSERT usan entry_key, así que reprocesar un tramo tras una caída no
+    duplica filas. Los segmentos sellados se borran al quedar consumidos.
+    """
+
+    def __init__(self, spool: EntrySpool,
+                 connect: Callable[[], Optional[DatabaseManager]],
+                 interval: float = None, batch_size: int = None,
+                 on_replay: Optional[Callable[[int], None]] = None):
+        self.spool = spool
+        self.connect = connect
+        self.on_replay = on_replay  # Se llama con el número de filas enviadas
+        self.interval = (
+            interval if interval is not None
+            else settings.SPOOL_REPLAY_INTERVAL_MS / 1000.0
+        )
+        self.batch_size = batch_size or settings.BATCH_SIZE
+        self.max_backoff = settings.DB_RETRY_MAX_BACKOFF
+
+        self.db: Optional[DatabaseManager] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.replayed = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="spool-replayer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+        # Último intento de drenar lo pendiente antes de cerrar
+        self.spool.sync()
+        try:
+            self.replay_once()
+        except DatabaseError as e:
+            print(f"Spool pendiente al cerrar, se enviará en el próximo arranque: {e}")
+
+    def _ensure_connection(self) -> DatabaseManager:
+        if self.db is None:
+            self.db = self.connect()
+            if self.db is None:
+                raise DatabaseError("MySQL no disponible")
+            print("✓ Spool: conexión a MySQL establecida")
+        return self.db
+
+    def replay_once(self) -> int:
+        """Envía todo lo pendiente del spool. Lanza DatabaseError si MySQL falla."""
+        segments = self.spool.list_segments()
+        if not segments:
+            return 0
+
+        checkpoint_segment, checkpoint_offset = self.spool.load_checkpoint()
+        sent = 0
+
+        for segment in segments:
+            # Sellado antes de leer: un segmento que rota durante los INSERT
+            # puede haber recibido líneas después de read_from
+            sealed = not self.spool.is_active(segment)
+            offset = checkpoint_offset if segment.name == checkpoint_segment else 0
+            records, end = self.spool.read_from(segment, offset)
+
+            for start in range(0, len(records), self.batch_size):
+                chunk = records[start:start + self.batch_size]
+                db = self._ensure_connection()
+                db.insert_entries([entry for entry, _ in chunk])
+
+                offset = chunk[-1][1]
+                self.spool.save_checkpoint(segment, offset)
+                sent += len(chunk)
+
+            if end != offset:
+                # Solo líneas corruptas al final del tramo: no se reintentan
+                self.spool.save_checkpoint(segment, end)
+
+            # Se borra solo si ya estaba sellado al leer y se consumió entero;
+            # si no, lo que falte se lee en la próxima pasada
+            if sealed and end == segment.stat().st_size:
+                segment.unlink(missing_ok=True)
+
+        if sent:
+            self.replayed += sent
+            metrics.inc("spool_replayed", sent)
+            if self.on_replay is not None:
+                self.on_replay(sent)
+        return sent
+
+    def _run(self):
+        backoff = self.interval
+
+        while not self._stop_event.wait(backoff):
+            self.spool.sync()
+            try:
+                self.replay_once()
+                backoff = self.interval
+            except DatabaseError as e:
+                # MySQL caído: el tramo queda en el spool y se reintenta con backoff
+                self.failures += 1
+                self.last_error = str(e)
+                metrics.inc("spool_replay_failures")
+                backoff = min(max(backoff, self.interval) * 2, self.max_backoff)
+                print(f"Spool: {e} (reintento en {backoff:.1f}s)")
+
+            metrics.set_gauge("spool_pending_bytes", self.spool.pending_bytes(),
+                              spool=self.spool.directory.name)
+
+    def get_stats(self) -> dict:
+        return {
+            **self.spool.get_stats(),
+            "db_connected": self.db is not None,
+            "replayed": self.replayed,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
@@ -1,22 +1,108 @@
-import cv2
+import asyncio
 import threading
-from typing import Optional
+import time
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 import traceback
 from config.settings import settings
 
+from src.detector import BatchScheduler, PersonDetector
+from src.encoder import FULL_VARIANT, jpeg_encoder
 from src.engine import DetectionEngine
 
+
+class FrameSlot:
+    """
+    Último frame publicado con número de secuencia monótono y timestamp de
+    captura. El motor no reutiliza el array de un frame ya publicado, así
+    que publish() solo intercambia la referencia; la única copia es la del
+    lector en read() (sobre su propio buffer si lo pasa). Los consumidores
+    esperan un frame nuevo con wait_for_newer() (o su variante async) en
+    lugar de sondear.
+    """
+
+    def __init__(self):
+        self._frame: Optional[np.ndarray] = None
+        self._condition = threading.Condition()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+        self.seq = 0  # 0 = todavía no hay frame
+        self.timestamp = 0.0
+
+    def publish(self, frame: np.ndarray, timestamp: Optional[float] = None):
+        with self._condition:
+            self._frame = frame
+            self.seq += 1
+            self.timestamp = timestamp or time.time()
+            waiters, self._async_waiters = self._async_waiters, []
+            self._condition.notify_all()
+
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(self._wake, future)
+            except RuntimeError:
+                # Loop ya cerrado (apagado de la API): no debe frenar el video
+                continue
+
+    @staticmethod
+    def _wake(future: asyncio.Future):
+        if not future.done():
+            future.set_result(None)
+
+    def read(self, out: Optional[np.ndarray] = None) -> Tuple[int, float, Optional[np.ndarray]]:
+        """Copia el frame actual (en `out` si se pasa uno del mismo tamaño)."""
+        with self._condition:
+            frame = self._frame
+            if frame is None:
+                return self.seq, self.timestamp, None
+
+            if out is None or out.shape != frame.shape or out.dtype != frame.dtype:
+                out = np.empty_like(frame)
+            np.copyto(out, frame)
+            return self.seq, self.timestamp, out
+
+    def wait_for_newer(self, seq: int, timeout: Optional[float] = None) -> bool:
+        """Bloquea hasta que haya un frame con secuencia mayor que `seq`."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self.seq > seq, timeout=timeout)
+
+    async def async_wait_for_newer(self, seq: int, timeout: Optional[float] = None) -> bool:
+        loop = asyncio.get_running_loop()
+
+        with self._condition:
+            if self.seq > seq:
+                return True
+            future = loop.create_future()
+            self._async_waiters.append((loop, future))
+
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._condition:
+                if (loop, future) in self._async_waiters:
+                    self._async_waiters.remove((loop, future))
+
+        return self.seq > seq
+
+
 class StreamHandler:
-    def __init__(self, use_database: bool = True):
+    def __init__(self, use_database: bool = True, source: Optional[str] = None,
+                 detector: Optional[PersonDetector] = None,
+                 camera_id: Optional[str] = None,
+                 owns_detector: Optional[bool] = None):
         
-        self.engine = DetectionEngine(use_database)
+        self.camera_id = camera_id
+        self.engine = DetectionEngine(
+            use_database, source=source, detector=detector, camera_id=camera_id,
+            owns_detector=owns_detector,
+        )
 
         self.is_running = False
         self.thread: Optional[threading.Thread] = None
         
-        self.current_frame: Optional[np.ndarray] = None
-        self.frame_lock = threading.Lock()
+        self.slot = FrameSlot()
 
     def start(self):
         if self.is_running:
@@ -53,33 +139,39 @@ class StreamHandler:
             self.is_running = False
     
     def _save_frame(self, frame: np.ndarray):
-        with self.frame_lock:
-            self.current_frame = frame.copy()
+        self.slot.publish(frame, self.engine.camera.last_frame_time)
+
+    @property
+    def frame_seq(self) -> int:
+        return self.slot.seq
     
     def get_frame(self) -> Optional[np.ndarray]:
-        with self.frame_lock:
-            if self.current_frame is None:
-                return None
-            return self.current_frame.copy()
+        return self.slot.read()[2]
+
+    def get_frame_with_seq(self, out: Optional[np.ndarray] = None) -> Tuple[int, Optional[np.ndarray]]:
+        seq, _, frame = self.slot.read(out)
+        return seq, frame
+
+    def wait_for_newer(self, seq: int, timeout: Optional[float] = None) -> bool:
+        return self.slot.wait_for_newer(seq, timeout)
+
+    async def async_wait_for_newer(self, seq: int, timeout: Optional[float] = None) -> bool:
+        return await self.slot.async_wait_for_newer(seq, timeout)
     
-    def get_jpeg_frame(self, quality: int = None) -> Optional[bytes]:
+    def get_jpeg_frame(self, quality: int = None, variant: str = FULL_VARIANT) -> Optional[bytes]:
         
         frame = self.get_frame()
 
         if frame is None:
             return None
         
-        if quality is None:
-            quality = settings.JPEG_QUALITY
-        
-        encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+        return self.encode_jpeg(frame, quality, variant)
 
-        ret, buffer = cv2.imencode('.jpg', frame, encode_param)
-
-        if not ret:
-            return None
-        
-        return buffer.tobytes()
+    def encode_jpeg(self, frame: np.ndarray, quality: int = None,
+                    variant: str = FULL_VARIANT) -> Optional[bytes]:
+        return jpeg_encoder.encode(
+            frame, quality, variant, label=self.camera_id or "default"
+        )
     
     def get_statistics(self) -> dict:
         return self.engine.get_statistics()
@@ -89,5 +181,80 @@ class StreamHandler:
 
     def is_alive(self) -> bool:
         return self.is_running and self.thread and self.thread.is_alive()
-        
-        
\ No newline at end of file
+
+
+class MultiStreamHandler:
+    """
+    Ejecuta un pipeline DetectionEngine por cámara. Cada cámara tiene su
+    propio CameraManager, PersonTracker, línea y contador, pero todas
+    comparten una única instancia del modelo.
+    """
+
+    def __init__(self, sources: Optional[Dict[str, str]] = None,
+                 use_database: bool = True):
+        if sources is None:
+            sources = settings.get_camera_sources()
+
+        self.detector = PersonDetector()
+        self.scheduler: Optional[BatchScheduler] = None
+
+        # Con varias cámaras los frames se agrupan en una sola pasada del modelo
+        shared_detector = self.detector
+        if len(sources) > 1:
+            self.scheduler = BatchScheduler(
+                self.detector,
+                max_batch_size=min(settings.DETECTION_BATCH_SIZE, len(sources)),
+            )
+            shared_detector = self.scheduler
+
+        # Solo la primera cámara ajusta imgsz del modelo compartido
+        self.handlers: Dict[str, StreamHandler] = {
+            camera_id: StreamHandler(
+                use_database, source=source, detector=shared_detector,
+                camera_id=camera_id, owns_detector=index == 0,
+            )
+            for index, (camera_id, source) in enumerate(sources.items())
+        }
+
+        print(f"MultiStreamHandler: {len(self.handlers)} cámara(s) con modelo compartido")
+
+    @property
+    def camera_ids(self) -> List[str]:
+        return list(self.handlers.keys())
+
+    @property
+    def default(self) -> StreamHandler:
+        return next(iter(self.handlers.values()))
+
+    def get(self, camera_id: str) -> Optional[StreamHandler]:
+        return self.handlers.get(camera_id)
+
+    def start(self):
+        if self.scheduler:
+            self.scheduler.start()
+
+        for handler in self.handlers.values():
+            handler.start()
+
+    def stop(self):
+        for handler in self.handlers.values():
+            handler.stop()
+
+        if self.scheduler:
+            self.scheduler.stop()
+
+    def is_alive(self) -> bool:
+        return any(handler.is_alive() for handler in self.handlers.values())
+
+    def get_cameras_info(self) -> List[dict]:
+        return [
+            {
+                "id": camera_id,
+                "source": handler.engine.camera.source,
+                "active": bool(handler.is_alive()),
+            }
+            for camera_id, handler in self.handlers.items()
+        ]
+
+    def get_batching_stats(self) -> Optional[dict]:
+        return self.scheduler.get_stats() if self.scheduler else None
@@ -1,50 +1,367 @@
+import threading
 import time
 import numpy as np
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from config.settings import settings
+from src.assignment import iou_matrix, linear_assignment
+from src.kalman import ConstantVelocityKalman
+
+# Columnas de cada posición del historial
+X, Y, T, HEIGHT, WIDTH = range(5)
+
+# Paso mínimo hacia abajo (px) para contar un frame como "bajando"
+DOWN_STEP = 5
+
+
+class TrackStore:
+    """
+    Estado de todos los tracks como struct-of-arrays. Cada track ocupa un
+    slot y su historial es un ring buffer NumPy de `history` posiciones
+    (x, y, t, alto, ancho). Los slots liberados se reutilizan y la capacidad
+    solo se duplica si se llenan, así que un frame normal no asigna memoria.
+
+    Sobre las últimas `approach_window` posiciones de cada track se mantienen
+    sumas deslizantes (Σt, Σy, Σty y pasos hacia abajo, con t = índice de
+    muestra) que se actualizan al agregar y al desalojar una posición: el
+    análisis de aproximación cuesta O(1) sin importar el tamaño de la ventana.
+
+    El estado del filtro de Kalman ([x, y, vx, vy], covarianza e instante)
+    también es un array por slot, así que se predice y corrige por lotes.
+    """
+
+    def __init__(self, history: int = None, capacity: int = 64,
+                 approach_window: int = None):
+        self.history = history or settings.TRACK_HISTORY
+        self.approach_window = approach_window or settings.FRAMES_MIN_DETECTION
+        if not 2 <= self.approach_window <= self.history:
+            raise ValueError("La ventana de aproximación debe estar entre 2 y el historial")
+        self.kalman = ConstantVelocityKalman()
+        self.capacity = 0
+        self.handles: List[Optional["TrackedPerson"]] = []
+        self._free: List[int] = []
+        # Solo el hilo de video escribe; el lock protege a los lectores de
+        # otros hilos (API) mientras _grow reemplaza los arrays
+        self._grow_lock = threading.Lock()
+        self._grow(capacity)
+
+    def _grow(self, capacity: int):
+        with self._grow_lock:
+            self._resize(capacity)
+
+    def _resize(self, capacity: int):
+        current = self.capacity
+
+        def resize(name: str, shape, dtype) -> np.ndarray:
+            new = np.zeros(shape, dtype=dtype)
+            if current:
+                new[:current] = getattr(self, name)
+            return new
+
+        self.positions = resize("positions", (capacity, self.history, 5), np.float64)
+        self.head = resize("head", capacity, np.int64)        # Próxima escritura
+        self.length = resize("length", capacity, np.int64)    # Posiciones válidas
+        self.used = resize("used", capacity, bool)
+        self.person_id = resize("person_id", capacity, np.int64)
+        self.counted = resize("counted", capacity, bool)
+        self.confidence = resize("confidence", capacity, np.float64)
+        self.last_seen = resize("last_seen", capacity, np.float64)
+        self.frames_lost = resize("frames_lost", capacity, np.int64)
+        self.total_detections = resize("total_detections", capacity, np.int64)
+        self.predicted = resize("predicted", (capacity, 2), np.int64)
+        self.has_prediction = resize("has_prediction", capacity, bool)
+        # Sumas deslizantes sobre la ventana de aproximación
+        self.sum_t = resize("sum_t", capacity, np.float64)
+        self.sum_y = resize("sum_y", capacity, np.float64)
+        self.sum_ty = resize("sum_ty", capacity, np.float64)
+        self.steps_down = resize("steps_down", capacity, np.int64)
+        # Filtro de Kalman por slot
+        self.kf_state = resize("kf_state", (capacity, 4), np.float64)
+        self.kf_cov = resize("kf_cov", (capacity, 4, 4), np.float64)
+        self.kf_time = resize("kf_time", capacity, np.float64)
+
+        # Buffers de las máscaras calculadas en sitio (solo hilo de video)
+        self._active = np.zeros(capacity, dtype=bool)
+        self._scratch = np.zeros(capacity, dtype=bool)
+
+        self.handles.extend([None] * (capacity - current))
+        self._free.extend(range(capacity - 1, current - 1, -1))
+        self.capacity = capacity
+
+    def allocate(self, person_id: int) -> int:
+        if not self._free:
+            self._grow(self.capacity * 2)
+        slot = self._free.pop()
+
+        self.used[slot] = True
+        self.person_id[slot] = person_id
+        self.head[slot] = self.length[slot] = 0
+        self.counted[slot] = False
+        self.confidence[slot] = 0.0
+        self.frames_lost[slot] = self.total_detections[slot] = 0
+        self.has_prediction[slot] = False
+        self.sum_t[slot] = self.sum_y[slot] = self.sum_ty[slot] = 0.0
+        self.steps_down[slot] = 0
+        return slot
+
+    def release(self, slot: int):
+        self.used[slot] = False
+        self.handles[slot] = None
+        self._free.append(slot)
+
+    def clear(self):
+        for slot in np.flatnonzero(self.used).tolist():
+            self.release(slot)
+
+    def append(self, slots: np.ndarray, x: np.ndarray, y: np.ndarray, t: float,
+               height: np.ndarray, width: np.ndarray):
+        """Agrega una posición a cada slot de `slots` (sin repetidos)"""
+        head = self.head[slots]
+        window = self.approach_window
+        in_window = np.minimum(self.length[slots], window)
+        index = self.total_detections[slots]  # Índice de muestra de cada track
+
+        previous_y = self.positions[slots, head - 1, Y]
+        steps = (in_window > 0) & (y - previous_y > DOWN_STEP)
+
+        # Desalojar la muestra más vieja de las ventanas llenas (antes de que
+        # el ring buffer la sobrescriba si window == history)
+        full = in_window == window
+        oldest_y = np.where(full, self.positions[slots, (head - window) % self.history, Y], 0.0)
+        second_y = self.positions[slots, (head - window + 1) % self.history, Y]
+        oldest_index = np.where(full, index - window, 0)
+        steps_out = full & (second_y - oldest_y > DOWN_STEP)
+
+        self.sum_t[slots] += index - oldest_index
+        self.sum_y[slots] += y - oldest_y
+        self.sum_ty[slots] += index * y - oldest_index * oldest_y
+        self.steps_down[slots] += steps.astype(np.int64) - steps_out
+
+        self.positions[slots, head] = np.column_stack(
+            np.broadcast_arrays(x, y, t, height, width)
+        )
+        self.head[slots] = (head + 1) % self.history
+        self.length[slots] = np.minimum(self.length[slots] + 1, self.history)
+        self.total_detections[slots] = index + 1
+
+    def observe(self, slots: np.ndarray, measurements: np.ndarray, t: float):
+        """
+        Incorpora una medición (x, y, alto, ancho, confianza) por slot: ring
+        buffer, sumas de aproximación y filtro de Kalman, todo por lotes
+        """
+        x, y, height, width, confidence = measurements.T
+        new = self.length[slots] == 0
+
+        self.append(slots, x, y, t, height, width)
+        xy = measurements[:, :2]
+        if new.any():
+            self.kalman_initiate(slots[new], xy[new], t)
+        if not new.all():
+            self.kalman_update(slots[~new], xy[~new], t)
+
+        self.has_prediction[slots] = False
+        self.last_seen[slots] = t
+        self.confidence[slots] = confidence
+        self.frames_lost[slots] = 0  # Reset al detectar
+
+    def last(self, slot: int) -> np.ndarray:
+        """Última posición del slot (vista, sin copiar)"""
+        return self.positions[slot, self.head[slot] - 1]
+
+    def last_records(self, slots: np.ndarray) -> np.ndarray:
+        return self.positions[slots, self.head[slots] - 1]
+
+    def window(self, slot: int, frames: int = None) -> np.ndarray:
+        """Últimas `frames` posiciones del slot en orden cronológico"""
+        n = self.length[slot] if frames is None else min(frames, self.length[slot])
+        index = (self.head[slot] - n + np.arange(n)) % self.history
+        return self.positions[slot, index]
+
+    def approach_stats(self, slots: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Por slot, sobre su ventana de aproximación: crecimiento del área
+        (media de las 2 últimas vs las 2 primeras), pendiente de y por
+        mínimos cuadrados y fracción de pasos hacia abajo. O(1) por track.
+        """
+        n = np.minimum(self.length[slots], self.approach_window)
+        head = self.head[slots]
+
+        def area(offset):
+            row = self.positions[slots, (head + offset) % self.history]
+            return row[:, HEIGHT] * row[:, WIDTH]
+
+        initial_area = (area(-n) + area(-n + 1)) / 2
+        final_area = (area(-2) + area(-1)) / 2
+        area_growth = np.divide(
+            final_area - initial_area, initial_area,
+            out=np.zeros(len(slots)), where=(initial_area > 0) & (n >= 2),
+        )
+
+        # Índices consecutivos: Σ(t - t̄)² = n(n² - 1) / 12
+        sxx = n * (n * n - 1) / 12.0
+        sxy = self.sum_ty[slots] - self.sum_t[slots] * self.sum_y[slots] / np.maximum(n, 1)
+        y_trend = np.divide(sxy, sxx, out=np.zeros(len(slots)), where=sxx > 0)
+
+        consistency = np.divide(
+            self.steps_down[slots], n - 1,
+            out=np.zeros(len(slots)), where=n > 1,
+        )
+
+        return area_growth, y_trend, consistency
+
+    def kalman_initiate(self, slots: np.ndarray, xy: np.ndarray, t: float):
+        self.kf_state[slots], self.kf_cov[slots] = self.kalman.initiate(xy)
+        self.kf_time[slots] = t
+
+    def kalman_predict(self, slots: np.ndarray, t: float) -> np.ndarray:
+        """Avanza los filtros de `slots` hasta `t`; retorna las posiciones (N, 2)"""
+        dt = t - self.kf_time[slots]
+        ahead = dt > 0
+        if ahead.any():
+            moving = slots[ahead]
+            self.kf_state[moving], self.kf_cov[moving] = self.kalman.predict(
+                self.kf_state[moving], self.kf_cov[moving], dt[ahead]
+            )
+            self.kf_time[moving] = t
+        return self.kf_state[slots, :2]
+
+    def kalman_update(self, slots: np.ndarray, xy: np.ndarray, t: float):
+        self.kalman_predict(slots, t)
+        self.kf_state[slots], self.kf_cov[slots] = self.kalman.update(
+            self.kf_state[slots], self.kf_cov[slots], xy
+        )
+
+    def mark_lost(self):
+        np.add(self.frames_lost, 1, out=self.frames_lost, where=self.used)
+
+    def active_mask(self, in_place: bool = False) -> np.ndarray:
+        """
+        Slots detectados en el último frame y estables. Con in_place=True se
+        reutiliza un buffer interno: solo desde el hilo que llama a update()
+        """
+        if not in_place:
+            with self._grow_lock:
+                return self.used & (self.frames_lost == 0) & (self.total_detections >= 3)
+
+        np.equal(self.frames_lost, 0, out=self._active)
+        np.logical_and(self._active, self.used, out=self._active)
+        np.greater_equal(self.total_detections, 3, out=self._scratch)
+        np.logical_and(self._active, self._scratch, out=self._active)
+        return self._active
+
+    def stale_slots(self, now: float, timeout: float, max_frames_lost: int) -> np.ndarray:
+        np.greater(self.frames_lost, max_frames_lost, out=self._scratch)
+        np.logical_or(self._scratch, now - self.last_seen > timeout, out=self._scratch)
+        np.logical_and(self._scratch, self.used, out=self._scratch)
+        return np.flatnonzero(self._scratch)
 
 
-@dataclass
 class TrackedPerson:
-    person_id: int
-    positions: List[Tuple[int, int, float, int, int]] = field(default_factory=list)
-    counted: bool = False
-    last_seen: float = field(default_factory=time.time)
-    confidence: float = 0.0
-    frames_lost: int = 0
-    total_detections: int = 0
+    """
+    Handle de un track dentro de TrackStore: los atributos, incluido el
+    filtro de Kalman, se leen y escriben directamente sobre los arrays del
+    store.
+    """
+
+    __slots__ = ("store", "slot", "person_id")
+
+    def __init__(self, store: TrackStore, person_id: int):
+        self.store = store
+        self.person_id = person_id
+        self.slot = store.allocate(person_id)
+        store.handles[self.slot] = self
+
+    @property
+    def counted(self) -> bool:
+        return bool(self.store.counted[self.slot])
+
+    @counted.setter
+    def counted(self, value: bool):
+        self.store.counted[self.slot] = value
+
+    @property
+    def confidence(self) -> float:
+        return float(self.store.confidence[self.slot])
+
+    @property
+    def last_seen(self) -> float:
+        return float(self.store.last_seen[self.slot])
+
+    @property
+    def frames_lost(self) -> int:
+        return int(self.store.frames_lost[self.slot])
+
+    @property
+    def total_detections(self) -> int:
+        return int(self.store.total_detections[self.slot])
+
+    @property
+    def history_length(self) -> int:
+        return int(self.store.length[self.slot])
+
+    @property
+    def positions(self) -> List[Tuple[int, int, float, int, int]]:
+        """Copia del historial como tuplas (x, y, t, alto, ancho)"""
+        return [
+            (int(x), int(y), float(t), int(h), int(w))
+            for x, y, t, h, w in self.store.window(self.slot)
+        ]
+
+    @property
+    def predicted_position(self) -> Optional[Tuple[int, int]]:
+        if not self.store.has_prediction[self.slot]:
+            return None
+        x, y = self.store.predicted[self.slot]
+        return int(x), int(y)
 
-    def add_position(self, x: int, y: int, height: int, width: int, confidence: float = 0.0):
-        now = time.time()
-        self.positions.append((x, y, now, height, width))
-        self.last_seen = now
-        self.confidence = confidence
-        self.frames_lost = 0  # Reset al detectar
-        self.total_detections += 1
+    @predicted_position.setter
+    def predicted_position(self, value: Optional[Tuple[int, int]]):
+        self.store.has_prediction[self.slot] = value is not None
+        if value is not None:
+            self.store.predicted[self.slot] = value
 
-        # Mantener historial más largo para mejor análisis
-        if len(self.positions) > 20:
-            self.positions = self.positions[-20:]
+    def add_position(self, x: int, y: int, height: int, width: int, confidence: float = 0.0):
+        measurement = np.array([[x, y, height, width, confidence]], dtype=np.float64)
+        self.store.observe(np.array([self.slot]), measurement, time.time())
 
     def increment_frames_lost(self):
         """Incrementa contador cuando no se detecta en un frame"""
-        self.frames_lost += 1
+        self.store.frames_lost[self.slot] += 1
+
+    def last_record(self) -> Optional[np.ndarray]:
+        """Última posición (x, y, t, alto, ancho) sin copiar"""
+        if not self.store.length[self.slot]:
+            return None
+        return self.store.last(self.slot)
 
     def get_last_position(self) -> Optional[Tuple[int, int]]:
-        if not self.positions:
+        record = self.last_record()
+        if record is None:
+            return None
+        return int(record[X]), int(record[Y])
+
+    def predict_position(self, now: float = None) -> Optional[Tuple[int, int]]:
+        """Avanza el filtro de Kalman (velocidad constante) hasta `now`"""
+        if not self.store.length[self.slot]:
             return None
-        return self.positions[-1][:2]
+        x, y = self.store.kalman_predict(np.array([self.slot]), now or time.time())[0]
+        return int(round(x)), int(round(y))
 
-    def get_position_history(self, frames: int = None) -> List[Tuple]:
-        if not frames:
-            return self.positions
-        return self.positions[-frames:]
+    def get_display_position(self) -> Optional[Tuple[int, int]]:
+        return self.predicted_position or self.get_last_position()
+
+    def approach_stats(self) -> Tuple[float, float, float]:
+        """(crecimiento del área, pendiente de y, consistencia) en O(1)"""
+        stats = self.store.approach_stats(np.array([self.slot]))
+        return tuple(float(value[0]) for value in stats)
+
+    def get_position_history(self, frames: int = None) -> np.ndarray:
+        """Últimas posiciones (N, 5) en orden cronológico"""
+        return self.store.window(self.slot, frames or None)
 
     def time_since_last_seen(self) -> float:
         return time.time() - self.last_seen
-    
+
     def is_stable(self) -> bool:
         """Verifica si el tracking es estable (suficientes detecciones)"""
         return self.total_detections >= 3
@@ -52,148 +369,194 @@ class TrackedPerson:
 
 class PersonTracker:
 
-    def __init__(self):
+    def __init__(self, two_stage: bool = None):
+        self.store = TrackStore()
         self.tracked_people: Dict[int, TrackedPerson] = {}
         self.next_person_id: int = 1
+        self._active_people: Optional[Dict[int, TrackedPerson]] = None
         self.distance_threshold = 150  # AUMENTADO de 80 a 150
         self.timeout = 1.5  # REDUCIDO de 5.0 a 1.5 segundos
         self.max_frames_lost = 10  # NUEVO: Máximo de frames sin detección
-
-    def update(self, detections: List[Tuple]) -> Dict[int, TrackedPerson]:
+        self.gate_threshold = settings.KALMAN_GATE_CHI2  # Mahalanobis² máx. para asociar
+        self.iou_weight = settings.TRACKER_IOU_WEIGHT
+        self.confidence_weight = settings.TRACKER_CONFIDENCE_WEIGHT
+        self.solver = settings.TRACKER_ASSIGNMENT_SOLVER
+        # Dos etapas: cajas bajo MIN_CONFIDENCE solo para tracks existentes
+        self.two_stage = settings.TRACKER_TWO_STAGE if two_stage is None else two_stage
+        self.high_confidence = settings.MIN_CONFIDENCE
+        self.low_confidence_matches = 0
+
+    def update(self, detections: Sequence) -> Dict[int, TrackedPerson]:
         """
         Actualiza el tracking con las nuevas detecciones
+        (array (N, 5) o lista de tuplas x1, y1, x2, y2, confidence)
         """
-        # Incrementar frames perdidos para todos
-        for person in self.tracked_people.values():
-            person.increment_frames_lost()
+        # Incrementar frames perdidos para todos (en sitio sobre el store)
+        self.store.mark_lost()
+        self._active_people = None
 
         # Limpiar tracks antiguos ANTES de asignar
         self._cleanup_old_tracks()
 
-        assigned_detection_indices = set()
-        assigned_person_ids = set()
+        # Llevar todos los tracks al instante actual en un solo paso por
+        # lotes: se asocia contra la predicción
+        now = time.time()
+        self.store.kalman_predict(self._tracked_slots(), now)
+
+        boxes = self._as_array(detections)
+        # Mayor confianza primero: los IDs nuevos se reparten en ese orden
+        boxes = boxes[np.argsort(-boxes[:, 4], kind="stable")]
 
-        # Ordenar detecciones por confianza (mayor primero)
-        sorted_detections = sorted(enumerate(detections), 
-                                   key=lambda x: x[1][4], reverse=True)
+        if self.two_stage:
+            low_mask = boxes[:, 4] < self.high_confidence
+            high, low = boxes[~low_mask], boxes[low_mask]
+        else:
+            high, low = boxes, boxes[:0]
 
-        # Primera pasada: asignar detecciones a personas existentes
-        for det_idx, detection in sorted_detections:
-            x1, y1, x2, y2, conf = detection
+        slots = self._tracked_slots()
 
-            center_x = (x1 + x2) // 2
-            bottom_y = y2
-            bbox_width = x2 - x1
-            bbox_height = y2 - y1
+        # Primera etapa: detecciones confiables contra todos los tracks
+        unmatched_slots, unmatched_high = self._associate(slots, high, now)
 
-            person_id = self._find_closest_person(
-                center_x, bottom_y, assigned_person_ids, conf
-            )
+        # Segunda etapa (ByteTrack): las cajas de baja confianza (personas
+        # parcialmente ocluidas) solo sostienen tracks que quedaron sin asignar
+        if len(low) and len(unmatched_slots):
+            remaining, _ = self._associate(unmatched_slots, low, now)
+            self.low_confidence_matches += len(unmatched_slots) - len(remaining)
 
-            if person_id is not None:
-                self.tracked_people[person_id].add_position(
-                    center_x, bottom_y, bbox_height, bbox_width, conf
-                )
-                assigned_detection_indices.add(det_idx)
-                assigned_person_ids.add(person_id)
-
-        # Segunda pasada: crear nuevas personas para detecciones no asignadas
-        for det_idx, detection in sorted_detections:
-            if det_idx in assigned_detection_indices:
-                continue
-
-            x1, y1, x2, y2, conf = detection
-            center_x = (x1 + x2) // 2
-            bottom_y = y2
-            bbox_width = x2 - x1
-            bbox_height = y2 - y1
-
-            person_id = self._create_new_person(
-                center_x, bottom_y, bbox_height, bbox_width, conf
-            )
-            assigned_person_ids.add(person_id)
+        # Detecciones confiables sin track compatible: personas nuevas
+        if len(unmatched_high):
+            self._create_people(unmatched_high, now)
 
         return self.tracked_people
 
-    def _find_closest_person(self, x: int, y: int, assigned_ids: set, 
-                            confidence: float) -> Optional[int]:
+    def _associate(self, slots: np.ndarray, boxes: np.ndarray, now: float):
         """
-        Encuentra la persona más cercana considerando distancia y confianza
+        Asignación óptima (húngaro) track x detección. Actualiza los tracks
+        asignados y retorna (slots sin asignar, mediciones sin asignar).
         """
-        closest_person_id = None
-        min_score = float("inf")
-
-        for person_id, person in self.tracked_people.items():
-            if person_id in assigned_ids:
-                continue
-
-            last_position = person.get_last_position()
-            if last_position is None:
-                continue
-
-            last_x, last_y = last_position
-            distance = np.hypot(x - last_x, y - last_y)
-
-            # Solo considerar si está dentro del threshold
-            if distance > self.distance_threshold:
-                continue
-
-            # Score combinado: distancia y diferencia de confianza
-            conf_diff = abs(confidence - person.confidence)
-            score = distance + (conf_diff * 50)  # Penalizar cambios de confianza
-
-            if score < min_score:
-                min_score = score
-                closest_person_id = person_id
-
-        return closest_person_id
-
-    def _create_new_person(self, x: int, y: int, height: int, width: int, 
-                          confidence: float) -> int:
+        measurements = self._measurements(boxes)
+        cost = self._cost_matrix(slots, boxes, measurements)
+
+        matches = np.array(linear_assignment(cost, solver=self.solver), dtype=np.int64).reshape(-1, 2)
+        rows, cols = matches[:, 0], matches[:, 1]
+        if len(matches):
+            self.store.observe(slots[rows], measurements[cols], now)
+
+        return (
+            np.delete(slots, rows),
+            np.delete(measurements, cols, axis=0),
+        )
+
+    @staticmethod
+    def _as_array(detections: Sequence) -> np.ndarray:
+        if len(detections) == 0:
+            return np.empty((0, 5))
+        return np.asarray(detections, dtype=np.float64)[:, :5]
+
+    @staticmethod
+    def _measurements(boxes: np.ndarray) -> np.ndarray:
+        """(centro x, borde inferior y, alto, ancho, confianza) por detección, (N, 5)"""
+        x1, y1, x2, y2 = boxes[:, :4].astype(np.int64).T
+        return np.column_stack([
+            (x1 + x2) // 2, y2, y2 - y1, x2 - x1, boxes[:, 4],
+        ]).astype(np.float64)
+
+    def _cost_matrix(self, slots: np.ndarray, boxes: np.ndarray,
+                     measurements: np.ndarray) -> np.ndarray:
+        """
+        Costo (tracks x detecciones) de asociar cada track con cada detección:
+        distancia a la posición predicha + (1 - IoU) con la caja predicha +
+        diferencia de confianza. Los pares fuera del umbral de distancia o de
+        la compuerta de Mahalanobis del Kalman quedan en inf.
+        """
+        if not len(slots) or not len(boxes):
+            return np.empty((len(slots), len(boxes)))
+
+        predicted = self.store.kf_state[slots, :2]
+        dx = measurements[None, :, 0] - predicted[:, 0, None]
+        dy = measurements[None, :, 1] - predicted[:, 1, None]
+        distance = np.hypot(dx, dy)
+
+        # S⁻¹ de todos los tracks a la vez (2x2 en forma cerrada)
+        _, S_inv = self.store.kalman.innovation_covariance(self.store.kf_cov[slots])
+        a, b = S_inv[:, 0, 0, None], S_inv[:, 0, 1, None] + S_inv[:, 1, 0, None]
+        d = S_inv[:, 1, 1, None]
+        mahalanobis = a * dx * dx + b * dx * dy + d * dy * dy
+
+        # Caja de cada track (último alto/ancho) centrada en su predicción
+        last = self.store.last_records(slots)
+        height, width = last[:, HEIGHT], last[:, WIDTH]
+        track_boxes = np.stack([
+            predicted[:, 0] - width / 2, predicted[:, 1] - height,
+            predicted[:, 0] + width / 2, predicted[:, 1],
+        ], axis=1)
+        iou = iou_matrix(track_boxes, boxes[:, :4])
+
+        confidences = self.store.confidence[slots]
+        conf_diff = np.abs(boxes[None, :, 4] - confidences[:, None])
+
+        cost = (distance
+                + (1.0 - iou) * self.iou_weight
+                + conf_diff * self.confidence_weight)
+        cost[(distance > self.distance_threshold) | (mahalanobis > self.gate_threshold)] = np.inf
+        return cost
+
+    def predict(self):
         """
-        Crea una nueva persona tracked
+        Para frames sin detección: predice la posición de cada track sin
+        agregar posiciones duplicadas al historial (no altera el análisis
+        de aproximación ni los contadores de frames perdidos).
         """
-        person_id = self.next_person_id
-        self.next_person_id += 1
+        slots = self._tracked_slots()
+        predicted = np.rint(self.store.kalman_predict(slots, time.time()))
+        self.store.predicted[slots] = predicted
+        self.store.has_prediction[slots] = True
 
-        person = TrackedPerson(person_id=person_id)
-        person.add_position(x, y, height, width, confidence)
+    def _tracked_slots(self) -> np.ndarray:
+        """Slots con al menos una posición (filtro de Kalman inicializado)"""
+        return np.flatnonzero(self.store.used & (self.store.length > 0))
 
-        self.tracked_people[person_id] = person
+    def _create_people(self, measurements: np.ndarray, now: float):
+        """Crea un track por medición; IDs en el orden de `measurements`"""
+        slots = np.empty(len(measurements), dtype=np.int64)
+        for index in range(len(measurements)):
+            person_id = self.next_person_id
+            self.next_person_id += 1
 
-        return person_id
+            person = TrackedPerson(self.store, person_id)
+            self.tracked_people[person_id] = person
+            slots[index] = person.slot
+
+        self.store.observe(slots, measurements, now)
 
     def _cleanup_old_tracks(self):
         """
-        Elimina tracks antiguos o con muchos frames perdidos
+        Elimina tracks antiguos (timeout) o con muchos frames perdidos
+        consecutivos; la condición se evalúa sobre todo el store a la vez
         """
-        to_remove = []
-
-        for person_id, person in self.tracked_people.items():
-            # Eliminar por timeout
-            if person.time_since_last_seen() > self.timeout:
-                to_remove.append(person_id)
-                continue
-            
-            # NUEVO: Eliminar por frames perdidos consecutivos
-            if person.frames_lost > self.max_frames_lost:
-                to_remove.append(person_id)
-                continue
+        stale = self.store.stale_slots(time.time(), self.timeout, self.max_frames_lost)
 
-        for person_id in to_remove:
-            del self.tracked_people[person_id]
+        for slot in stale.tolist():
+            person = self.store.handles[slot]
+            del self.tracked_people[person.person_id]
+            self.store.release(slot)
 
-        if to_remove:
-            print(f"Limpieza: {len(to_remove)} persona(s) eliminada(s)")
+        if len(stale):
+            print(f"Limpieza: {len(stale)} persona(s) eliminada(s)")
 
     def get_active_people(self) -> Dict[int, TrackedPerson]:
         """
-        Retorna solo las personas activamente detectadas (no perdidas)
+        Retorna solo las personas activamente detectadas (no perdidas).
+        El dict se arma una vez por update() y se reutiliza hasta el próximo
         """
-        return {
-            pid: person for pid, person in self.tracked_people.items()
-            if person.frames_lost == 0 and person.is_stable()
-        }
+        if self._active_people is None:
+            slots = np.flatnonzero(self.store.active_mask(in_place=True))
+            slots = slots[np.argsort(self.store.person_id[slots])]
+            self._active_people = {
+                int(self.store.person_id[slot]): self.store.handles[slot] for slot in slots
+            }
+        return self._active_people
 
     def get_person(self, person_id: int) -> Optional[TrackedPerson]:
         return self.tracked_people.get(person_id)
@@ -202,13 +565,19 @@ class PersonTracker:
         return self.tracked_people
 
     def count_active_tracks(self) -> int:
-        return len(self.get_active_people())
+        """Seguro desde otros hilos (API): no usa los buffers del store"""
+        active_people = self._active_people
+        if active_people is not None:
+            return len(active_people)
+        return int(np.count_nonzero(self.store.active_mask()))
 
     def reset(self):
+        self.store.clear()
         self.tracked_people = {}
+        self._active_people = None
         self.next_person_id = 1
         print("Tracker reseteado")
 
     def mark_as_counted(self, person_id: int):
         if person_id in self.tracked_people:
-            self.tracked_people[person_id].counted = True
\ No newline at end of file
+            self.tracked_people[person_id].counted = True
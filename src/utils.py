@@ -1,5 +1,6 @@
 import json
 import time
+import numpy as np
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, Optional
@@ -28,26 +29,28 @@ def save_json_datetime(data: Any) -> Any:
 
 # Mide el tiempo que tarda en ejecutarse un bloque de codigo
 class Timer:
-    def __init__(self, name: str = "Operacion"):
+    def __init__(self, name: str = "Operacion", verbose: bool = True):
         self.name = name
+        self.verbose = verbose
         self.start = None
         self.elapsed = None
     
     def __enter__(self):
-        self.start = time.time()
+        self.start = time.perf_counter()
         return self
     
-    def __exit__(sel, *args):
-        self.elapsed = time.time() - self.start
-        print(f"{self.name}: {self.elapsed:.3f}s")
+    def __exit__(self, *args):
+        self.elapsed = time.perf_counter() - self.start
+        if self.verbose:
+            print(f"{self.name}: {self.elapsed:.3f}s")
 
 def timer_decorator(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start = time.time()
-        result = func(*args, *kwargs)
-        elapsed = time.time() - start
-        print('{func.__name__}: {elapsed:.3f}s')
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        print(f'{func.__name__}: {elapsed:.3f}s')
         return result
     return wrapper
 
@@ -76,6 +79,29 @@ class FPSCalculator:
     def fps(self) -> float:
         return self._fps
 
+# Mide la tasa (eventos/s) de un contador acumulado, recalculada por ventana de tiempo
+class RateMeter:
+    def __init__(self, window: float = 1.0):
+        self.window = window
+        self.last_time = time.time()
+        self.last_count = 0
+        self._rate = 0.0
+
+    def update(self, current_count: int) -> float:
+        current_time = time.time()
+        elapsed = current_time - self.last_time
+
+        if elapsed >= self.window:
+            self._rate = (current_count - self.last_count) / elapsed
+            self.last_time = current_time
+            self.last_count = current_count
+
+        return self._rate
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
 # Validar si el Bounding Box es valido
 def validate_bbox(bbox: tuple, frame_shape: tuple, 
                   min_height: int = 60,
@@ -109,6 +135,49 @@ def validate_bbox(bbox: tuple, frame_shape: tuple,
     
     return True
 
+# Version vectorizada de validate_bbox: boxes es un array (N, 4) de x1, y1, x2, y2
+def validate_bboxes(boxes: np.ndarray, frame_shape: tuple,
+                    min_height: int = 60,
+                    min_area_ratio: float = 0.001,
+                    max_area_ratio: float = 0.4,
+                    min_aspect_ratio: float = 1.2,
+                    max_aspect_ratio: float = 4.5) -> np.ndarray:
+
+    frame_height, frame_width = frame_shape[:2]
+
+    bbox_width = boxes[:, 2] - boxes[:, 0]
+    bbox_height = boxes[:, 3] - boxes[:, 1]
+
+    area_ratio = (bbox_width * bbox_height) / float(frame_width * frame_height)
+    aspect_ratio = np.divide(
+        bbox_height, bbox_width,
+        out=np.zeros_like(bbox_height, dtype=np.float64),
+        where=bbox_width != 0,
+    )
+
+    return (
+        (bbox_height >= min_height)
+        & (area_ratio > min_area_ratio) & (area_ratio < max_area_ratio)
+        & (bbox_width != 0)
+        & (aspect_ratio > min_aspect_ratio) & (aspect_ratio < max_aspect_ratio)
+    )
+
+# Ventana de interes alrededor de la linea de conteo (x1, y1, x2, y2)
+def compute_roi(line: list, frame_shape: tuple,
+                margin_x: int = 120,
+                margin_top: int = 320,
+                margin_bottom: int = 160) -> tuple:
+
+    frame_height, frame_width = frame_shape[:2]
+    lx1, ly1, lx2, ly2 = line
+
+    x1 = max(0, min(lx1, lx2) - margin_x)
+    x2 = min(frame_width, max(lx1, lx2) + margin_x)
+    y1 = max(0, min(ly1, ly2) - margin_top)
+    y2 = min(frame_height, max(ly1, ly2) + margin_bottom)
+
+    return int(x1), int(y1), int(x2), int(y2)
+
 # Obtener el centro del bbox (Pie de la persona)
 def get_center_bbox(bbox: tuple) -> tuple:
     x1, x2, y1, y2 = bbox
@@ -169,6 +238,11 @@ class DatabaseError(Exception):
     pass
 
 
+class DatabaseTimeoutError(DatabaseError):
+    """Una consulta superó el tiempo máximo de la petición"""
+    pass
+
+
 class ConfigurationError(Exception):
     """Error en la configuración"""
     pass
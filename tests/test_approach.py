@@ -0,0 +1,79 @@
+import numpy as np
+
+from src.approach import evaluate_tracks, get_approach_score, is_approaching_camera
+from src.tracker import PersonTracker, TrackedPerson, TrackStore
+
+
+def reference_stats(samples):
+    """Cálculo directo (como el original) sobre la ventana completa"""
+    y = np.array([s[0] for s in samples], dtype=float)
+    area = np.array([s[1] for s in samples], dtype=float)
+    initial, final = area[:2].mean(), area[-2:].mean()
+    growth = (final - initial) / initial if initial > 0 else 0.0
+    trend = np.polyfit(range(len(y)), y, 1)[0]
+    consistency = np.count_nonzero(np.diff(y) > 5) / (len(y) - 1)
+    return growth, trend, consistency
+
+
+def test_positions_and_history_on_tracked_person():
+    tracker = PersonTracker()
+    tracker.update([[100, 100, 160, 300, 0.9]])
+    person = tracker.get_person(1)
+
+    assert person.positions[-1][:2] == (130, 300)
+    assert person.positions[-1][3:] == (200, 60)
+    assert person.get_position_history().shape == (1, 5)
+    assert person.get_position_history(5).shape == (1, 5)
+
+
+def test_history_is_chronological_after_wraparound():
+    store = TrackStore(history=5, approach_window=3)
+    person = TrackedPerson(store, 1)
+    for i in range(8):
+        person.add_position(i, 10 * i, 100, 40)
+
+    assert [p[0] for p in person.positions] == [3, 4, 5, 6, 7]
+    assert person.get_position_history(3)[:, 0].tolist() == [5, 6, 7]
+    assert person.get_last_position() == (7, 70)
+
+
+def test_incremental_stats_match_direct_computation():
+    rng = np.random.default_rng(0)
+    for history, window in [(20, 8), (8, 8), (5, 2)]:
+        store = TrackStore(history=history, approach_window=window)
+        person = TrackedPerson(store, 1)
+        samples = []
+        for _ in range(60):
+            y, h, w = (int(v) for v in rng.integers([0, 0, 0], [700, 300, 100]))
+            person.add_position(1, y, h, w)
+            samples.append((y, h * w))
+            if len(samples) >= window:
+                expected = reference_stats(samples[-window:])
+                np.testing.assert_allclose(person.approach_stats(), expected, atol=1e-9)
+
+
+def test_approach_score_with_zero_initial_area():
+    store = TrackStore(history=20, approach_window=8)
+    person = TrackedPerson(store, 1)
+    for i in range(10):
+        person.add_position(5, 10 * i, 0, 0)
+
+    assert get_approach_score(person) == 0.0
+
+
+def test_evaluate_tracks_matches_per_person_functions():
+    store = TrackStore(history=20, approach_window=8)
+    approaching = TrackedPerson(store, 1)
+    static = TrackedPerson(store, 2)
+    for i in range(10):
+        approaching.add_position(600, 300 + 25 * i, 150 + 15 * i, 80)
+        static.add_position(200, 300, 150, 60)
+
+    line = [0, 480, 1280, 480]
+    evaluation = evaluate_tracks([approaching, static], line)
+
+    assert evaluation.person_ids.tolist() == [1, 2]
+    assert evaluation.approaching.tolist() == [
+        is_approaching_camera(approaching)[0], is_approaching_camera(static)[0],
+    ]
+    assert evaluation.valid.tolist() == [True, False]
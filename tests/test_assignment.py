@@ -0,0 +1,89 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from src.assignment import hungarian, iou_matrix, linear_assignment
+
+
+def brute_force_cost(cost: np.ndarray) -> float:
+    n, m = cost.shape
+    if n > m:
+        return brute_force_cost(cost.T)
+    return min(
+        sum(cost[i, j] for i, j in zip(range(n), cols))
+        for cols in itertools.permutations(range(m), n)
+    )
+
+
+@pytest.mark.parametrize("shape", [(1, 1), (3, 3), (4, 6), (6, 4), (5, 5)])
+def test_hungarian_matches_brute_force(shape):
+    rng = np.random.default_rng(sum(shape))
+    for _ in range(20):
+        cost = rng.random(shape)
+        rows, cols = hungarian(cost)
+
+        assert len(rows) == min(shape)
+        assert len(set(rows.tolist())) == len(rows)
+        assert len(set(cols.tolist())) == len(cols)
+        assert cost[rows, cols].sum() == pytest.approx(brute_force_cost(cost))
+
+
+def test_hungarian_empty():
+    rows, cols = hungarian(np.empty((0, 3)))
+    assert rows.size == 0 and cols.size == 0
+
+
+def test_linear_assignment_skips_infeasible_pairs():
+    cost = np.array([
+        [0.1, np.inf, 0.9],
+        [np.inf, np.inf, np.inf],
+        [0.2, 0.3, 0.8],
+    ])
+
+    assert linear_assignment(cost, max_cost=0.5) == [(0, 0), (2, 1)]
+
+
+def test_linear_assignment_prefers_more_feasible_pairs():
+    # El mínimo global (0, 0) dejaría a la fila 1 sin pareja factible
+    cost = np.array([
+        [0.0, 0.4],
+        [0.1, np.inf],
+    ])
+
+    assert linear_assignment(cost) == [(0, 1), (1, 0)]
+
+
+def test_linear_assignment_all_blocked():
+    assert linear_assignment(np.full((2, 3), np.inf)) == []
+    assert linear_assignment(np.ones((2, 2)), max_cost=0.5) == []
+    assert linear_assignment(np.empty((0, 0))) == []
+
+
+@pytest.mark.parametrize("solver", ["numpy", "scipy"])
+def test_linear_assignment_solvers_agree(solver):
+    if solver == "scipy":
+        pytest.importorskip("scipy")
+    rng = np.random.default_rng(7)
+    for _ in range(20):
+        cost = rng.random((6, 5))
+        cost[cost > 0.7] = np.inf
+        matches = linear_assignment(cost, max_cost=0.6, solver=solver)
+        reference = linear_assignment(cost, max_cost=0.6, solver="numpy")
+
+        total = sum(cost[r, c] for r, c in matches)
+        assert len(matches) == len(reference)
+        assert total == pytest.approx(sum(cost[r, c] for r, c in reference))
+        assert all(cost[r, c] < 0.6 for r, c in matches)
+
+
+def test_iou_matrix():
+    a = np.array([[0, 0, 10, 10], [0, 0, 0, 0]])
+    b = np.array([[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]])
+
+    iou = iou_matrix(a, b)
+
+    assert iou.shape == (2, 3)
+    np.testing.assert_allclose(iou[0], [1.0, 50 / 150, 0.0])
+    # Caja degenerada: sin división por cero
+    np.testing.assert_array_equal(iou[1], [0.0, 0.0, 0.0])
@@ -0,0 +1,44 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.broadcast import StatsBroadcaster
+
+
+class FakeEngine:
+    def __init__(self):
+        self.entry_listeners = []
+
+    def add_entry_listener(self, listener):
+        self.entry_listeners.append(listener)
+
+
+def make_broadcaster() -> StatsBroadcaster:
+    handler = SimpleNamespace(camera_id="cam0", engine=FakeEngine())
+    return StatsBroadcaster(handler, interval=1.0)
+
+
+def test_entry_after_loop_closed_is_ignored():
+    broadcaster = make_broadcaster()
+    loop = asyncio.new_event_loop()
+    broadcaster._loop = loop
+    broadcaster._wake = asyncio.Event()
+    broadcaster._subscribers.add(object())
+    loop.close()
+
+    broadcaster._on_entry(1)
+
+    assert broadcaster.pushes_on_entry == 0
+
+
+def test_entry_wakes_running_loop():
+    broadcaster = make_broadcaster()
+
+    async def scenario():
+        broadcaster._loop = asyncio.get_running_loop()
+        broadcaster._wake = asyncio.Event()
+        broadcaster._subscribers.add(object())
+        broadcaster._on_entry(1)
+        await asyncio.wait_for(broadcaster._wake.wait(), timeout=1.0)
+
+    asyncio.run(scenario())
+    assert broadcaster.pushes_on_entry == 1
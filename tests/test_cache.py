@@ -0,0 +1,80 @@
+import threading
+import time
+
+from src.cache import TTLCache
+
+
+def test_concurrent_misses_share_one_load():
+    cache = TTLCache(ttl=10.0)
+    calls = []
+    gate = threading.Event()
+
+    def loader():
+        calls.append(1)
+        gate.wait(1.0)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get("stats", loader)))
+        for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    gate.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["value"] * 10
+    assert cache.misses == 1
+    assert cache.coalesced == 9
+
+
+def test_ttl_expiry_reloads():
+    cache = TTLCache(ttl=0.05)
+    values = iter([1, 2])
+    assert cache.get("k", lambda: next(values)) == 1
+    assert cache.get("k", lambda: next(values)) == 1
+    time.sleep(0.06)
+    assert cache.get("k", lambda: next(values)) == 2
+
+
+def test_caller_after_invalidate_does_not_join_stale_flight():
+    cache = TTLCache(ttl=10.0)
+    started = threading.Event()
+    release = threading.Event()
+
+    def stale_loader():
+        started.set()
+        release.wait(1.0)
+        return "old"
+
+    old_result = []
+    leader = threading.Thread(target=lambda: old_result.append(cache.get("k", stale_loader)))
+    leader.start()
+    started.wait(1.0)
+
+    cache.invalidate()
+    assert cache.get("k", lambda: "new") == "new"
+
+    release.set()
+    leader.join()
+
+    assert old_result == ["old"]
+    # El resultado de la carga vieja no reemplaza al nuevo
+    assert cache.get("k", lambda: "reloaded") == "new"
+
+
+def test_loader_error_is_shared_and_not_cached():
+    cache = TTLCache(ttl=10.0)
+
+    def failing():
+        raise ValueError("db caída")
+
+    try:
+        cache.get("k", failing)
+    except ValueError:
+        pass
+    assert cache.get("k", lambda: "ok") == "ok"
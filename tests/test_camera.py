@@ -0,0 +1,63 @@
+import threading
+
+import numpy as np
+
+from config.settings import settings
+from src.camera import CameraManager
+
+
+class BlockingCapture:
+    def __init__(self):
+        self.gate = threading.Event()
+        self.reading = threading.Event()
+        self.released = False
+        self.read_after_release = False
+
+    def read(self):
+        self.reading.set()
+        self.gate.wait(2.0)
+        if self.released:
+            self.read_after_release = True
+        return True, np.zeros((4, 4, 3), dtype=np.uint8)
+
+    def release(self):
+        self.released = True
+
+
+def make_camera(cap) -> CameraManager:
+    camera = CameraManager("0", threaded=True)
+    camera.cap = cap
+    camera.is_opened = True
+    camera._start_capture()
+    return camera
+
+
+def test_release_waits_for_capture_thread_before_releasing(monkeypatch):
+    monkeypatch.setattr(settings, "CAMERA_READ_TIMEOUT", 0.0)
+    cap = BlockingCapture()
+    camera = make_camera(cap)
+    thread = camera._capture_thread
+    assert cap.reading.wait(1.0)
+
+    # El join vence con el hilo aún dentro de cap.read()
+    camera.release()
+    assert not cap.released
+
+    cap.gate.set()
+    thread.join(2.0)
+
+    assert cap.released
+    assert not cap.read_after_release
+    assert camera.cap is None
+
+
+def test_release_after_thread_exits(monkeypatch):
+    monkeypatch.setattr(settings, "CAMERA_READ_TIMEOUT", 1.0)
+    cap = BlockingCapture()
+    cap.gate.set()
+    camera = make_camera(cap)
+
+    camera.release()
+
+    assert cap.released
+    assert camera.cap is None and not camera.is_opened
@@ -0,0 +1,189 @@
+import time
+from datetime import date, datetime
+
+import pytest
+
+from src.database import DatabaseManager, Entry, EntryWriter
+
+
+class FakeCursor:
+    def __init__(self, fail: bool = False, rows=None):
+        self.fail = fail
+        self.rows = rows or []
+        self.executed = []
+        self.executed_many = []
+        self.closed = False
+        self.lastrowid = None
+
+    def execute(self, query, params=None):
+        if self.fail:
+            raise RuntimeError("execute falló")
+        self.executed.append((query, params))
+
+    def executemany(self, query, params):
+        self.executed_many.append((" ".join(query.split()), list(params)))
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self, cursor: FakeCursor):
+        self._cursor = cursor
+        self.closed = False
+        self.commits = 0
+
+    def cursor(self, dictionary=False):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def start_transaction(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def make_db(connection: FakeConnection) -> DatabaseManager:
+    db = DatabaseManager.__new__(DatabaseManager)
+    db._get_connection = lambda: connection
+    return db
+
+
+def test_insert_recommendation_commits_and_releases():
+    connection = FakeConnection(FakeCursor())
+    make_db(connection).insert_recommendation("AI_Recommendation", {"status": "success"})
+
+    (query, params), = connection._cursor.executed
+    assert "INSERT INTO recomendaciones" in query
+    assert params[0] == "AI_Recommendation"
+    assert connection.commits == 1
+    assert connection._cursor.closed and connection.closed
+
+
+def test_insert_recommendation_releases_connection_on_error():
+    connection = FakeConnection(FakeCursor(fail=True))
+
+    with pytest.raises(RuntimeError):
+        make_db(connection).insert_recommendation("AI_Recommendation", {})
+
+    assert connection._cursor.closed and connection.closed
+
+
+def make_entry(index: int) -> Entry:
+    return Entry(datetime(2026, 1, 1), index, 100, 400, 0.9)
+
+
+class RecordingDb:
+    def __init__(self):
+        self.inserted = []
+
+    def insert_entries(self, entries):
+        self.inserted.extend(entry.total_entries for entry in entries)
+
+
+def test_writer_submit_spills_to_overflow_instead_of_blocking():
+    db = RecordingDb()
+    writer = EntryWriter(db, max_queue=2, flush_interval=0.01, flush_size=2)
+    writer.put_timeout = 0.01
+
+    start = time.monotonic()
+    for index in range(6):
+        writer.submit(make_entry(index))
+
+    assert time.monotonic() - start < 1.0
+    assert writer.overflowed == 4
+    assert writer.pending_count == 6
+
+    writer.start()
+    try:
+        assert writer.flush(timeout=2.0)
+    finally:
+        writer.stop()
+
+    assert db.inserted == list(range(6))
+
+
+def rollup_params(cursor: FakeCursor, table: str):
+    params = next(params for query, params in cursor.executed_many if f"INTO {table} " in query)
+    return sorted(
+        (key, camera_id, count, round(conf, 6)) for key, camera_id, count, conf in params
+    )
+
+
+def test_update_rollups_upserts_hour_and_day_buckets():
+    cursor = FakeCursor()
+    entries = [
+        Entry(datetime(2026, 1, 1, 9, 5), 1, 0, 0, 0.5),
+        Entry(datetime(2026, 1, 1, 9, 55), 2, 0, 0, 0.7),
+        Entry(datetime(2026, 1, 1, 10, 1), 3, 0, 0, 0.9),
+        Entry(datetime(2026, 1, 2, 0, 0), 4, 0, 0, 0.6),
+    ]
+
+    DatabaseManager._update_rollups(cursor, entries)
+
+    queries = [query for query, _ in cursor.executed_many]
+    assert all("ON DUPLICATE KEY UPDATE total = total + VALUES(total)" in q for q in queries)
+    assert rollup_params(cursor, "entradas_hora") == [
+        (datetime(2026, 1, 1, 9), "default", 2, 1.2),
+        (datetime(2026, 1, 1, 10), "default", 1, 0.9),
+        (datetime(2026, 1, 2, 0), "default", 1, 0.6),
+    ]
+    assert rollup_params(cursor, "entradas_dia") == [
+        (date(2026, 1, 1), "default", 3, 2.1),
+        (date(2026, 1, 2), "default", 1, 0.6),
+    ]
+
+
+def test_update_rollups_keeps_cameras_in_separate_buckets():
+    cursor = FakeCursor()
+    entries = [
+        Entry(datetime(2026, 1, 1, 9, 5), 1, 0, 0, 0.5, camera_id="entrada"),
+        Entry(datetime(2026, 1, 1, 9, 10), 1, 0, 0, 0.7, camera_id="patio"),
+        Entry(datetime(2026, 1, 1, 9, 20), 2, 0, 0, 0.9, camera_id="entrada"),
+    ]
+
+    DatabaseManager._update_rollups(cursor, entries)
+
+    assert rollup_params(cursor, "entradas_hora") == [
+        (datetime(2026, 1, 1, 9), "entrada", 2, 1.4),
+        (datetime(2026, 1, 1, 9), "patio", 1, 0.7),
+    ]
+    assert rollup_params(cursor, "entradas_dia") == [
+        (date(2026, 1, 1), "entrada", 2, 1.4),
+        (date(2026, 1, 1), "patio", 1, 0.7),
+    ]
+
+
+def test_insert_entries_rolls_up_only_new_rows():
+    entries = [make_entry(1), make_entry(2)]
+    cursor = FakeCursor(rows=[(entries[0].entry_key,)])
+    connection = FakeConnection(cursor)
+
+    make_db(connection).insert_entries(entries)
+
+    inserted = next(params for query, params in cursor.executed_many if "INTO entradas " in query)
+    assert [row[-2:] for row in inserted] == [(entries[1].entry_key, "default")]
+    assert rollup_params(cursor, "entradas_hora") == [(datetime(2026, 1, 1), "default", 1, 0.9)]
+    assert connection.commits == 1
+
+
+def test_writer_overflow_is_bounded_and_counts_drops():
+    writer = EntryWriter(RecordingDb(), max_queue=2, flush_interval=0.01, flush_size=2)
+    writer.put_timeout = 0.0
+    writer.max_overflow = 3
+
+    for index in range(10):
+        writer.submit(make_entry(index))
+
+    assert writer.overflowed == 3
+    assert writer.dropped == 5
+    assert writer.pending_count == 5
@@ -0,0 +1,65 @@
+import threading
+
+import numpy as np
+
+from src.detector import BatchScheduler
+
+
+class FakeDetector:
+    def __init__(self, block: threading.Event = None):
+        self.imgsz = 640
+        self.block = block
+        self.direct_calls = 0
+
+    def detect(self, frame, roi=None):
+        self.direct_calls += 1
+        return np.array([[0, 0, 10, 10, 0.9]], dtype=np.float32)
+
+    def detect_batch(self, frames, rois=None):
+        if self.block is not None:
+            self.block.wait(1.0)
+        return [np.array([[1, 1, 5, 5, 0.8]], dtype=np.float32) for _ in frames]
+
+
+def test_detect_goes_through_batch():
+    scheduler = BatchScheduler(FakeDetector(), max_batch_size=2, max_wait=0.01)
+    scheduler.start()
+    try:
+        detections = scheduler.detect(np.zeros((4, 4, 3), dtype=np.uint8))
+    finally:
+        scheduler.stop()
+
+    assert detections[0, 4] == np.float32(0.8)
+    assert scheduler.frames_processed == 1
+
+
+def test_submit_after_stop_is_rejected():
+    scheduler = BatchScheduler(FakeDetector(), max_batch_size=2, max_wait=0.01)
+    scheduler.start()
+    thread = scheduler._thread
+    scheduler.stop()
+    # Simula la carrera: el hilo seguía vivo al chequear en detect()
+    scheduler._thread = thread
+
+    future = scheduler.submit(np.zeros((4, 4, 3), dtype=np.uint8))
+
+    assert future.done() and future.exception() is not None
+    assert scheduler._queue.empty()
+
+
+def test_detect_falls_back_when_scheduler_hangs():
+    gate = threading.Event()
+    detector = FakeDetector(block=gate)
+    scheduler = BatchScheduler(detector, max_batch_size=1, max_wait=0.0)
+    scheduler.RESULT_TIMEOUT = 0.05
+    scheduler.start()
+    try:
+        frame = np.zeros((4, 4, 3), dtype=np.uint8)
+        scheduler.submit(frame)
+        detections = scheduler.detect(frame)
+    finally:
+        gate.set()
+        scheduler.stop()
+
+    assert detector.direct_calls == 1
+    assert detections[0, 4] == np.float32(0.9)
@@ -0,0 +1,43 @@
+import asyncio
+
+import numpy as np
+
+from src.stream import FrameSlot
+
+
+def test_publish_and_read_with_sequence():
+    slot = FrameSlot()
+    assert slot.read() == (0, 0.0, None)
+
+    frame = np.full((4, 4, 3), 7, dtype=np.uint8)
+    slot.publish(frame, timestamp=12.5)
+    out = np.empty_like(frame)
+    seq, timestamp, copy = slot.read(out)
+
+    assert (seq, timestamp) == (1, 12.5)
+    assert copy is out and np.array_equal(copy, frame)
+    assert slot.wait_for_newer(0, timeout=0.0)
+    assert not slot.wait_for_newer(1, timeout=0.0)
+
+
+def test_publish_with_closed_loop_waiter_does_not_raise():
+    slot = FrameSlot()
+    loop = asyncio.new_event_loop()
+    slot._async_waiters.append((loop, loop.create_future()))
+    loop.close()
+
+    slot.publish(np.zeros((2, 2, 3), dtype=np.uint8))
+
+    assert slot.seq == 1
+
+
+def test_async_wait_wakes_on_publish():
+    slot = FrameSlot()
+
+    async def scenario():
+        waiter = asyncio.ensure_future(slot.async_wait_for_newer(0, timeout=1.0))
+        await asyncio.sleep(0)
+        slot.publish(np.zeros((2, 2, 3), dtype=np.uint8))
+        return await waiter
+
+    assert asyncio.run(scenario())
@@ -0,0 +1,65 @@
+import numpy as np
+
+from src.kalman import ConstantVelocityKalman
+from src.tracker import TrackedPerson, TrackStore
+
+H = np.array([[1.0, 0.0, 0.0, 0.0],
+              [0.0, 1.0, 0.0, 0.0]])
+
+
+def reference_predict(state, P, dt, q):
+    F = np.eye(4)
+    F[0, 2] = F[1, 3] = dt
+    dt2, dt3, dt4 = dt * dt, dt ** 3 / 2, dt ** 4 / 4
+    Q = q * np.array([
+        [dt4, 0.0, dt3, 0.0],
+        [0.0, dt4, 0.0, dt3],
+        [dt3, 0.0, dt2, 0.0],
+        [0.0, dt3, 0.0, dt2],
+    ])
+    return F @ state, F @ P @ F.T + Q
+
+
+def reference_update(state, P, xy, r):
+    S = H @ P @ H.T + np.eye(2) * r
+    K = P @ H.T @ np.linalg.inv(S)
+    return state + K @ (xy - H @ state), (np.eye(4) - K @ H) @ P
+
+
+def test_batched_filter_matches_matrix_form():
+    kalman = ConstantVelocityKalman(measurement_noise=15, process_noise=400)
+    rng = np.random.default_rng(0)
+    xy = rng.uniform(0, 700, (3, 2))
+    state, cov = kalman.initiate(xy)
+    ref = [(state[i].copy(), cov[i].copy()) for i in range(3)]
+
+    for _ in range(5):
+        dt = rng.uniform(0.02, 0.3, 3)
+        state, cov = kalman.predict(state, cov, dt)
+        measured = state[:, :2] + rng.normal(0, 10, (3, 2))
+        state, cov = kalman.update(state, cov, measured)
+
+        for i in range(3):
+            s, P = reference_predict(*ref[i], dt[i], 400 ** 2)
+            ref[i] = reference_update(s, P, measured[i], 15 ** 2)
+            np.testing.assert_allclose(state[i], ref[i][0], rtol=1e-9, atol=1e-6)
+            np.testing.assert_allclose(cov[i], ref[i][1], rtol=1e-9, atol=1e-6)
+
+    S, S_inv = kalman.innovation_covariance(cov)
+    np.testing.assert_allclose(S_inv, np.linalg.inv(S))
+
+
+def test_filter_state_lives_in_store_and_resets_on_reuse():
+    store = TrackStore(history=10, capacity=2, approach_window=4)
+    person = TrackedPerson(store, 1)
+    person.add_position(100, 300, 120, 50)
+    person.add_position(110, 310, 120, 50)
+    assert store.kf_state[person.slot, 0] > 100
+
+    slot = person.slot
+    store.release(slot)
+    reused = TrackedPerson(store, 2)
+    reused.add_position(500, 200, 120, 50)
+
+    assert reused.slot == slot
+    np.testing.assert_array_equal(store.kf_state[slot], [500, 200, 0, 0])
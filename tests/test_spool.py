@@ -0,0 +1,175 @@
+from datetime import datetime
+
+import pytest
+
+from src.database import Entry
+from src.spool import EntrySpool, SpoolReplayer
+from src.utils import DatabaseError
+
+
+def make_entry(index: int) -> Entry:
+    return Entry(datetime(2026, 1, 1, 12, 0, index), index, 100, 400, 0.9)
+
+
+class FakeDb:
+    def __init__(self, fail_on_call: int = None):
+        self.inserted = []
+        self.calls = 0
+        self.fail_on_call = fail_on_call
+
+    def insert_entries(self, entries):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise DatabaseError("MySQL caído")
+        self.inserted.extend(entries)
+
+
+def make_spool(tmp_path, **kwargs) -> EntrySpool:
+    return EntrySpool(tmp_path, fsync_interval=0.0, **kwargs)
+
+
+def test_replay_sends_everything_once(tmp_path):
+    spool = make_spool(tmp_path)
+    for index in range(5):
+        spool.append(make_entry(index))
+    db = FakeDb()
+    replayer = SpoolReplayer(spool, lambda: db, batch_size=2)
+
+    assert replayer.replay_once() == 5
+    assert replayer.replay_once() == 0
+
+    assert [e.total_entries for e in db.inserted] == list(range(5))
+    segment, offset = spool.load_checkpoint()
+    assert segment == spool.active_segment.name
+    assert offset == spool.active_segment.stat().st_size
+
+
+def test_replay_resumes_from_checkpoint_after_failure(tmp_path):
+    spool = make_spool(tmp_path)
+    entries = [make_entry(index) for index in range(5)]
+    for entry in entries:
+        spool.append(entry)
+    db = FakeDb(fail_on_call=2)
+    replayer = SpoolReplayer(spool, lambda: db, batch_size=2)
+
+    with pytest.raises(DatabaseError):
+        replayer.replay_once()
+    assert [e.entry_key for e in db.inserted] == [e.entry_key for e in entries[:2]]
+
+    assert replayer.replay_once() == 3
+    assert [e.entry_key for e in db.inserted] == [e.entry_key for e in entries]
+
+
+def test_sealed_segments_are_removed_after_replay(tmp_path):
+    spool = make_spool(tmp_path, segment_max_bytes=1)
+    for index in range(3):
+        spool.append(make_entry(index))
+    assert len(spool.list_segments()) == 4
+
+    db = FakeDb()
+    SpoolReplayer(spool, lambda: db).replay_once()
+
+    assert spool.list_segments() == [spool.active_segment]
+    assert [e.total_entries for e in db.inserted] == [0, 1, 2]
+
+
+def test_partial_line_waits_for_next_replay(tmp_path):
+    spool = make_spool(tmp_path)
+    spool.append(make_entry(0))
+    line = spool.active_segment.read_bytes()
+    with open(spool.active_segment, "ab") as f:
+        f.write(line[:10])
+
+    db = FakeDb()
+    replayer = SpoolReplayer(spool, lambda: db)
+    assert replayer.replay_once() == 1
+
+    with open(spool.active_segment, "ab") as f:
+        f.write(line[10:])
+    assert replayer.replay_once() == 1
+    assert len(db.inserted) == 2
+
+
+def test_restart_replays_previous_segment(tmp_path):
+    spool = make_spool(tmp_path)
+    spool.append(make_entry(0))
+    spool.close()
+
+    restarted = make_spool(tmp_path)
+    restarted.append(make_entry(1))
+    db = FakeDb()
+    SpoolReplayer(restarted, lambda: db).replay_once()
+
+    assert [e.total_entries for e in db.inserted] == [0, 1]
+    assert restarted.list_segments() == [restarted.active_segment]
+
+
+def test_unavailable_database_keeps_entries(tmp_path):
+    spool = make_spool(tmp_path)
+    spool.append(make_entry(0))
+    replayer = SpoolReplayer(spool, lambda: None)
+
+    with pytest.raises(DatabaseError):
+        replayer.replay_once()
+
+    assert spool.load_checkpoint() == (None, 0)
+    assert spool.pending_bytes() > 0
+
+
+class AppendingDb(FakeDb):
+    """Simula al hilo de video escribiendo en el spool durante el INSERT"""
+
+    def __init__(self, spool: EntrySpool, extra: int):
+        super().__init__()
+        self.spool = spool
+        self.extra = extra
+
+    def insert_entries(self, entries):
+        super().insert_entries(entries)
+        for _ in range(self.extra):
+            self.spool.append(make_entry(len(self.inserted)))
+        self.extra = 0
+
+
+def test_rotation_during_insert_does_not_lose_entries(tmp_path):
+    spool = make_spool(tmp_path, segment_max_bytes=10000)
+    for index in range(5):
+        spool.append(make_entry(index))
+    db = AppendingDb(spool, extra=55)
+    replayer = SpoolReplayer(spool, lambda: db, batch_size=50)
+
+    while replayer.replay_once():
+        pass
+
+    keys = [e.entry_key for e in db.inserted]
+    assert len(keys) == 60
+    assert len(set(keys)) == 60
+    assert len(spool.list_segments()) >= 1
+
+
+def test_append_after_close_is_kept(tmp_path):
+    spool = make_spool(tmp_path)
+    spool.append(make_entry(0))
+    spool.close()
+
+    spool.append(make_entry(1))
+
+    db = FakeDb()
+    SpoolReplayer(make_spool(tmp_path), lambda: db).replay_once()
+    assert [e.total_entries for e in db.inserted] == [0, 1]
+
+
+def test_partial_line_from_crash_is_trimmed_on_restart(tmp_path):
+    spool = make_spool(tmp_path)
+    spool.append(make_entry(0))
+    spool.close()
+    segment = spool.active_segment
+    with open(segment, "ab") as f:
+        f.write(b'{"timestamp":"2026')
+
+    restarted = make_spool(tmp_path)
+    db = FakeDb()
+    SpoolReplayer(restarted, lambda: db).replay_once()
+
+    assert [e.total_entries for e in db.inserted] == [0]
+    assert not segment.exists()
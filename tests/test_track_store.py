@@ -0,0 +1,133 @@
+import threading
+
+import numpy as np
+
+from src.tracker import PersonTracker, TrackedPerson, TrackStore
+
+
+def add_detections(person: TrackedPerson, count: int, y: int = 300):
+    for _ in range(count):
+        person.add_position(100, y, 120, 50, 0.9)
+
+
+def test_released_slot_is_reused_with_clean_state():
+    store = TrackStore(history=10, capacity=4, approach_window=4)
+    first = TrackedPerson(store, 1)
+    add_detections(first, 5)
+    first.counted = True
+
+    slot = first.slot
+    store.release(slot)
+    second = TrackedPerson(store, 2)
+
+    assert second.slot == slot
+    assert second.history_length == 0
+    assert second.total_detections == 0
+    assert not second.counted
+    assert store.person_id[slot] == 2
+    assert second.approach_stats() == (0.0, 0.0, 0.0)
+
+
+def test_grow_keeps_existing_tracks():
+    store = TrackStore(history=10, capacity=2, approach_window=4)
+    people = [TrackedPerson(store, i) for i in range(1, 4)]
+    for index, person in enumerate(people):
+        add_detections(person, 3, y=100 * (index + 1))
+
+    assert store.capacity == 4
+    assert [p.get_last_position() for p in people] == [(100, 100), (100, 200), (100, 300)]
+    assert [p.total_detections for p in people] == [3, 3, 3]
+    assert all(store.handles[p.slot] is p for p in people)
+
+
+def test_clear_releases_every_slot():
+    store = TrackStore(history=10, capacity=4, approach_window=4)
+    for i in range(3):
+        TrackedPerson(store, i)
+
+    store.clear()
+
+    assert not store.used.any()
+    assert all(handle is None for handle in store.handles)
+    assert len(store._free) == store.capacity
+
+
+def test_active_mask_and_stale_slots():
+    store = TrackStore(history=10, capacity=4, approach_window=4)
+    stable = TrackedPerson(store, 1)
+    add_detections(stable, 3)
+    new = TrackedPerson(store, 2)
+    add_detections(new, 1)
+    lost = TrackedPerson(store, 3)
+    add_detections(lost, 3)
+    store.frames_lost[lost.slot] = 20
+
+    active = np.flatnonzero(store.active_mask())
+    assert active.tolist() == [stable.slot]
+    assert np.array_equal(store.active_mask(), store.active_mask(in_place=True))
+
+    stale = store.stale_slots(now=store.last_seen.max(), timeout=1.5, max_frames_lost=10)
+    assert stale.tolist() == [lost.slot]
+
+
+def test_count_active_tracks_does_not_touch_scratch_buffers():
+    tracker = PersonTracker()
+    tracker.update([[100, 100, 160, 300, 0.9]])
+
+    scratch = tracker.store._scratch.copy()
+    active = tracker.store._active.copy()
+    tracker._active_people = None
+    tracker.count_active_tracks()
+
+    assert np.array_equal(tracker.store._scratch, scratch)
+    assert np.array_equal(tracker.store._active, active)
+
+
+def test_count_active_tracks_while_store_grows():
+    tracker = PersonTracker()
+    errors = []
+    done = threading.Event()
+
+    def reader():
+        while not done.is_set():
+            try:
+                tracker._active_people = None
+                tracker.count_active_tracks()
+            except Exception as e:
+                errors.append(e)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    try:
+        for i in range(300):
+            TrackedPerson(tracker.store, i)
+    finally:
+        done.set()
+        thread.join()
+
+    assert tracker.store.capacity >= 300
+    assert not errors
+
+
+def test_batched_observe_matches_per_track_updates():
+    rng = np.random.default_rng(1)
+    batched = TrackStore(history=6, capacity=4, approach_window=4)
+    single = TrackStore(history=6, capacity=4, approach_window=4)
+    batched_people = [TrackedPerson(batched, i) for i in range(3)]
+    single_people = [TrackedPerson(single, i) for i in range(3)]
+    slots = np.array([p.slot for p in batched_people])
+
+    for frame in range(10):
+        t = 100.0 + frame / 15
+        measurements = np.column_stack([
+            rng.integers(0, 1280, 3), rng.integers(0, 720, 3),
+            rng.integers(100, 300, 3), rng.integers(40, 120, 3),
+            rng.uniform(0.3, 0.9, 3),
+        ]).astype(np.float64)
+        batched.observe(slots, measurements, t)
+        for person, row in zip(single_people, measurements):
+            single.observe(np.array([person.slot]), row[None, :], t)
+
+    for name in ("positions", "head", "length", "sum_t", "sum_y", "sum_ty",
+                 "steps_down", "kf_state", "kf_cov", "confidence"):
+        np.testing.assert_allclose(getattr(batched, name), getattr(single, name), err_msg=name)
@@ -0,0 +1,51 @@
+from src.tracker import PersonTracker
+
+
+def make_tracker(two_stage: bool) -> PersonTracker:
+    tracker = PersonTracker(two_stage=two_stage)
+    tracker.high_confidence = 0.5
+    return tracker
+
+
+def test_low_confidence_box_extends_existing_track():
+    tracker = make_tracker(two_stage=True)
+    tracker.update([[100, 100, 160, 300, 0.9]])
+
+    tracker.update([[102, 102, 162, 302, 0.3]])
+
+    assert list(tracker.tracked_people) == [1]
+    assert tracker.get_person(1).total_detections == 2
+    assert tracker.low_confidence_matches == 1
+
+
+def test_low_confidence_box_never_creates_track():
+    tracker = make_tracker(two_stage=True)
+    tracker.update([[100, 100, 160, 300, 0.9]])
+
+    # Lejos del track existente: en dos etapas se descarta
+    tracker.update([[900, 100, 960, 300, 0.3]])
+
+    assert list(tracker.tracked_people) == [1]
+    assert tracker.low_confidence_matches == 0
+
+
+def test_high_confidence_matched_first():
+    tracker = make_tracker(two_stage=True)
+    tracker.update([[100, 100, 160, 300, 0.9], [600, 100, 660, 300, 0.9]])
+
+    # La caja confiable toma al track 1; la débil solo puede sostener al 2
+    tracker.update([[101, 100, 161, 300, 0.8], [104, 104, 164, 304, 0.3]])
+
+    assert sorted(tracker.tracked_people) == [1, 2]
+    assert tracker.get_person(1).total_detections == 2
+    assert tracker.get_person(2).total_detections == 1
+    assert tracker.low_confidence_matches == 0
+
+
+def test_single_stage_creates_track_from_low_confidence_box():
+    tracker = make_tracker(two_stage=False)
+    tracker.update([[100, 100, 160, 300, 0.9]])
+
+    tracker.update([[900, 100, 960, 300, 0.3]])
+
+    assert sorted(tracker.tracked_people) == [1, 2]